@@ -0,0 +1,350 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import binascii
+import logging
+import mmap
+import os
+import tempfile
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from a2a.types import (
+    Artifact,
+    FilePart,
+    FileWithBytes,
+    FileWithUri,
+    Part,
+    TaskArtifactUpdateEvent,
+    TextPart,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_THRESHOLD = 1 << 20
+
+TEXT_MIME_TYPE = "text/plain; charset=utf-8"
+
+
+class SpillBuffer:
+    """
+    A growable byte buffer that moves to a temporary file past `threshold`
+    bytes.
+
+    `view()` returns a memoryview of the contents without copying them: of
+    the bytearray, or of a read-only mmap of the file. The buffer can't be
+    written to while a view is held.
+    """
+
+    def __init__(self, threshold: int, directory: str | os.PathLike | None = None):
+        self._threshold = threshold
+        self._directory = directory
+        self._data = bytearray()
+        self._file = None
+        self._mmap: mmap.mmap | None = None
+        self.size = 0
+
+    @property
+    def path(self) -> Path | None:
+        """The file holding the contents, once spilled."""
+        return Path(self._file.name) if self._file is not None else None
+
+    def write(self, data: bytes) -> None:
+        if self._mmap is not None:
+            raise BufferError("SpillBuffer is mapped and can't grow")
+        if self._file is None and self.size + len(data) > self._threshold:
+            self._file = tempfile.NamedTemporaryFile(  # noqa: SIM115 - open until close()
+                prefix="za-artifact-", dir=self._directory, delete=False
+            )
+            # Deleted on close(), or when collected or at exit otherwise.
+            self._cleanup = weakref.finalize(
+                self, _remove, self._file, Path(self._file.name)
+            )
+            self._file.write(self._data)
+            self._data = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._data += data
+        self.size += len(data)
+
+    def flush(self) -> None:
+        """Writes the contents through to the file, once spilled."""
+        if self._file is not None:
+            self._file.flush()
+
+    def view(self) -> memoryview:
+        if self._file is None:
+            return memoryview(self._data)
+        if self._mmap is None:
+            self._file.flush()
+            if self.size == 0:
+                return memoryview(b"")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A caller still holds a view; the map goes with it.
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._cleanup()
+            self._file = None
+        self._data = bytearray()
+        self.size = 0
+
+
+def _remove(file, path: Path) -> None:
+    file.close()
+    path.unlink(missing_ok=True)
+
+
+@dataclass
+class _Segment:
+    """Consecutive text, or bytes of one file, or a part kept as is."""
+
+    buffer: SpillBuffer | None = None
+    is_text: bool = False
+    name: str | None = None
+    mime_type: str | None = None
+    metadata: dict[str, Any] | None = None
+    part: Part | None = None
+
+
+@dataclass
+class AssembledArtifact:
+    """
+    An artifact assembled from streamed chunks.
+
+    Text parts are concatenated into one UTF-8 buffer, and the decoded
+    bytes of consecutive chunks of a file into another; other parts are kept
+    as they are. `complete` is False if the stream ended without its last
+    chunk.
+    """
+
+    artifact_id: str
+    name: str | None
+    description: str | None
+    metadata: dict[str, Any] | None
+    extensions: list[str] | None
+    spill_threshold: int
+    spill_dir: str | os.PathLike | None = None
+    complete: bool = False
+    _segments: list[_Segment] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def start(
+        cls,
+        artifact: Artifact,
+        spill_threshold: int,
+        spill_dir: str | os.PathLike | None = None,
+    ) -> "AssembledArtifact":
+        return cls(
+            artifact_id=artifact.artifact_id,
+            name=artifact.name,
+            description=artifact.description,
+            metadata=artifact.metadata,
+            extensions=artifact.extensions,
+            spill_threshold=spill_threshold,
+            spill_dir=spill_dir,
+        )
+
+    @property
+    def size(self) -> int:
+        return sum(s.buffer.size for s in self._segments if s.buffer is not None)
+
+    @property
+    def spilled(self) -> bool:
+        return any(s.buffer is not None and s.buffer.path for s in self._segments)
+
+    def extend(self, parts: list[Part]) -> None:
+        for part in parts:
+            root = part.root
+            if isinstance(root, TextPart):
+                self._segment(True, None, TEXT_MIME_TYPE, root.metadata).buffer.write(
+                    root.text.encode()
+                )
+            elif isinstance(root, FilePart) and isinstance(root.file, FileWithBytes):
+                try:
+                    data = base64.b64decode(root.file.bytes, validate=True)
+                except (binascii.Error, ValueError):
+                    logger.warning(
+                        "Keeping a chunk of artifact %s that isn't valid base64",
+                        self.artifact_id,
+                    )
+                    self._segments.append(_Segment(part=part))
+                    continue
+                self._segment(
+                    False, root.file.name, root.file.mime_type, root.metadata
+                ).buffer.write(data)
+            else:
+                self._segments.append(_Segment(part=part))
+
+    def _segment(
+        self,
+        is_text: bool,
+        name: str | None,
+        mime_type: str | None,
+        metadata: dict[str, Any] | None,
+    ) -> _Segment:
+        last = self._segments[-1] if self._segments else None
+        if (
+            last is not None
+            and last.buffer is not None
+            and last.is_text == is_text
+            and (is_text or (last.name, last.mime_type) == (name, mime_type))
+        ):
+            return last
+        segment = _Segment(
+            buffer=SpillBuffer(self.spill_threshold, self.spill_dir),
+            is_text=is_text,
+            name=name,
+            mime_type=mime_type,
+            metadata=metadata,
+        )
+        self._segments.append(segment)
+        return segment
+
+    def view(self, part_index: int = 0) -> memoryview:
+        """
+        The bytes of a part of `to_artifact()` without copying them: UTF-8
+        for text, decoded for files.
+        """
+        buffer = self._segments[part_index].buffer
+        if buffer is None:
+            raise TypeError(f"part {part_index} of {self.artifact_id} isn't buffered")
+        return buffer.view()
+
+    def to_artifact(self) -> Artifact:
+        """
+        The assembled `Artifact`. A part that spilled to disk is returned as
+        a `file://` URI rather than read back into memory. The file lives only
+        as long as this `AssembledArtifact`: it is deleted on `close()`, so
+        its part is marked `"temporary": True` in its metadata and must be
+        copied to be kept.
+        """
+        parts = []
+        for i, segment in enumerate(self._segments):
+            buffer = segment.buffer
+            if buffer is None:
+                parts.append(segment.part)
+            elif buffer.path is not None:
+                buffer.flush()
+                file = FileWithUri(
+                    uri=buffer.path.as_uri(),
+                    name=segment.name or self.name,
+                    mimeType=segment.mime_type,
+                )
+                metadata = {**(segment.metadata or {}), "temporary": True}
+                parts.append(Part(root=FilePart(file=file, metadata=metadata)))
+            elif segment.is_text:
+                text = str(self.view(i), "utf-8", "replace")
+                parts.append(Part(root=TextPart(text=text, metadata=segment.metadata)))
+            else:
+                file = FileWithBytes(
+                    bytes=base64.b64encode(self.view(i)).decode("ascii"),
+                    name=segment.name,
+                    mimeType=segment.mime_type,
+                )
+                parts.append(Part(root=FilePart(file=file, metadata=segment.metadata)))
+        metadata = self.metadata
+        if not self.complete:
+            metadata = {**(metadata or {}), "incomplete": True}
+        return Artifact(
+            artifactId=self.artifact_id,
+            name=self.name,
+            description=self.description,
+            metadata=metadata,
+            extensions=self.extensions,
+            parts=parts,
+        )
+
+    def close(self) -> None:
+        """Frees the buffers and deletes spilled files."""
+        for segment in self._segments:
+            if segment.buffer is not None:
+                segment.buffer.close()
+        self._segments.clear()
+
+
+class ArtifactAssembler:
+    """
+    Reassembles artifacts streamed as `TaskArtifactUpdateEvent` chunks.
+
+    Chunks are keyed by task and artifact id. A chunk that isn't an append
+    starts the artifact over, as A2A specifies; an append whose first chunk
+    never arrived starts it from that chunk. Buffers larger than
+    `spill_threshold` bytes are moved to temporary files in `spill_dir`.
+    """
+
+    def __init__(
+        self,
+        spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+        spill_dir: str | os.PathLike | None = None,
+    ):
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self._open: dict[tuple[str, str], AssembledArtifact] = {}
+
+    def is_open(self, task_id: str, artifact_id: str) -> bool:
+        return (task_id, artifact_id) in self._open
+
+    def add(
+        self, task_id: str, event: TaskArtifactUpdateEvent
+    ) -> AssembledArtifact | None:
+        """Adds a chunk; returns the artifact once its last chunk is in."""
+        artifact = event.artifact
+        key = (task_id, artifact.artifact_id)
+        assembly = self._open.get(key)
+        if not event.append or assembly is None:
+            if event.append:
+                logger.warning(
+                    "Artifact %s of task %s continues a chunk that never "
+                    "arrived; assembling it from here",
+                    artifact.artifact_id,
+                    task_id,
+                )
+            elif assembly is not None:
+                assembly.close()
+            assembly = AssembledArtifact.start(
+                artifact, self.spill_threshold, self.spill_dir
+            )
+            self._open[key] = assembly
+        assembly.extend(artifact.parts)
+
+        # An artifact sent in one piece may leave last_chunk unset.
+        done = event.last_chunk or (event.last_chunk is None and not event.append)
+        if not done:
+            return None
+        del self._open[key]
+        assembly.complete = True
+        return assembly
+
+    def finish_task(self, task_id: str) -> list[AssembledArtifact]:
+        """Returns, incomplete, the artifacts of a task still being streamed."""
+        keys = [key for key in self._open if key[0] == task_id]
+        return [self._open.pop(key) for key in keys]
+
+    def discard_task(self, task_id: str) -> None:
+        for assembly in self.finish_task(task_id):
+            assembly.close()
+
+    def __len__(self) -> int:
+        return len(self._open)
@@ -0,0 +1,224 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+logger = logging.getLogger(__name__)
+
+# AGENT_CARD_CACHE_DIR overrides it.
+DEFAULT_CACHE_DIR = (
+    Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "za" / "agent-cards"
+)
+
+type CardUpdateCallback = Callable[[str, AgentCard], None]
+
+
+@dataclass
+class CachedCard:
+    """An agent card as last fetched from its agent."""
+
+    address: str
+    card: AgentCard
+    etag: str | None
+    # Wall-clock time, so ages survive restarts.
+    fetched_at: float
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class AgentCardCache:
+    """
+    Agent cards of remote agents, cached in memory and on disk.
+
+    A card younger than `ttl` seconds is used as is. An older one is still
+    used, up to `max_stale` seconds, while it is revalidated in the
+    background with its ETag; an unchanged card costs the agent a 304.
+    Cards that aren't cached are fetched concurrently, each waited for at
+    most `timeout` seconds: a slow agent is left out and added through the
+    update callback once its card arrives. Failed agents are retried no
+    more than every `retry_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        directory: str | os.PathLike | None = None,
+        ttl: float = 300.0,
+        max_stale: float = 86400.0,
+        timeout: float = 5.0,
+        retry_interval: float = 30.0,
+    ):
+        self._http = http_client
+        self.directory = Path(
+            directory or os.getenv("AGENT_CARD_CACHE_DIR") or DEFAULT_CACHE_DIR
+        )
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._entries: dict[str, CachedCard] = {}
+        self._failed_at: dict[str, float] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+
+    async def resolve_all(
+        self, addresses: list[str], on_update: CardUpdateCallback | None = None
+    ) -> dict[str, AgentCard]:
+        """Resolves the cards of `addresses` concurrently, skipping failures."""
+        cards = await asyncio.gather(
+            *(self.resolve(address, on_update) for address in addresses)
+        )
+        return {
+            address: card for address, card in zip(addresses, cards) if card is not None
+        }
+
+    async def resolve(
+        self, address: str, on_update: CardUpdateCallback | None = None
+    ) -> AgentCard | None:
+        """Returns the card at `address`, or None if it can't be had in time."""
+        entry = self._entries.get(address) or self._load(address)
+        if entry is not None and entry.age() < self.max_stale:
+            if entry.age() >= self.ttl:
+                self._refresh(address, on_update)
+            return entry.card
+
+        # The fetch outlives a timed-out wait, so a slow agent still joins.
+        task = self._refresh(address, on_update)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except TimeoutError:
+            logger.warning(
+                "No agent card from %s within %.1fs; continuing without it",
+                address,
+                self.timeout,
+            )
+            return None
+
+    def refresh(
+        self, addresses: list[str], on_update: CardUpdateCallback | None = None
+    ) -> None:
+        """Starts background fetches of expired and missing cards."""
+        now = time.monotonic()
+        for address in addresses:
+            entry = self._entries.get(address)
+            if entry is not None and entry.age() < self.ttl:
+                continue
+            if now - self._failed_at.get(address, -self.retry_interval) < (
+                self.retry_interval
+            ):
+                continue
+            self._refresh(address, on_update)
+
+    def _refresh(
+        self, address: str, on_update: CardUpdateCallback | None
+    ) -> asyncio.Task:
+        task = self._refreshing.get(address)
+        if task is None:
+            task = asyncio.create_task(self._fetch(address, on_update))
+            self._refreshing[address] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(address, None))
+        return task
+
+    async def _fetch(
+        self, address: str, on_update: CardUpdateCallback | None
+    ) -> AgentCard | None:
+        cached = self._entries.get(address)
+        headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+        url = address.rstrip("/") + AGENT_CARD_WELL_KNOWN_PATH
+        try:
+            response = await self._http.get(url, headers=headers)
+            if cached is not None and response.status_code == 304:
+                entry = CachedCard(address, cached.card, cached.etag, time.time())
+            else:
+                response.raise_for_status()
+                entry = CachedCard(
+                    address,
+                    AgentCard.model_validate(response.json()),
+                    response.headers.get("ETag"),
+                    time.time(),
+                )
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError covers malformed JSON and invalid cards.
+            self._failed_at[address] = time.monotonic()
+            logger.warning("Could not fetch the agent card at %s: %r", address, e)
+            if cached is not None and cached.age() >= self.max_stale:
+                self._forget(address)
+            return None
+
+        self._failed_at.pop(address, None)
+        self._entries[address] = entry
+        self._save(entry)
+        if on_update is not None:
+            on_update(address, entry.card)
+        return entry.card
+
+    def _path(self, address: str) -> Path:
+        digest = hashlib.sha256(address.encode()).hexdigest()[:32]
+        return self.directory / f"{digest}.json"
+
+    def _load(self, address: str) -> CachedCard | None:
+        try:
+            data = json.loads(self._path(address).read_text(encoding="utf-8"))
+            if data.get("address") != address:
+                return None
+            entry = CachedCard(
+                address,
+                AgentCard.model_validate(data["card"]),
+                data.get("etag"),
+                float(data["fetched_at"]),
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug("Ignoring the cached agent card for %s: %s", address, e)
+            return None
+        self._entries[address] = entry
+        return entry
+
+    def _save(self, entry: CachedCard) -> None:
+        path = self._path(entry.address)
+        data = {
+            "address": entry.address,
+            "etag": entry.etag,
+            "fetched_at": entry.fetched_at,
+            "card": entry.card.model_dump(
+                mode="json", by_alias=True, exclude_none=True
+            ),
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed, so readers never see a partial file.
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug("Could not cache the agent card for %s: %s", entry.address, e)
+
+    def _forget(self, address: str) -> None:
+        self._entries.pop(address, None)
+        try:
+            self._path(address).unlink(missing_ok=True)
+        except OSError:
+            pass
@@ -11,8 +11,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import logging
 import os
+import time
 import uuid
+from collections import OrderedDict
 
 from a2a.types import (
     Artifact,
@@ -25,8 +28,19 @@ from a2a.types import (
 )
 
 # Local imports
+from ._artifact_assembler import (
+    DEFAULT_SPILL_THRESHOLD,
+    ArtifactAssembler,
+    AssembledArtifact,
+)
 from ._remote_agent_connection import TaskCallbackArg
 
+logger = logging.getLogger(__name__)
+
+FINAL_STATES = frozenset(
+    {TaskState.completed, TaskState.failed, TaskState.canceled, TaskState.rejected}
+)
+
 
 class TaskStore:
     """A class that manages task state.
@@ -34,12 +48,48 @@ class TaskStore:
     This class is responsible for processing task updates, managing task state,
     and handling artifact events. It maintains the state of tasks and their
     associated messages.
+
+    Tasks are indexed by id, so an update costs the same however many tasks
+    are stored. Tasks in a final state are kept for `finished_task_ttl`
+    seconds, and at most `max_finished_tasks` of them, least recently
+    updated evicted first, as updates arrive. Tasks still in progress, e.g.
+    waiting for a payment the user never confirms, are evicted once they
+    haven't been updated for `idle_task_ttl` seconds.
+
+    Streamed artifacts are reassembled by an `ArtifactAssembler`; parts
+    larger than `artifact_spill_threshold` bytes are kept in temporary
+    files in `artifact_spill_dir` and returned as `file://` URIs. The files
+    are deleted when their task is evicted, so copy them out to keep them.
     """
 
-    def __init__(self, api_key: str = "", uses_vertex_ai: bool = False):
-        self._tasks: list[Task] = []
-        self._artifact_chunks: dict[str, list[Artifact]] = {}
+    def __init__(
+        self,
+        api_key: str = "",
+        uses_vertex_ai: bool = False,
+        max_finished_tasks: int = 10_000,
+        finished_task_ttl: float = 3600.0,
+        idle_task_ttl: float = 24 * 3600.0,
+        artifact_spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+        artifact_spill_dir: str | None = None,
+    ):
+        self._tasks: dict[str, Task] = {}
+        self._artifacts = ArtifactAssembler(
+            artifact_spill_threshold, artifact_spill_dir
+        )
+        # Assembled artifacts by task id, so their buffers can be viewed.
+        self._assembled: dict[str, dict[str, AssembledArtifact]] = {}
         self._task_map: dict[str, str] = {}
+        # Per task: ids of the messages in its history, and of the messages
+        # mapped to it in `_task_map`.
+        self._history_ids: dict[str, set[str]] = {}
+        self._message_ids: dict[str, set[str]] = {}
+        # Finished task ids by when they were last updated, oldest first.
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._max_finished_tasks = max_finished_tasks
+        self._finished_task_ttl = finished_task_ttl
+        # Unfinished task ids by when they were last updated, oldest first.
+        self._active: OrderedDict[str, float] = OrderedDict()
+        self._idle_task_ttl = idle_task_ttl
 
         # Set environment variables based on auth method
         if uses_vertex_ai:
@@ -49,14 +99,33 @@ class TaskStore:
             os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "FALSE"
             os.environ["GOOGLE_API_KEY"] = api_key
 
+    def get_task(self, task_id: str) -> Task | None:
+        return self._tasks.get(task_id)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def artifact_view(
+        self, task_id: str, artifact_id: str, part_index: int = 0
+    ) -> memoryview | None:
+        """
+        The bytes of a part of a streamed artifact, without copying them;
+        None if the artifact wasn't streamed in chunks or is gone.
+        """
+        assembled = self._assembled.get(task_id, {}).get(artifact_id)
+        return assembled.view(part_index) if assembled is not None else None
+
     def _add_task(self, task: Task):
-        self._tasks.append(task)
+        self._tasks[task.id] = task
 
     def _update_task(self, task: Task):
-        for i, t in enumerate(self._tasks):
-            if t.id == task.id:
-                self._tasks[i] = task
-                return
+        if task.id not in self._tasks:
+            return
+        if self._tasks[task.id] is not task:
+            # A new Task object may carry a different history.
+            self._history_ids.pop(task.id, None)
+        self._tasks[task.id] = task
+        self._track_finished(task)
 
     def update_task(self, task: TaskCallbackArg):
         if isinstance(task, TaskStatusUpdateEvent):
@@ -64,6 +133,8 @@ class TaskStore:
             current_task.status = task.status
             self._attach_message_to_task(task.status.message, current_task.id)
             self._insert_message_history(current_task, task.status.message)
+            if task.status.state in FINAL_STATES:
+                self._finish_artifacts(current_task)
             self._update_task(current_task)
             return current_task
         elif isinstance(task, TaskArtifactUpdateEvent):
@@ -78,41 +149,39 @@ class TaskStore:
             self._update_task(current_task)
             return current_task
         # Otherwise this is a Task, either new or updated
-        elif not any(filter(lambda x: x and x.id == task.id, self._tasks)):
+        elif task.id not in self._tasks:
             self._attach_message_to_task(task.status.message, task.id)
+            if task.status.state in FINAL_STATES:
+                self._finish_artifacts(task)
             self._add_task(task)
+            self._track_finished(task)
             return task
         else:
             self._attach_message_to_task(task.status.message, task.id)
+            if task.status.state in FINAL_STATES:
+                self._finish_artifacts(task)
             self._update_task(task)
             return task
 
     def _attach_message_to_task(self, message: Message | None, task_id: str):
         if message:
             self._task_map[message.message_id] = task_id
+            self._message_ids.setdefault(task_id, set()).add(message.message_id)
 
     def _insert_message_history(self, task: Task, message: Message | None):
-        if not message:
+        if not message or not message.message_id:
             return
         if task.history is None:
             task.history = []
-        message_id = message.message_id
-        if not message_id:
+        seen = self._history_ids.get(task.id)
+        if seen is None:
+            seen = {m.message_id for m in task.history}
+            self._history_ids[task.id] = seen
+        if message.message_id in seen:
+            logger.debug("Message %s already in history", message.message_id)
             return
-        if task.history and (
-            task.status.message
-            and task.status.message.message_id
-            not in [x.message_id for x in task.history]
-        ):
-            task.history.append(task.status.message)
-        elif not task.history and task.status.message:
-            task.history = [task.status.message]
-        else:
-            print(
-                "Message id already in history",
-                task.status.message.messageId if task.status.message else "",
-                task.history,
-            )
+        seen.add(message.message_id)
+        task.history.append(message)
 
     def _add_or_get_task(self, event: TaskCallbackArg):
         task_id = None
@@ -124,7 +193,7 @@ class TaskStore:
             task_id = event.task_id
         if not task_id:
             task_id = str(uuid.uuid4())
-        current_task = next(filter(lambda x: x.id == task_id, self._tasks), None)
+        current_task = self._tasks.get(task_id)
         if not current_task:
             context_id = event.context_id
             current_task = Task(
@@ -138,31 +207,87 @@ class TaskStore:
             return current_task
         return current_task
 
+    def _track_finished(self, task: Task):
+        """Records when `task` last changed, and evicts expired tasks."""
+        now = time.monotonic()
+        if task.status.state in FINAL_STATES:
+            self._active.pop(task.id, None)
+            self._finished[task.id] = now
+            self._finished.move_to_end(task.id)
+        else:
+            self._finished.pop(task.id, None)
+            self._active[task.id] = now
+            self._active.move_to_end(task.id)
+        while self._active:
+            task_id, updated_at = next(iter(self._active.items()))
+            if now - updated_at < self._idle_task_ttl:
+                break
+            logger.info("Forgetting task %s, idle for %.0fs", task_id, now - updated_at)
+            self._active.popitem(last=False)
+            self._forget(task_id)
+        while self._finished:
+            task_id, finished_at = next(iter(self._finished.items()))
+            if (
+                len(self._finished) <= self._max_finished_tasks
+                and now - finished_at < self._finished_task_ttl
+            ):
+                break
+            self._finished.popitem(last=False)
+            self._forget(task_id)
+
+    def _forget(self, task_id: str):
+        self._tasks.pop(task_id, None)
+        self._history_ids.pop(task_id, None)
+        for message_id in self._message_ids.pop(task_id, ()):
+            if self._task_map.get(message_id) == task_id:
+                del self._task_map[message_id]
+        self._artifacts.discard_task(task_id)
+        for assembled in self._assembled.pop(task_id, {}).values():
+            assembled.close()
+
     def _process_artifact_event(
         self, current_task: Task, task_update_event: TaskArtifactUpdateEvent
     ):
         artifact = task_update_event.artifact
-        if not task_update_event.append:
-            # received the first chunk or entire payload for an artifact
-            if task_update_event.last_chunk is None or task_update_event.last_chunk:
-                # last_chunk bit is missing or is set to true, so this is the entire payload
-                # add this to artifacts
-                if not current_task.artifacts:
-                    current_task.artifacts = []
-                current_task.artifacts.append(artifact)
-            else:
-                # this is a chunk of an artifact, stash it in temp store for assemling
-                if artifact.artifactId not in self._artifact_chunks:
-                    self._artifact_chunks[artifact.artifactId] = []
-                self._artifact_chunks[artifact.artifactId].append(artifact)
-        else:
-            # we received an append chunk, add to the existing temp artifact
-            current_temp_artifact = self._artifact_chunks[artifact.artifactId][-1]
-            # TODO handle if current_temp_artifact is missing
-            current_temp_artifact.parts.extend(artifact.parts)
-            if task_update_event.last_chunk:
-                if current_task.artifacts:
-                    current_task.artifacts.append(current_temp_artifact)
-                else:
-                    current_task.artifacts = [current_temp_artifact]
-                del self._artifact_chunks[artifact.artifactId][-1]
+        if (
+            not task_update_event.append
+            and task_update_event.last_chunk is not False
+            and not self._artifacts.is_open(current_task.id, artifact.artifact_id)
+        ):
+            # The entire payload in one event
+            self._add_artifact(current_task, artifact)
+            return
+        assembled = self._artifacts.add(current_task.id, task_update_event)
+        if assembled is not None:
+            self._add_assembled(current_task, assembled)
+
+    def _finish_artifacts(self, task: Task):
+        """
+        Adds the artifacts still being streamed when `task` ended, unless
+        the task already carries them in full.
+        """
+        carried = {artifact.artifact_id for artifact in task.artifacts or []}
+        for assembled in self._artifacts.finish_task(task.id):
+            if assembled.artifact_id in carried:
+                assembled.close()
+                continue
+            logger.warning(
+                "Task %s ended before the last chunk of artifact %s",
+                task.id,
+                assembled.artifact_id,
+            )
+            self._add_assembled(task, assembled)
+
+    def _add_assembled(self, task: Task, assembled: AssembledArtifact):
+        previous = self._assembled.setdefault(task.id, {}).pop(
+            assembled.artifact_id, None
+        )
+        if previous is not None:
+            previous.close()
+        self._assembled[task.id][assembled.artifact_id] = assembled
+        self._add_artifact(task, assembled.to_artifact())
+
+    def _add_artifact(self, task: Task, artifact: Artifact):
+        if not task.artifacts:
+            task.artifacts = []
+        task.artifacts.append(artifact)
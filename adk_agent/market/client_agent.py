@@ -11,14 +11,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import json
 import logging
 import uuid
 
 import httpx
-from a2a.client import A2ACardResolver
 from a2a.types import (
     AgentCard,
+    DataPart,
+    FilePart,
+    FileWithUri,
     JSONRPCError,
     Message,
     MessageSendParams,
@@ -30,9 +33,11 @@ from a2a.types import (
 from google.adk import Agent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models.base_llm import BaseLlm
 from google.adk.tools.tool_context import ToolContext
 
 # Local imports
+from ._card_cache import AgentCardCache
 from ._remote_agent_connection import RemoteAgentConnections, TaskUpdateCallback
 from .wallet import Wallet
 from x402_a2a.core.utils import x402Utils
@@ -53,27 +58,42 @@ class ClientAgent:
         http_client: httpx.AsyncClient,
         wallet: Wallet,
         task_callback: TaskUpdateCallback | None = None,
+        model: str | BaseLlm = "gemini-2.5-flash",
+        card_cache: AgentCardCache | None = None,
+        quote_deadline: float = 10.0,
     ):
-        """Initializes the ClientAgent."""
+        """
+        Initializes the ClientAgent.
+
+        `model` is a model name or any ADK `BaseLlm`, such as a record/replay
+        backend for offline runs. Agent cards are resolved through
+        `card_cache`, by default one caching them in the user's cache
+        directory. `request_quotes` waits `quote_deadline` seconds for
+        merchants to answer.
+        """
+        self.model = model
         self.task_callback = task_callback
         self.httpx_client = http_client
         self.wallet = wallet
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
         self.cards: dict[str, AgentCard] = {}
+        self.card_cache = card_cache or AgentCardCache(http_client)
+        self._names_by_address: dict[str, str] = {}
         self.remote_agent_addresses = remote_agent_addresses
         self.agents_info_str = ""
         self._initialized = False
+        self.quote_deadline = quote_deadline
         self.x402 = x402Utils()
 
     def create_agent(self) -> Agent:
         """Creates the ADK Agent instance."""
         return Agent(
-            model="gemini-2.5-flash",
+            model=self.model,
             name="client_agent",
             instruction=self.root_instruction,
             before_agent_callback=self.before_agent_callback,
             description="An orchestrator that delegates tasks to other agents.",
-            tools=[self.list_remote_agents, self.send_message],
+            tools=[self.list_remote_agents, self.request_quotes, self.send_message],
         )
 
     # --- Agent Setup and Instructions ---
@@ -87,8 +107,9 @@ You are a master orchestrator agent. Your job is to complete user requests by de
 
 1.  **Discover**: Always start by using `list_remote_agents` to see which agents are available.
 2.  **Delegate**: Send the user's request to the most appropriate agent using `send_message`. For example, if the user wants to buy something, send the request to a merchant agent.
+    * **Compare Prices**: If the user wants the best price, or more than one merchant could sell the product, call `request_quotes` once with the product name instead. It asks every merchant at the same time and returns their quotes, cheapest first among quotes in the same currency on the same network; amounts in different currencies or networks can't be compared directly. Present the quotes and ask the user which one to accept.
 3.  **Confirm Payment**: If the merchant requires a payment, the system will return a confirmation message. You MUST present this message to the user.
-4.  **Sign and Send**: If the user confirms they want to pay (e.g., by saying "yes"), you MUST call `send_message` again, targeting the *same agent*, with the exact message: "sign_and_send_payment". The system will handle the signing and sending of the payload.
+4.  **Sign and Send**: If the user confirms they want to pay (e.g., by saying "yes"), you MUST call `send_message` again, targeting the *same agent* (for a quote, the agent that made it), with the exact message: "sign_and_send_payment" (for a quote, also pass the quote's `option`). The system will handle the signing and sending of the payload.
 5.  **Report Outcome**: Clearly report the final success or failure message to the user.
 
 **System Context:**
@@ -98,23 +119,47 @@ You are a master orchestrator agent. Your job is to complete user requests by de
 """
 
     async def before_agent_callback(self, callback_context: CallbackContext):
-        """Initializes connections to remote agents before the first turn."""
+        """
+        Connects to the remote agents before the first turn.
+
+        Cards are resolved concurrently; agents that can't be reached in
+        time are left out rather than failing the turn. On later turns
+        expired cards are revalidated, and unreachable agents retried, in
+        the background.
+        """
         if self._initialized:
+            self.card_cache.refresh(self.remote_agent_addresses, self._add_remote_agent)
             return
 
-        for address in self.remote_agent_addresses:
-            card = await A2ACardResolver(self.httpx_client, address).get_agent_card()
-            self.remote_agent_connections[card.name] = RemoteAgentConnections(
-                self.httpx_client, card
-            )
-            self.cards[card.name] = card
+        cards = await self.card_cache.resolve_all(
+            self.remote_agent_addresses, self._add_remote_agent
+        )
+        for address, card in cards.items():
+            self._add_remote_agent(address, card)
+        missing = [a for a in self.remote_agent_addresses if a not in cards]
+        if missing:
+            logger.warning("Starting without unreachable agents: %s", missing)
+        self._initialized = True
+
+    def _add_remote_agent(self, address: str, card: AgentCard) -> None:
+        """Connects to the agent at `address`, or updates its card."""
+        previous = self._names_by_address.get(address)
+        if previous == card.name and self.cards.get(card.name) == card:
+            return
+        if previous is not None and previous != card.name:
+            self.remote_agent_connections.pop(previous, None)
+            self.cards.pop(previous, None)
+        self._names_by_address[address] = card.name
+        self.remote_agent_connections[card.name] = RemoteAgentConnections(
+            self.httpx_client, card
+        )
+        self.cards[card.name] = card
 
         # Create a formatted string of agent info for the prompt
         agent_list = [
             {"name": c.name, "description": c.description} for c in self.cards.values()
         ]
         self.agents_info_str = json.dumps(agent_list, indent=2)
-        self._initialized = True
 
     # --- Agent Tools ---
     def list_remote_agents(self):
@@ -124,21 +169,145 @@ You are a master orchestrator agent. Your job is to complete user requests by de
             for card in self.cards.values()
         ]
 
+    async def request_quotes(self, product_name: str, tool_context: ToolContext):
+        """
+        Asks every merchant agent at once for the price of a product.
+
+        Returns the quotes and the agents that could not quote. Quotes are
+        grouped by network and asset, cheapest first within each group, since
+        amounts in different assets aren't comparable. To accept a quote,
+        call `send_message` with the quote's agent and option and the
+        message "sign_and_send_payment".
+        """
+        names = list(self.remote_agent_connections)
+        request_ids = {name: str(uuid.uuid4()) for name in names}
+        calls = {
+            name: asyncio.create_task(
+                self.remote_agent_connections[name].send_message(
+                    request_ids[name],
+                    self._quote_request(request_ids[name], product_name),
+                    self.task_callback,
+                )
+            )
+            for name in names
+        }
+        if calls:
+            # One round trip for all merchants; the slow ones are left out.
+            _, pending = await asyncio.wait(calls.values(), timeout=self.quote_deadline)
+            for call in pending:
+                call.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+        quotes, unavailable, quote_tasks = [], [], {}
+        for name, call in calls.items():
+            if call.cancelled():
+                unavailable.append({"agent": name, "reason": "no answer in time"})
+                continue
+            if call.exception() is not None:
+                logger.warning("Quote request to %s failed: %r", name, call.exception())
+                unavailable.append({"agent": name, "reason": str(call.exception())})
+                continue
+            response_task = call.result()
+            if isinstance(response_task, JSONRPCError):
+                unavailable.append({"agent": name, "reason": response_task.message})
+                continue
+            agent_quotes = self._quotes(name, response_task)
+            if not agent_quotes:
+                unavailable.append({"agent": name, "reason": "no payment requested"})
+                continue
+            quotes.extend(agent_quotes)
+            quote_tasks[name] = response_task.model_dump(by_alias=True)
+
+        quotes.sort(key=lambda q: (q["network"], q["asset"], q["amount"]))
+        state = tool_context.state
+        state["quote_tasks"] = quote_tasks
+        # Signing now follows the quote of whichever agent is chosen.
+        state["purchase_task"] = None
+        return {"quotes": quotes, "unavailable": unavailable}
+
+    def _quote_request(self, request_id: str, product_name: str) -> MessageSendParams:
+        return MessageSendParams(
+            message=Message(
+                messageId=request_id,
+                role="user",
+                parts=[
+                    Part(root=TextPart(text=f"I want to buy {product_name}.")),
+                    # Lets merchants that understand it answer without a
+                    # model call.
+                    Part(
+                        root=DataPart(
+                            data={"purchase_intent": {"product_name": product_name}}
+                        )
+                    ),
+                ],
+            )
+        )
+
+    def _quotes(self, agent_name: str, task: Task) -> list[dict]:
+        """
+        The cheapest payment option per network and asset of a task asking
+        for payment. `option` is the option's index in the requirements.
+        """
+        if not isinstance(task, Task) or task.status.state != TaskState.input_required:
+            return []
+        requirements = self.x402.get_payment_requirements(task)
+        if not requirements:
+            return []
+        cheapest: dict[tuple[str, str], dict] = {}
+        for index, option in enumerate(requirements.accepts):
+            try:
+                amount = int(option.max_amount_required)
+            except ValueError:
+                continue
+            group = (option.network, option.asset)
+            if group in cheapest and cheapest[group]["amount"] <= amount:
+                continue
+            extra = option.extra or {}
+            cheapest[group] = {
+                "agent": agent_name,
+                "option": index,
+                "product": extra.get("product", {}).get("name", option.description),
+                "amount": amount,
+                "currency": extra.get("name", "TOKEN"),
+                "network": option.network,
+                "asset": option.asset,
+            }
+        return list(cheapest.values())
+
+    def _purchase_task(self, state, agent_name: str) -> dict | None:
+        """The task awaiting payment from `agent_name`, quoted or direct."""
+        if state.get("purchase_task") and (
+            state.get("last_contacted_agent") == agent_name
+        ):
+            return state["purchase_task"]
+        return (state.get("quote_tasks") or {}).get(agent_name)
+
     async def send_message(
-        self, agent_name: str, message: str, tool_context: ToolContext
+        self,
+        agent_name: str,
+        message: str,
+        tool_context: ToolContext,
+        option: int = 0,
     ):
-        """Sends a message to a named remote agent and handles the response."""
+        """
+        Sends a message to a named remote agent and handles the response.
+
+        For "sign_and_send_payment", `option` selects which of the agent's
+        payment options is signed: a quote's `option`, or the first one.
+        """
         if agent_name not in self.remote_agent_connections:
             raise ValueError(f"Agent '{agent_name}' not found.")
 
         state = tool_context.state
         client = self.remote_agent_connections[agent_name]
         task_id = None
+        context_id = state.get("context_id")
         message_metadata = {}
 
         if message == "sign_and_send_payment":
             # This is the second step: user has confirmed payment.
-            purchase_task_data = state.get("purchase_task")
+            purchase_task_data = self._purchase_task(state, agent_name)
             if not purchase_task_data:
                 raise ValueError(
                     "State inconsistency: 'purchase_task' not found to sign payment."
@@ -146,6 +315,7 @@ You are a master orchestrator agent. Your job is to complete user requests by de
 
             original_task = Task.model_validate(purchase_task_data)
             task_id = original_task.id
+            context_id = original_task.context_id
 
             requirements = self.x402.get_payment_requirements(original_task)
             if not requirements:
@@ -153,8 +323,18 @@ You are a master orchestrator agent. Your job is to complete user requests by de
                     "Could not find payment requirements in the original task."
                 )
 
-            # Sign the payment and prepare the payload for the merchant.
-            signed_payload = self.wallet.sign_payment(requirements)
+            if not 0 <= option < len(requirements.accepts):
+                raise ValueError(
+                    f"Payment option {option} not offered by '{agent_name}'."
+                )
+            # The wallet signs the first option, so pass only the chosen one.
+            requirements = requirements.model_copy(
+                update={"accepts": [requirements.accepts[option]]}
+            )
+
+            # Sign the payment off the event loop, so concurrent purchases
+            # don't wait for each other's signatures.
+            signed_payload = await self.wallet.sign_payment_async(requirements)
             message_metadata[self.x402.PAYLOAD_KEY] = signed_payload.model_dump(
                 by_alias=True
             )
@@ -171,7 +351,7 @@ You are a master orchestrator agent. Your job is to complete user requests by de
                 messageId=str(uuid.uuid4()),
                 role="user",
                 parts=[Part(root=TextPart(text=message))],
-                contextId=state.get("context_id"),
+                contextId=context_id,
                 taskId=task_id,
                 metadata=message_metadata if message_metadata else None,
             )
@@ -226,6 +406,12 @@ You are a master orchestrator agent. Your job is to complete user requests by de
                         part_root = part.root
                         if isinstance(part_root, TextPart):
                             final_text.append(part_root.text)
+                        elif isinstance(part_root, FilePart) and isinstance(
+                            part_root.file, FileWithUri
+                        ):
+                            # e.g. a large streamed report kept on disk
+                            name = part_root.file.name or "file"
+                            final_text.append(f"[{name}: {part_root.file.uri}]")
 
             if final_text:
                 return " ".join(final_text)
@@ -11,7 +11,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
+import os
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+
 import eth_account
 
 from x402_a2a.types import PaymentPayload, x402PaymentRequiredResponse
@@ -23,6 +28,10 @@ class Wallet(ABC):
     An abstract base class for a wallet that can sign payment requirements.
     This interface allows for different wallet implementations (e.g., local, MPC, hardware)
     to be used interchangeably by the client agent.
+
+    Async callers use `sign_payment_async` and `sign_payments`, which keep
+    signing off the event loop. By default they run `sign_payment` in the
+    default executor; implementations may override them.
     """
 
     @abstractmethod
@@ -32,20 +41,63 @@ class Wallet(ABC):
         """
         raise NotImplementedError
 
+    async def sign_payment_async(
+        self, requirements: x402PaymentRequiredResponse
+    ) -> PaymentPayload:
+        """Signs a payment requirement without blocking the event loop."""
+        return await asyncio.to_thread(self.sign_payment, requirements)
+
+    async def sign_payments(
+        self, requirements: Sequence[x402PaymentRequiredResponse]
+    ) -> list[PaymentPayload]:
+        """Signs several payment requirements concurrently, in order."""
+        return list(
+            await asyncio.gather(*(self.sign_payment_async(r) for r in requirements))
+        )
+
 
 class MockLocalWallet(Wallet):
     """
     A mock wallet implementation that uses a hardcoded local private key.
     FOR DEMONSTRATION PURPOSES ONLY. DO NOT USE IN PRODUCTION.
+
+    The account is derived from the key once; async signing runs on a
+    small thread pool owned by the wallet.
     """
 
+    def __init__(
+        self,
+        private_key: str = (
+            "0x0000000000000000000000000000000000000000000000000000000000000001"
+        ),
+        max_workers: int | None = None,
+    ):
+        self._account = eth_account.Account.from_key(private_key)
+        self._max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._pool: ThreadPoolExecutor | None = None
+
+    @property
+    def address(self) -> str:
+        return self._account.address
+
     def sign_payment(self, requirements: x402PaymentRequiredResponse) -> PaymentPayload:
         """
         Signs a payment requirement using x402.exact EIP-3009 signing.
         """
-        private_key = (
-            "0x0000000000000000000000000000000000000000000000000000000000000001"
-        )
-        account = eth_account.Account.from_key(private_key)
+        return process_payment_required(requirements, self._account)
+
+    async def sign_payment_async(
+        self, requirements: x402PaymentRequiredResponse
+    ) -> PaymentPayload:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="wallet"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.sign_payment, requirements)
 
-        return process_payment_required(requirements, account)
+    def close(self) -> None:
+        """Shuts down the signing pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,480 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+End-to-end load test of the merchant's purchase flow.
+
+Starts `python -m server` with the scripted model and the mock facilitator,
+then drives concurrent purchases the way `ClientAgent` does:
+
+    quote   - "I want to buy ..." until the task is input-required
+    sign    - sign the payment requirements with `MockLocalWallet`
+    settle  - send the signed payload until the task is completed
+
+and reports throughput, per-phase latency percentiles and peak RSS. Results
+are written to bench/results/<commit>.json; pass one of those files as
+--baseline to compare against an earlier commit.
+
+    python bench/purchase_flow.py --purchases 500 --concurrency 50
+    python bench/purchase_flow.py --baseline bench/results/<commit>.json
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import resource
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import click
+import httpx
+from a2a.client import A2AClient, A2AClientError
+from a2a.types import (
+    AgentCard,
+    DataPart,
+    JSONRPCErrorResponse,
+    Message,
+    MessageSendParams,
+    Part,
+    SendMessageRequest,
+    Task,
+    TaskState,
+    TextPart,
+)
+from x402_a2a.core.utils import x402Utils
+from x402_a2a.types import PaymentStatus
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "bench" / "results"
+AGENT_PATH = "/agents/merchant_agent"
+PHASES = ("quote", "sign", "settle", "total")
+PRODUCTS = ("red stapler", "laptop", "copy of Moby Dick", "carbon credit")
+
+
+def _load_wallet_class():
+    # Loaded from its file: importing the `market` package would build the
+    # client's root agent, which needs a running merchant and a model.
+    path = ROOT / "adk_agent" / "market" / "wallet.py"
+    spec = importlib.util.spec_from_file_location("_bench_wallet", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.MockLocalWallet
+
+
+class PurchaseError(Exception):
+    """A purchase the merchant didn't carry through."""
+
+
+@dataclass
+class Results:
+    durations: dict[str, list[float]] = field(
+        default_factory=lambda: {phase: [] for phase in PHASES}
+    )
+    errors: dict[str, int] = field(default_factory=dict)
+
+    def error(self, reason: str) -> None:
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+
+class PurchaseClient:
+    """Runs one purchase at a time against the merchant, like `ClientAgent`."""
+
+    def __init__(
+        self, client: A2AClient, wallet, results: Results, structured: bool = False
+    ):
+        self._client = client
+        self._wallet = wallet
+        self._results = results
+        self._structured = structured
+        self._x402 = x402Utils()
+
+    async def purchase(self, product: str) -> None:
+        timings = {}
+        start = time.perf_counter()
+
+        if self._structured:
+            # Served by the merchant without a model call.
+            part = DataPart(data={"purchase_intent": {"product_name": product}})
+        else:
+            part = TextPart(text=f"I want to buy a {product}.")
+        task = await self._send(part)
+        timings["quote"] = time.perf_counter() - start
+        if task.status.state != TaskState.input_required:
+            raise PurchaseError(f"quote ended {task.status.state.value}")
+        requirements = self._x402.get_payment_requirements(task)
+        if not requirements:
+            raise PurchaseError("quote had no payment requirements")
+
+        mark = time.perf_counter()
+        # Signed on the wallet's pool, off the loop driving the other flows.
+        payload = await self._wallet.sign_payment_async(requirements)
+        timings["sign"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        task = await self._send(
+            TextPart(text="send_signed_payment_payload"),
+            task=task,
+            metadata={
+                self._x402.PAYLOAD_KEY: payload.model_dump(by_alias=True),
+                self._x402.STATUS_KEY: PaymentStatus.PAYMENT_SUBMITTED.value,
+            },
+        )
+        timings["settle"] = time.perf_counter() - mark
+        if task.status.state != TaskState.completed:
+            raise PurchaseError(f"settle ended {task.status.state.value}")
+
+        timings["total"] = time.perf_counter() - start
+        for phase, seconds in timings.items():
+            self._results.durations[phase].append(seconds)
+
+    async def _send(
+        self,
+        part: TextPart | DataPart,
+        task: Task | None = None,
+        metadata: dict | None = None,
+    ) -> Task:
+        message = Message(
+            messageId=str(uuid.uuid4()),
+            role="user",
+            parts=[Part(root=part)],
+            contextId=task.context_id if task else None,
+            taskId=task.id if task else None,
+            metadata=metadata,
+        )
+        response = await self._client.send_message(
+            SendMessageRequest(
+                id=message.message_id, params=MessageSendParams(message=message)
+            )
+        )
+        if isinstance(response.root, JSONRPCErrorResponse):
+            raise PurchaseError(f"JSON-RPC error {response.root.error.code}")
+        if not isinstance(response.root.result, Task):
+            raise PurchaseError("merchant replied without a task")
+        return response.root.result
+
+
+async def run_load(
+    base_url: str,
+    purchases: int,
+    concurrency: int,
+    timeout: float,
+    structured: bool,
+) -> tuple[Results, float]:
+    results = Results()
+    wallet = _load_wallet_class()()
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as http:
+        card_url = f"{base_url}{AGENT_PATH}/.well-known/agent-card.json"
+        card = AgentCard.model_validate((await http.get(card_url)).json())
+        client = PurchaseClient(A2AClient(http, card), wallet, results, structured)
+
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(purchases):
+            queue.put_nowait(i)
+
+        async def worker() -> None:
+            while not queue.empty():
+                i = queue.get_nowait()
+                try:
+                    await client.purchase(PRODUCTS[i % len(PRODUCTS)])
+                except (
+                    PurchaseError,
+                    A2AClientError,
+                    httpx.HTTPError,
+                    ValueError,
+                ) as e:
+                    # ValueError covers replies that fail validation.
+                    results.error(str(e) or type(e).__name__)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_server(process: subprocess.Popen, base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    # The card is served before the agent is built; the startup report says
+    # when the --warmup build has finished.
+    startup_url = f"{base_url}/stats/startup"
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise click.ClickException(f"server exited with {process.returncode}")
+        try:
+            response = httpx.get(startup_url, timeout=1)
+            if response.status_code == 200 and response.json()["finished_seconds"]:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise click.ClickException(f"server did not start within {timeout}s")
+
+
+def _process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tid}/children") as f:
+            for child in f.read().split():
+                pids.extend(_process_tree(int(child)))
+    return pids
+
+
+def _peak_rss_mb(pid: int) -> float | None:
+    """Sum of the peak resident set sizes of `pid` and its children (Linux)."""
+    total_kb = 0
+    try:
+        for p in _process_tree(pid):
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total_kb += int(line.split()[1])
+    except OSError:
+        return None
+    return round(total_kb / 1024, 1)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    if len(samples) == 1:
+        cuts = samples * 99
+    else:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "mean": statistics.fmean(samples),
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+    }
+
+
+def _git_commit() -> tuple[str, bool]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    return git("rev-parse", "--short=12", "HEAD") or "unknown", bool(
+        git("status", "--porcelain", "--untracked-files=no")
+    )
+
+
+def _compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Prints the change against `baseline` and returns any regressions."""
+    regressions = []
+
+    def row(name: str, old: float, new: float, higher_is_better: bool) -> None:
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"  {name:<22}{old:>12.4f}{new:>12.4f}{change:>+10.1%}{flag}")
+
+    print(f"\nvs baseline {baseline['commit']}:")
+    print(f"  {'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    row(
+        "throughput/s",
+        baseline["throughput_per_second"],
+        current["throughput_per_second"],
+        True,
+    )
+    for phase in PHASES:
+        old, new = baseline["phases"].get(phase), current["phases"].get(phase)
+        if old and new:
+            for q in ("p50", "p95", "p99"):
+                row(f"{phase} {q} (s)", old[q], new[q], False)
+    return regressions
+
+
+@click.command()
+@click.option("--purchases", type=click.IntRange(min=1), default=200)
+@click.option("--concurrency", type=click.IntRange(min=1), default=20)
+@click.option(
+    "--model",
+    default="scripted",
+    help="Model backend passed to the server, e.g. 'scripted:0.2'.",
+)
+@click.option(
+    "--intent",
+    type=click.Choice(["text", "structured"]),
+    default="text",
+    help="Ask for products in prose, or with a purchase_intent DataPart.",
+)
+@click.option(
+    "--server-args",
+    default="",
+    help="Extra arguments for `python -m server`, e.g. '--store sqlite'.",
+)
+@click.option(
+    "--facilitator-url",
+    default=None,
+    help="Settle through a facilitator over HTTP, e.g. one started with "
+    "`mock-facilitator`, instead of the in-process mock.",
+)
+@click.option(
+    "--url",
+    default=None,
+    help="Benchmark an already running server instead of starting one.",
+)
+@click.option("--timeout", type=float, default=60.0, help="Per-request timeout.")
+@click.option(
+    "--output",
+    type=click.Path(path_type=Path),
+    default=None,
+    help="Result file (default: bench/results/<commit>.json).",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, path_type=Path),
+    default=None,
+    help="Earlier result file to compare against.",
+)
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.10,
+    help="Relative slowdown vs --baseline reported as a regression.",
+)
+def main(
+    purchases: int,
+    concurrency: int,
+    model: str,
+    intent: str,
+    server_args: str,
+    facilitator_url: str | None,
+    url: str | None,
+    timeout: float,
+    output: Path | None,
+    baseline: Path | None,
+    tolerance: float,
+):
+    process = None
+    base_url = url
+    if base_url is None:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = {**os.environ, "USE_MOCK_FACILITATOR": "true"}
+        if facilitator_url:
+            env.update(USE_MOCK_FACILITATOR="false", FACILITATOR_URL=facilitator_url)
+        command = [
+            sys.executable,
+            "-m",
+            "server",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--model",
+            model,
+            # Build the agent before the first purchase is timed.
+            "--warmup",
+            *shlex.split(server_args),
+        ]
+        process = subprocess.Popen(
+            command,
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    try:
+        if process:
+            _wait_for_server(process, base_url, timeout)
+        results, elapsed = asyncio.run(
+            run_load(base_url, purchases, concurrency, timeout, intent == "structured")
+        )
+        server_rss = _peak_rss_mb(process.pid) if process else None
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    commit, dirty = _git_commit()
+    completed = len(results.durations["total"])
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": {
+            "purchases": purchases,
+            "concurrency": concurrency,
+            "model": model,
+            "intent": intent,
+            "server_args": server_args,
+            "facilitator_url": facilitator_url,
+        },
+        "completed": completed,
+        "errors": results.errors,
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": completed / elapsed if elapsed else 0.0,
+        "phases": {
+            phase: _percentiles(samples) for phase, samples in results.durations.items()
+        },
+        "peak_rss_mb": {
+            "server": server_rss,
+            # ru_maxrss is in kilobytes on Linux.
+            "client": round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+            ),
+        },
+    }
+
+    print(
+        f"{completed}/{purchases} purchases in {elapsed:.2f}s "
+        f"({report['throughput_per_second']:.1f}/s, concurrency {concurrency})"
+    )
+    for reason, count in results.errors.items():
+        print(f"  error x{count}: {reason}")
+    print(f"  {'phase':<8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for phase, stats in report["phases"].items():
+        if stats:
+            print(
+                f"  {phase:<8}{stats['p50']:>10.4f}"
+                f"{stats['p95']:>10.4f}{stats['p99']:>10.4f}"
+            )
+    print(f"  peak RSS (MB): {report['peak_rss_mb']}")
+
+    output = output or RESULTS_DIR / f"{commit}{'-dirty' if dirty else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {output}")
+
+    if baseline:
+        regressions = _compare(report, json.loads(baseline.read_text()), tolerance)
+        if regressions:
+            raise click.ClickException(
+                f"{len(regressions)} metric(s) regressed by more than {tolerance:.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Micro-benchmark of the market client's `TaskStore`.
+
+For each store size it adds that many in-progress tasks, then times status
+updates, each carrying a new message, of randomly chosen stored tasks. The
+per-update cost should not grow with the number of stored tasks. A final
+pass finishes every task and reports how many the store still holds.
+
+    python bench/task_store_bench.py
+    python bench/task_store_bench.py --sizes 1000,100000 --updates 50000
+"""
+
+import importlib.util
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import click
+from a2a.types import (
+    Message,
+    Part,
+    Task,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_task_store_class():
+    # The `market` package is registered without running its __init__, which
+    # would build the client's root agent, so that the store's relative
+    # imports resolve.
+    package_dir = ROOT / "adk_agent" / "market"
+    spec = importlib.util.spec_from_file_location(
+        "market",
+        package_dir / "__init__.py",
+        submodule_search_locations=[str(package_dir)],
+    )
+    sys.modules.setdefault("market", importlib.util.module_from_spec(spec))
+    return importlib.import_module("market._task_store").TaskStore
+
+
+def _message(task_id: str, context_id: str, text: str) -> Message:
+    return Message(
+        messageId=str(uuid.uuid4()),
+        role="agent",
+        parts=[Part(root=TextPart(text=text))],
+        taskId=task_id,
+        contextId=context_id,
+    )
+
+
+def _status_event(task: Task, state: TaskState, text: str) -> TaskStatusUpdateEvent:
+    return TaskStatusUpdateEvent(
+        taskId=task.id,
+        contextId=task.context_id,
+        status=TaskStatus(
+            state=state, message=_message(task.id, task.context_id, text)
+        ),
+        final=state != TaskState.working,
+    )
+
+
+def run(store_class, size: int, updates: int, rng: random.Random) -> dict:
+    store = store_class(max_finished_tasks=size, finished_task_ttl=3600.0)
+    tasks = []
+    for i in range(size):
+        context_id = str(uuid.uuid4())
+        task = Task(
+            id=str(uuid.uuid4()),
+            contextId=context_id,
+            status=TaskStatus(state=TaskState.working),
+            history=[_message("", context_id, f"request {i}")],
+        )
+        store.update_task(task)
+        tasks.append(task)
+
+    # Events are built up front so only the store is timed.
+    events = [
+        _status_event(rng.choice(tasks), TaskState.working, "progress")
+        for _ in range(updates)
+    ]
+    samples = []
+    for event in events:
+        start = time.perf_counter_ns()
+        store.update_task(event)
+        samples.append(time.perf_counter_ns() - start)
+
+    for task in tasks:
+        store.update_task(_status_event(task, TaskState.completed, "done"))
+    retained = len(store)
+    # With a smaller bound, finished tasks are evicted as updates arrive.
+    small = store_class(max_finished_tasks=1000, finished_task_ttl=3600.0)
+    for task in tasks:
+        small.update_task(_status_event(task, TaskState.completed, "done"))
+
+    samples.sort()
+    return {
+        "size": size,
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": samples[len(samples) // 2] / 1000,
+        "p99_us": samples[int(len(samples) * 0.99)] / 1000,
+        "retained": retained,
+        "retained_bounded": len(small),
+    }
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    default="1000,10000,100000",
+    help="Comma-separated numbers of stored tasks.",
+)
+@click.option("--updates", type=click.IntRange(min=1), default=20000)
+@click.option("--seed", type=int, default=0)
+def main(sizes: str, updates: int, seed: int):
+    store_class = _load_task_store_class()
+    rng = random.Random(seed)
+    click.echo(
+        f"{'tasks':>8} {'mean µs':>9} {'p50 µs':>8} {'p99 µs':>8} "
+        f"{'kept':>8} {'kept@1k':>8}"
+    )
+    for size in (int(s) for s in sizes.split(",")):
+        r = run(store_class, size, updates, rng)
+        click.echo(
+            f"{r['size']:>8} {r['mean_us']:>9.2f} {r['p50_us']:>8.2f} "
+            f"{r['p99_us']:>8.2f} {r['retained']:>8} {r['retained_bounded']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,15 +11,25 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import dataclasses
 import logging
+import os
+import tempfile
 
 import click
 import uvicorn
 from dotenv import load_dotenv
-from starlette.applications import Starlette
 
 # Local imports
-from server.agents.routes import create_agent_routes
+from server.startup import STARTUP
+
+# Timed for the startup report.
+with STARTUP.imports():
+    from server.agents._admission import AdmissionConfig
+    from server.agents._settlement_worker import SETTLEMENT_MODES, SettlementConfig
+    from server.agents.models import DEFAULT_MODEL
+    from server.app import ServerConfig, build_app
+    from server.storage import BACKENDS, StorageConfig
 
 load_dotenv()
 
@@ -29,13 +39,177 @@ logging.basicConfig(level=logging.INFO)
 @click.command()
 @click.option("--host", "host", default="localhost")
 @click.option("--port", "port", default=10000)
-def main(host: str, port: int):
-    base_url = f"http://{host}:{port}"
-    base_path = "/agents"
-    routes = create_agent_routes(base_url=base_url, base_path=base_path)
+@click.option(
+    "--store",
+    "store",
+    type=click.Choice(BACKENDS),
+    default="memory",
+    help="Where sessions, artifacts, memory and tasks are kept.",
+)
+@click.option(
+    "--db-path",
+    "db_path",
+    default="za_server.db",
+    help="SQLite database file used by --store=sqlite.",
+)
+@click.option(
+    "--ttl",
+    "ttl_seconds",
+    type=float,
+    default=7 * 24 * 60 * 60,
+    help="Seconds after which idle stored rows are evicted (0 disables).",
+)
+@click.option(
+    "--workers",
+    "workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes serving the agents behind one port.",
+)
+@click.option(
+    "--max-concurrency",
+    "max_concurrency",
+    type=click.IntRange(min=0),
+    default=AdmissionConfig.max_concurrency,
+    help="Requests each agent runs at once per worker (0 disables the limit).",
+)
+@click.option(
+    "--max-queue",
+    "max_queue",
+    type=click.IntRange(min=0),
+    default=AdmissionConfig.max_queue,
+    help="Requests that may wait for a slot before new ones are rejected.",
+)
+@click.option(
+    "--queue-timeout",
+    "queue_timeout",
+    type=float,
+    default=AdmissionConfig.queue_timeout,
+    help="Seconds a queued request waits for a slot before it is rejected.",
+)
+@click.option(
+    "--model",
+    "model",
+    default=DEFAULT_MODEL,
+    help="Model backend for the agents: a Gemini model name, "
+    "'scripted[:<seconds per turn>]' for a local stand-in, "
+    "'record:<dir>[@<model>]' to record turns or "
+    "'replay:<dir>[@none|recorded|<seconds>]' to serve recorded turns.",
+)
+@click.option(
+    "--settlement",
+    "settlement_mode",
+    type=click.Choice(SETTLEMENT_MODES),
+    default="sync",
+    help="'sync' settles each payment before completing its task; 'async' "
+    "completes the task once the payment is verified and settles it in a "
+    "background worker, retrying facilitator errors.",
+)
+@click.option(
+    "--settlement-max-attempts",
+    "settlement_max_attempts",
+    type=click.IntRange(min=1),
+    default=SettlementConfig.max_attempts,
+    help="Attempts before a background settlement is given up as failed.",
+)
+@click.option(
+    "--settlement-batch-window",
+    "settlement_batch_window",
+    type=float,
+    default=SettlementConfig.batch_window,
+    help="Seconds to collect verified payments into one facilitator batch "
+    "(0 settles each payment on its own). Only facilitators with a batch "
+    "call settle a batch at once; others still get one call per payment.",
+)
+@click.option(
+    "--settlement-batch-max",
+    "settlement_batch_max",
+    type=click.IntRange(min=1),
+    default=SettlementConfig.batch_max,
+    help="Payments per facilitator batch.",
+)
+@click.option(
+    "--settlement-rpc-url",
+    "settlement_rpc_url",
+    default=None,
+    help="JSON-RPC endpoint of the payment network, used to confirm on chain "
+    "that a retried settlement the facilitator reports as already used went "
+    "through; without it such settlements fail for manual review.",
+)
+@click.option(
+    "--warmup/--no-warmup",
+    "warmup",
+    default=False,
+    help="Build the agents in the background right after startup instead "
+    "of on their first request.",
+)
+def main(
+    host: str,
+    port: int,
+    store: str,
+    db_path: str,
+    ttl_seconds: float,
+    workers: int,
+    max_concurrency: int,
+    max_queue: int,
+    queue_timeout: float,
+    model: str,
+    settlement_mode: str,
+    settlement_max_attempts: int,
+    settlement_batch_window: float,
+    settlement_batch_max: int,
+    settlement_rpc_url: str | None,
+    warmup: bool,
+):
+    storage = StorageConfig(
+        backend=store, db_path=db_path, ttl_seconds=ttl_seconds or None
+    )
+    if workers > 1:
+        if store == "memory":
+            raise click.UsageError(
+                "--workers > 1 needs state shared between processes; "
+                "use --store sqlite."
+            )
+        # Worker-local caches would serve state another worker has since
+        # changed, so every read goes to the shared database.
+        storage = dataclasses.replace(storage, cache_size=0)
+
+    admission = AdmissionConfig(
+        max_concurrency=max_concurrency,
+        max_queue=max_queue,
+        queue_timeout=queue_timeout,
+    )
+    config = ServerConfig(
+        base_url=f"http://{host}:{port}",
+        storage=storage,
+        admission=admission,
+        model=model,
+        settlement=SettlementConfig(
+            mode=settlement_mode,
+            max_attempts=settlement_max_attempts,
+            batch_window=settlement_batch_window,
+            batch_max=settlement_batch_max,
+            chain_rpc_url=settlement_rpc_url,
+        ),
+        warmup=warmup,
+    )
+    if workers == 1:
+        uvicorn.run(build_app(config), host=host, port=port)
+        return
 
-    app = Starlette(routes=routes)
-    uvicorn.run(app, host=host, port=port)
+    # Worker processes rebuild the app from the config in the environment.
+    config.to_env()
+    # Each worker writes its metrics here so /metrics can aggregate them.
+    os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="za-metrics-")
+    )
+    uvicorn.run(
+        "server.app:create_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+    )
 
 
 if __name__ == "__main__":
@@ -11,9 +11,16 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
+import contextvars
+import functools
+import inspect
 import json
 import logging
+import time
+import uuid
 from collections.abc import AsyncGenerator
+from concurrent.futures import ThreadPoolExecutor
 
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
@@ -25,37 +32,103 @@ from a2a.types import (
     FilePart,
     FileWithBytes,
     FileWithUri,
+    Message,
     Part,
+    Role,
+    TaskNotCancelableError,
     TaskState,
     TextPart,
-    UnsupportedOperationError,
 )
 from a2a.utils.errors import ServerError
 from google.adk import Runner
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.events import Event
 from google.genai import types
 
+from server.metrics import FAST_PATH_TOTAL, LLM_TURN_SECONDS, TOOL_SECONDS
 from x402_a2a.core.utils import x402Utils
 from x402_a2a.types import x402PaymentRequiredException
 
+from ._session_cache import RequestSessionCache
+from ._status_coalescer import StatusCoalescer
+from ._tool_registry import (
+    ToolArgumentError,
+    ToolOptions,
+    ToolRegistry,
+    ToolSpec,
+    ToolTimeoutError,
+)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Task states from which a task can no longer be canceled.
+_TERMINAL_STATES = frozenset(
+    {
+        TaskState.completed,
+        TaskState.canceled,
+        TaskState.failed,
+        TaskState.rejected,
+    }
+)
+
 
 class ADKAgentExecutor(AgentExecutor):
     """An AgentExecutor that runs an ADK-based Agent."""
 
-    def __init__(self, runner: Runner, card: AgentCard):
+    def __init__(
+        self,
+        runner: Runner,
+        card: AgentCard,
+        max_tool_workers: int = 8,
+        default_tool_options: ToolOptions | None = None,
+        tool_options: dict[str, ToolOptions] | None = None,
+        streaming: bool = False,
+        status_window: float = 0.25,
+        status_max_parts: int = 16,
+        structured_intents: dict[str, str] | None = None,
+    ):
         self.runner = runner
         self._card = card
-        self._running_sessions = {}
+        # In-flight `_process_request` runs, keyed by task_id, each paired
+        # with its context_id so a cancel can also be matched by context.
+        self._running_sessions: dict[str, tuple[str, asyncio.Task]] = {}
         self.x402 = x402Utils()
+        # Session service round trips made by executor requests so far; the
+        # Runner's own lookups are not included.
+        self.session_store_calls = 0
+        # Built once per Runner so tool lookups don't scan the agent's tools.
+        self.tools = ToolRegistry(
+            runner.agent.tools,
+            default_tool_options,
+            tool_options,
+            # Payment requests are the merchant's normal answer, not errors.
+            passthrough=(x402PaymentRequiredException,),
+        )
+        # Sync tools run here so they never block the event loop shared by
+        # every other session served by this process.
+        self._tool_pool = ThreadPoolExecutor(
+            max_workers=max_tool_workers, thread_name_prefix="adk-tool"
+        )
+        # In streaming mode the model output is forwarded token by token as
+        # artifact chunks instead of once per completed event.
+        self._run_config = RunConfig(
+            streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE
+        )
+        # Intermediate `working` messages are batched within this window.
+        self._status_window = status_window
+        self._status_max_parts = status_max_parts
+        # DataPart keys mapped to the tool they invoke without a model turn.
+        self._structured_intents = structured_intents or {}
 
     def _run_agent(
         self, session_id, new_message: types.Content
     ) -> AsyncGenerator[Event, None]:
         return self.runner.run_async(
-            session_id=session_id, user_id="self", new_message=new_message
+            session_id=session_id,
+            user_id="self",
+            new_message=new_message,
+            run_config=self._run_config,
         )
 
     async def _process_request(
@@ -64,9 +137,28 @@ class ADKAgentExecutor(AgentExecutor):
         session_id: str,
         task_updater: TaskUpdater,
     ) -> None:
-        session = await self._upsert_session(session_id)
-        session_id = session.id
-
+        status = StatusCoalescer(
+            task_updater, self._status_window, self._status_max_parts
+        )
+        try:
+            await self._run_turns(new_message, session_id, task_updater, status)
+        except asyncio.CancelledError:
+            status.discard()
+            raise
+        except BaseException:
+            # E.g. a payment request: publish pending updates before the
+            # x402 wrapper moves the task to input-required.
+            await status.flush()
+            raise
+
+    async def _run_turns(
+        self,
+        new_message: types.Content,
+        session_id: str,
+        task_updater: TaskUpdater,
+        status: StatusCoalescer,
+    ) -> None:
+        # `execute` has already fetched or created the session.
         current_message = new_message
 
         # The ADK agent can have multiple turns (e.g., tool call -> tool response -> final answer)
@@ -76,96 +168,164 @@ class ADKAgentExecutor(AgentExecutor):
             event_stream = self._run_agent(session_id, current_message)
 
             function_calls_to_execute = []
+            # Id of the artifact currently receiving streamed chunks, if any.
+            stream_artifact_id = None
+
+            turn_start = time.perf_counter()
+            try:
+                async for event in event_stream:
+                    if event.partial:
+                        # A streamed fragment of the model's output. ADK repeats
+                        # the full text in the aggregated event that follows.
+                        parts = []
+                        if event.content and event.content.parts:
+                            parts = convert_genai_parts_to_a2a(event.content.parts)
+                        if parts:
+                            await status.flush()
+                            append = stream_artifact_id is not None
+                            stream_artifact_id = stream_artifact_id or str(uuid.uuid4())
+                            await task_updater.add_artifact(
+                                parts,
+                                artifact_id=stream_artifact_id,
+                                append=append,
+                                last_chunk=False,
+                            )
+                        continue
+
+                    if stream_artifact_id:
+                        # The aggregated event closes the streamed artifact.
+                        await task_updater.add_artifact(
+                            [],
+                            artifact_id=stream_artifact_id,
+                            append=True,
+                            last_chunk=True,
+                        )
 
-            async for event in event_stream:
-                if event.is_final_response():
-                    # The agent is done, send the final result and terminate.
-                    parts = []
-                    if event.content and event.content.parts:
-                        parts = convert_genai_parts_to_a2a(event.content.parts)
-
-                    logger.debug("Yielding final response: %s", parts)
-                    if parts:
-                        await task_updater.add_artifact(parts)
-
-                    await task_updater.complete()
-                    return  # Exit the loop and the method
-
-                if event.get_function_calls():
-                    # The agent wants to call a tool. Collect all calls for this turn.
-                    function_calls_to_execute.extend(event.get_function_calls())
-                elif event.content and event.content.parts:
-                    # This is an intermediate text response from the agent.
-                    logger.debug("Yielding update response")
-                    await task_updater.update_status(
-                        TaskState.working,
-                        message=task_updater.new_agent_message(
-                            convert_genai_parts_to_a2a(event.content.parts),
-                        ),
-                    )
-                else:
-                    logger.debug("Skipping empty event: %s", event)
+                    if not (event.content and event.content.parts):
+                        # E.g. the state delta of a `before_agent_callback`,
+                        # which ADK reports as a "final" event before the
+                        # model has run.
+                        logger.debug("Skipping empty event: %s", event)
+                        stream_artifact_id = None
+                        continue
+
+                    if event.is_final_response():
+                        # The agent is done, send the final result and terminate.
+                        parts = []
+                        if event.content and event.content.parts:
+                            parts = convert_genai_parts_to_a2a(event.content.parts)
+
+                        logger.debug("Yielding final response: %s", parts)
+                        await status.flush()
+                        if parts and not stream_artifact_id:
+                            await task_updater.add_artifact(parts)
+
+                        await task_updater.complete()
+                        return  # Exit the loop and the method
+
+                    if event.get_function_calls():
+                        # The agent wants to call a tool. Collect all calls for this turn.
+                        function_calls_to_execute.extend(event.get_function_calls())
+                    elif stream_artifact_id:
+                        # This text was already delivered as artifact chunks.
+                        logger.debug("Skipping aggregate of streamed response")
+                    else:
+                        # This is an intermediate text response from the agent.
+                        logger.debug("Yielding update response")
+                        await status.add(
+                            convert_genai_parts_to_a2a(event.content.parts)
+                        )
+                    stream_artifact_id = None
+            finally:
+                LLM_TURN_SECONDS.labels(self._card.name).observe(
+                    time.perf_counter() - turn_start
+                )
 
             if not function_calls_to_execute:
                 # The stream ended without a final response or a tool call.
                 # This indicates an unexpected state. We'll complete the task to avoid hanging.
                 logger.warning("ADK agent stream ended unexpectedly. Completing task.")
+                await status.flush()
                 await task_updater.complete()
                 return
 
             # --- Execute Tools ---
-            tool_outputs = []
-            for call in function_calls_to_execute:
-                tool_name = call.name
-                tool_args = dict(call.args)
+            # All calls from one turn run concurrently; gather keeps the
+            # results in the order the model emitted the calls.
+            tool_tasks = [
+                asyncio.ensure_future(self._execute_tool_call(call))
+                for call in function_calls_to_execute
+            ]
+            try:
+                tool_outputs = list(await asyncio.gather(*tool_tasks))
+            except BaseException:
+                # A payment request (or cancellation) aborts the turn; don't
+                # leave sibling tool calls running in the background.
+                for tool_task in tool_tasks:
+                    tool_task.cancel()
+                raise
 
-                logger.debug(
-                    f"Attempting to execute tool '{tool_name}' with args: {tool_args}"
-                )
+            # Prepare the next message to send to the agent, containing the tool results.
+            current_message = types.Content(parts=tool_outputs, role="tool")
+
+    async def _execute_tool_call(self, call: types.FunctionCall) -> types.Part:
+        """Runs a single tool call and wraps its outcome as a function response."""
+        tool_name = call.name
+        tool_args = dict(call.args or {})
+
+        logger.debug(f"Attempting to execute tool '{tool_name}' with args: {tool_args}")
 
-                # Find the corresponding tool function registered with the agent
-                target_tool = next(
-                    (
-                        t
-                        for t in self.runner.agent.tools
-                        if getattr(t, "__name__", None) == tool_name
-                    ),
-                    None,
+        if tool_name not in self.tools:
+            raise ValueError(
+                f"Tool '{tool_name}' requested by the LLM but not found on the agent."
+            )
+
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            # Execute the tool. This is where the x402PaymentRequiredException will be raised.
+            tool_result = await self.tools.call(tool_name, tool_args, self._invoke_tool)
+        except x402PaymentRequiredException:
+            # This special exception must propagate up to the x402ServerExecutor.
+            outcome = "payment_required"
+            raise
+        except Exception as e:
+            outcome = "timeout" if isinstance(e, ToolTimeoutError) else "error"
+            # Any other tool error, including invalid arguments and timeouts
+            # from the registry, should be reported back to the LLM.
+            logger.error(f"Tool '{tool_name}' execution failed: {e}", exc_info=True)
+            return types.Part(
+                function_response=types.FunctionResponse(
+                    name=tool_name, response={"error": str(e)}
                 )
+            )
+        finally:
+            TOOL_SECONDS.labels(self._card.name, tool_name, outcome).observe(
+                time.perf_counter() - start
+            )
 
-                if not target_tool:
-                    raise ValueError(
-                        f"Tool '{tool_name}' requested by the LLM but not found on the agent."
-                    )
+        return types.Part(
+            function_response=types.FunctionResponse(
+                name=tool_name, response={"result": tool_result}
+            )
+        )
 
-                try:
-                    # Execute the tool. This is where the x402PaymentRequiredException will be raised.
-                    tool_result = target_tool(**tool_args)
-                    tool_outputs.append(
-                        types.Part(
-                            function_response=types.FunctionResponse(
-                                name=tool_name, response={"result": tool_result}
-                            )
-                        )
-                    )
-                except x402PaymentRequiredException:
-                    # This special exception must propagate up to the x402ServerExecutor.
-                    raise
-                except Exception as e:
-                    # Any other tool error should be reported back to the LLM.
-                    logger.error(
-                        f"Tool '{tool_name}' execution failed: {e}", exc_info=True
-                    )
-                    tool_outputs.append(
-                        types.Part(
-                            function_response=types.FunctionResponse(
-                                name=tool_name, response={"error": str(e)}
-                            )
-                        )
-                    )
+    async def _invoke_tool(self, tool: ToolSpec, tool_args: dict):
+        """
+        Awaits async tools on the event loop and runs sync tools in the
+        bounded tool pool, preserving the caller's context variables.
+        """
+        if tool.is_async:
+            return await tool.func(**tool_args)
 
-            # Prepare the next message to send to the agent, containing the tool results.
-            current_message = types.Content(parts=tool_outputs, role="tool")
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        result = await loop.run_in_executor(
+            self._tool_pool, functools.partial(ctx.run, tool.func, **tool_args)
+        )
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
     async def _preprocess_and_find_payment_payload(
         self, context: RequestContext
@@ -190,18 +350,128 @@ class ADKAgentExecutor(AgentExecutor):
                     continue
         return None
 
+    def _find_structured_intent(
+        self, messages: list[Message]
+    ) -> tuple[str, dict] | None:
+        """
+        Returns the tool name and arguments of the first well-formed
+        structured intent in `messages`, e.g. a DataPart
+        `{"purchase_intent": {"product_name": "red stapler"}}`.
+        """
+        for message in messages:
+            if message.role != Role.user:
+                continue
+            for part in message.parts:
+                part = part.root
+                if not isinstance(part, DataPart) or not isinstance(part.data, dict):
+                    continue
+                for key, tool_name in self._structured_intents.items():
+                    args = part.data.get(key)
+                    tool = self.tools.get(tool_name)
+                    if not isinstance(args, dict) or tool is None:
+                        continue
+                    try:
+                        tool.validate_args(args)
+                    except ToolArgumentError:
+                        # Malformed intents are left to the model.
+                        continue
+                    return tool_name, args
+        return None
+
+    async def _execute_intent(
+        self, tool_name: str, args: dict, task_updater: TaskUpdater
+    ) -> None:
+        """
+        Runs the tool named by a structured intent and finishes the task with
+        its result. A payment request propagates to the x402 wrapper exactly
+        as it does from a model-issued call.
+        """
+        FAST_PATH_TOTAL.labels(self._card.name, "intent").inc()
+        part = await self._execute_tool_call(
+            types.FunctionCall(name=tool_name, args=args)
+        )
+        response = part.function_response.response
+        if "error" in response:
+            await task_updater.failed(
+                message=task_updater.new_agent_message(
+                    [Part(root=TextPart(text=str(response["error"])))]
+                )
+            )
+            return
+        await task_updater.add_artifact([Part(root=DataPart(data=response))])
+        await task_updater.complete()
+
+    async def _confirm_structured_purchase(
+        self, context: RequestContext, task_updater: TaskUpdater
+    ) -> None:
+        """
+        Answers a verified payment for a structured intent from a template.
+
+        The product and amount come from the payment requirements the x402
+        wrapper verified, not from the client's intent, so the confirmation
+        describes what was actually paid for.
+        """
+        FAST_PATH_TOTAL.labels(self._card.name, "payment_verified").inc()
+        metadata = context.current_task.status.message.metadata or {}
+        accepted = metadata.get(self.x402.REQUIRED_KEY, {}).get("accepts", [{}])[0]
+        extra = accepted.get("extra") or {}
+        product = extra.get("product") or {}
+        amount = accepted.get("maxAmountRequired")
+        token = extra.get("name") or accepted.get("asset")
+        order = {
+            "product_name": product.get("name"),
+            "sku": product.get("sku"),
+            "amount": amount,
+            "asset": accepted.get("asset"),
+            "network": accepted.get("network"),
+            "status": "confirmed",
+        }
+        await task_updater.add_artifact(
+            [
+                Part(
+                    root=TextPart(
+                        text=f"Payment of {amount} {token} base units for "
+                        f"{product.get('name') or 'your purchase'} received. "
+                        "Your order is being prepared."
+                    )
+                ),
+                Part(root=DataPart(data={"order": order})),
+            ]
+        )
+        await task_updater.complete()
+
     async def execute(
         self,
         context: RequestContext,
         event_queue: EventQueue,
     ):
         task_updater = TaskUpdater(event_queue, context.task_id, context.context_id)
-        session = await self._upsert_session(context.context_id)
+        payment_verified = bool(
+            context.current_task
+            and (context.current_task.metadata or {}).get(
+                "x402_payment_verified", False
+            )
+        )
+
+        # Structured requests skip the model and the session entirely.
+        if payment_verified:
+            intent = self._find_structured_intent(context.current_task.history or [])
+            if intent is not None:
+                await self._confirm_structured_purchase(context, task_updater)
+                return
+        else:
+            intent = self._find_structured_intent([context.message])
+            if intent is not None:
+                await self._execute_intent(*intent, task_updater)
+                return
+
+        sessions = RequestSessionCache(
+            self.runner.session_service, self.runner.app_name, "self"
+        )
+        session = await sessions.get(context.context_id)
 
         # Check if the x402 wrapper has verified a payment by looking at the task metadata.
-        if context.current_task and context.current_task.metadata.get(
-            "x402_payment_verified", False
-        ):
+        if payment_verified:
             # If payment is verified, write structured data to the session state.
             # The agent's `before_agent_callback` will read this.
             product_name = (
@@ -212,47 +482,91 @@ class ADKAgentExecutor(AgentExecutor):
                 .get("extra", {})
                 .get("name", "the item")
             )
-            session.state["payment_verified_data"] = {
-                "product": product_name,
-                "status": "SUCCESS",
-            }
+            # --- CRITICAL ---
+            # The state change is written through to the session service
+            # before the agent runs, so the Runner's own session lookup sees
+            # it when the agent's `before_agent_callback` is invoked.
+            await sessions.update_state(
+                session,
+                {
+                    "payment_verified_data": {
+                        "product": product_name,
+                        "status": "SUCCESS",
+                    }
+                },
+            )
             # We still need to send a message to trigger the agent's turn.
             # The content doesn't matter as much, as the callback will intercept it.
             user_message = types.UserContent(
                 parts=[types.Part(text="Payment verified. Please proceed.")]
             )
-            # --- CRITICAL ---
-            # We must re-fetch the session here to ensure the state changes
-            # from the x402 executor are reflected before the agent's
-            # `before_agent_callback` is invoked.
-            session = await self._upsert_session(session.id)
         else:
             # No payment verification; process the original user message.
             user_message = types.UserContent(
                 parts=convert_a2a_parts_to_genai(context.message.parts)
             )
 
-        await self._process_request(
-            user_message,
-            session.id,
-            task_updater,
+        # Run the agent as its own task so `cancel` can stop it cooperatively.
+        run = asyncio.create_task(
+            self._process_request(
+                user_message,
+                session.id,
+                task_updater,
+            )
+        )
+        self._running_sessions[context.task_id] = (context.context_id, run)
+        try:
+            await run
+        except asyncio.CancelledError:
+            if not asyncio.current_task().cancelling():
+                # Canceled through `cancel`, which publishes the canceled
+                # state. Still raised, so a wrapping executor doesn't carry
+                # on as if the run had finished, e.g. by settling a payment.
+                logger.info(f"[{self._card.name}] task {context.task_id} canceled")
+            raise
+        finally:
+            self._running_sessions.pop(context.task_id, None)
+            self.session_store_calls += sessions.store_calls
+
+        logger.debug(
+            f"[{self._card.name}] execute exiting after "
+            f"{sessions.store_calls} session store call(s)"
         )
-
-        logger.debug(f"[{self._card.name}] execute exiting")
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        # Ideally: kill any ongoing tasks.
-        raise ServerError(error=UnsupportedOperationError())
+        """
+        Cancels the in-flight run for the task, if any, and marks it canceled.
 
-    async def _upsert_session(self, session_id: str):
-        session = await self.runner.session_service.get_session(
-            app_name=self.runner.app_name, user_id="self", session_id=session_id
-        )
-        if session:
-            return session
-        return await self.runner.session_service.create_session(
-            app_name=self.runner.app_name, user_id="self", session_id=session_id
-        )
+        Cancellation is cooperative: the pending LLM stream is closed and any
+        outstanding tool calls are dropped at their next await point.
+        """
+        if context.current_task:
+            state = context.current_task.status.state
+            if state in _TERMINAL_STATES:
+                raise ServerError(
+                    error=TaskNotCancelableError(
+                        message=f"Task is already {state.value}."
+                    )
+                )
+
+        running = self._running_sessions.get(context.task_id)
+        if running is None:
+            running = next(
+                (
+                    entry
+                    for entry in self._running_sessions.values()
+                    if entry[0] == context.context_id
+                ),
+                None,
+            )
+        if running is not None:
+            _, run = running
+            run.cancel()
+            # Let the run unwind so nothing is published after the cancel.
+            await asyncio.wait({run})
+
+        task_updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await task_updater.cancel()
 
 
 def convert_a2a_parts_to_genai(parts: list[Part]) -> list[types.Part]:
@@ -0,0 +1,149 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, override
+
+from a2a.server.agent_execution import AgentExecutor
+from a2a.server.agent_execution.context import RequestContext
+from a2a.server.events.event_queue import EventQueue
+from a2a.types import JSONRPCError
+from a2a.utils.errors import ServerError
+
+from server.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED_TOTAL,
+    ADMISSION_WAIT_SECONDS,
+)
+
+# JSON-RPC implementation-defined server error used when a request is shed.
+OVERLOADED_ERROR_CODE = -32000
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    """
+    Limits on concurrent `execute` calls for one agent.
+
+    At most `max_concurrency` requests run at once and up to `max_queue`
+    more wait for a slot, each for at most `queue_timeout` seconds. Anything
+    beyond that is rejected with a retry hint of `retry_after` seconds.
+    A `max_concurrency` of 0 disables admission control.
+    """
+
+    max_concurrency: int = 32
+    max_queue: int = 64
+    queue_timeout: float = 30.0
+    retry_after: float = 1.0
+
+
+class OverloadedError(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """A concurrency limiter with a bounded, time-limited wait queue."""
+
+    def __init__(self, config: AdmissionConfig, name: str):
+        self.config = config
+        self.name = name
+        self._slots = asyncio.Semaphore(config.max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        if self._slots.locked() and self.waiting >= self.config.max_queue:
+            self._reject()
+            raise OverloadedError("Wait queue is full.", self.config.retry_after)
+
+        start = time.perf_counter()
+        self.waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(self.name).inc()
+        try:
+            async with asyncio.timeout(self.config.queue_timeout):
+                await self._slots.acquire()
+        except TimeoutError:
+            self._reject()
+            raise OverloadedError(
+                "Timed out waiting for a free slot.", self.config.retry_after
+            ) from None
+        finally:
+            waited = time.perf_counter() - start
+            self.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(self.name).dec()
+            ADMISSION_WAIT_SECONDS.labels(self.name).observe(waited)
+        self.active += 1
+        self.admitted += 1
+        ADMISSION_ACTIVE.labels(self.name).inc()
+
+    def release(self) -> None:
+        self.active -= 1
+        ADMISSION_ACTIVE.labels(self.name).dec()
+        self._slots.release()
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        ADMISSION_REJECTED_TOTAL.labels(self.name).inc()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self.config.max_concurrency,
+            "max_queue": self.config.max_queue,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionControlledExecutor(AgentExecutor):
+    """
+    Applies an `AdmissionController` to another executor's `execute` calls.
+
+    Rejected requests fail with a JSON-RPC server error whose data carries a
+    `retry_after_seconds` hint. Cancellation is never throttled.
+    """
+
+    def __init__(self, delegate: AgentExecutor, controller: AdmissionController):
+        self._delegate = delegate
+        self.admission = controller
+
+    @override
+    async def execute(self, context: RequestContext, event_queue: EventQueue):
+        try:
+            await self.admission.acquire()
+        except OverloadedError as e:
+            raise ServerError(
+                error=JSONRPCError(
+                    code=OVERLOADED_ERROR_CODE,
+                    message=f"Server overloaded: {e}",
+                    data={"retry_after_seconds": e.retry_after},
+                )
+            ) from e
+        try:
+            await self._delegate.execute(context, event_queue)
+        finally:
+            self.admission.release()
+
+    @override
+    async def cancel(self, context: RequestContext, event_queue: EventQueue):
+        await self._delegate.cancel(context, event_queue)
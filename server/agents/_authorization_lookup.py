@@ -0,0 +1,84 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+
+import httpx
+from x402_a2a.types import ExactPaymentPayload, PaymentPayload, PaymentRequirements
+
+logger = logging.getLogger(__name__)
+
+# keccak256("AuthorizationUsed(address,bytes32)"), emitted by EIP-3009 tokens
+# such as USDC when `transferWithAuthorization` moves the funds.
+AUTHORIZATION_USED_TOPIC = (
+    "0x98de503528ee59b575ef0c0a2576a82497bfc029a5685b209e9ec333479b10a5"
+)
+
+
+class AuthorizationLookup:
+    """
+    Finds on chain the transfer an EIP-3009 payment authorization made.
+
+    Searches the token contract's `AuthorizationUsed` events for the payer
+    and nonce over the last `lookback_blocks` blocks through a JSON-RPC
+    node. A nonce the payer canceled instead emits `AuthorizationCanceled`,
+    so a match is evidence the funds moved, which the token's
+    `authorizationState` alone doesn't tell apart from a cancellation.
+    """
+
+    def __init__(self, rpc_url: str, lookback_blocks: int = 10_000):
+        self._rpc_url = rpc_url
+        self._lookback_blocks = lookback_blocks
+
+    async def find_transfer(
+        self, payload: PaymentPayload, requirements: PaymentRequirements
+    ) -> str | None:
+        """The hash of the transaction that used the authorization, if any."""
+        if not isinstance(payload.payload, ExactPaymentPayload):
+            return None
+        authorization = payload.payload.authorization
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            latest = int(await self._call(client, "eth_blockNumber", []), 16)
+            logs = await self._call(
+                client,
+                "eth_getLogs",
+                [
+                    {
+                        "address": requirements.asset,
+                        "fromBlock": hex(max(0, latest - self._lookback_blocks)),
+                        "toBlock": "latest",
+                        "topics": [
+                            AUTHORIZATION_USED_TOPIC,
+                            _word(authorization.from_),
+                            _word(authorization.nonce),
+                        ],
+                    }
+                ],
+            )
+        return logs[0]["transactionHash"] if logs else None
+
+    async def _call(self, client: httpx.AsyncClient, method: str, params: list):
+        response = await client.post(
+            self._rpc_url,
+            json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params},
+        )
+        response.raise_for_status()
+        reply = response.json()
+        if "error" in reply:
+            raise RuntimeError(f"{method} failed: {reply['error']}")
+        return reply["result"]
+
+
+def _word(value: str) -> str:
+    """A hex address or bytes32 as a 32-byte topic."""
+    return "0x" + value.removeprefix("0x").lower().rjust(64, "0")
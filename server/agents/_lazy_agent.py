@@ -0,0 +1,146 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+import threading
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import override
+
+from a2a.server.agent_execution import AgentExecutor
+from a2a.server.agent_execution.context import RequestContext
+from a2a.server.context import ServerCallContext
+from a2a.server.events.event_queue import EventQueue
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+
+logger = logging.getLogger(__name__)
+
+# Builds import modules and open databases shared between agents, so they
+# run one at a time.
+_BUILD_LOCK = threading.Lock()
+
+
+@dataclass
+class BuiltAgent:
+    """The parts of an agent that are expensive to create."""
+
+    executor: AgentExecutor
+    task_store: TaskStore
+    # Started on the event loop once the agent is built, e.g. to resume
+    # background work queued before a restart.
+    start_background: Callable[[], None] | None = None
+    # Awaited at shutdown, e.g. to stop that work and close connections.
+    stop_background: Callable[[], Awaitable[None]] | None = None
+
+
+class LazyAgent:
+    """
+    Builds one agent's services, runner and executors on first use.
+
+    `build` runs in a worker thread, so the event loop keeps serving agent
+    cards and other requests while google.adk is imported and the agent is
+    constructed. Concurrent first requests share a single build; a failed
+    build is retried by the next request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        build: Callable[[], BuiltAgent],
+        on_built: Callable[[], None] | None = None,
+    ):
+        self.name = name
+        self._build = build
+        self._on_built = on_built
+        self._building: asyncio.Future | None = None
+        self.built: BuiltAgent | None = None
+
+    async def get(self) -> BuiltAgent:
+        if self.built is not None:
+            return self.built
+        # Shielded so a canceled request doesn't abort a build others await.
+        return await asyncio.shield(self.warm_up())
+
+    def warm_up(self) -> asyncio.Future:
+        """Starts the build in the background if it hasn't started yet."""
+        if self._building is None:
+            self._building = asyncio.ensure_future(asyncio.to_thread(self._run_build))
+            self._building.add_done_callback(self._build_done)
+        return self._building
+
+    async def aclose(self) -> None:
+        """Stops the built agent's background work, if it was built."""
+        if self.built is not None and self.built.stop_background:
+            await self.built.stop_background()
+
+    def _run_build(self) -> BuiltAgent:
+        with _BUILD_LOCK:
+            return self._build()
+
+    def _build_done(self, building: asyncio.Future) -> None:
+        if building.cancelled() or building.exception() is not None:
+            logger.error(
+                f"Building agent {self.name} failed",
+                exc_info=None if building.cancelled() else building.exception(),
+            )
+            self._building = None
+            return
+        self.built = building.result()
+        logger.info(f"Agent {self.name} is built")
+        if self.built.start_background:
+            self.built.start_background()
+        if self._on_built:
+            self._on_built()
+
+
+class LazyAgentExecutor(AgentExecutor):
+    """Forwards to the executor of a `LazyAgent`, building it if needed."""
+
+    def __init__(self, agent: LazyAgent):
+        self._agent = agent
+
+    @override
+    async def execute(self, context: RequestContext, event_queue: EventQueue):
+        built = await self._agent.get()
+        await built.executor.execute(context, event_queue)
+
+    @override
+    async def cancel(self, context: RequestContext, event_queue: EventQueue):
+        built = await self._agent.get()
+        await built.executor.cancel(context, event_queue)
+
+
+class LazyTaskStore(TaskStore):
+    """Forwards to the task store of a `LazyAgent`, building it if needed."""
+
+    def __init__(self, agent: LazyAgent):
+        self._agent = agent
+
+    @override
+    async def save(self, task: Task, context: ServerCallContext | None = None):
+        built = await self._agent.get()
+        await built.task_store.save(task, context)
+
+    @override
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        built = await self._agent.get()
+        return await built.task_store.get(task_id, context)
+
+    @override
+    async def delete(self, task_id: str, context: ServerCallContext | None = None):
+        built = await self._agent.get()
+        await built.task_store.delete(task_id, context)
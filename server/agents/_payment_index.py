@@ -0,0 +1,91 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from x402_a2a.types import ExactPaymentPayload, PaymentPayload, PaymentRequirements
+
+# (payer, nonce, requirements hash)
+type PaymentKey = tuple[str, str, str]
+
+
+def payment_key(
+    payload: PaymentPayload, requirements: PaymentRequirements
+) -> PaymentKey | None:
+    """Identifies a signed payment authorization; None if it can't be keyed."""
+    if not isinstance(payload.payload, ExactPaymentPayload):
+        return None
+    authorization = payload.payload.authorization
+    digest = hashlib.sha256(
+        requirements.model_dump_json(by_alias=True).encode()
+    ).hexdigest()
+    return (authorization.from_.lower(), authorization.nonce.lower(), digest)
+
+
+@dataclass
+class PaymentRecord:
+    """What happened to one payment authorization, as shared futures."""
+
+    task_id: str | None
+    expires_at: float
+    verify: asyncio.Future | None = None
+    settle: asyncio.Future | None = None
+
+
+class PaymentIndex:
+    """
+    Payment authorizations this process has seen, evicted after a TTL.
+
+    Keyed by payer, nonce and a hash of the requirements, so a retried
+    request can be answered from the outcome of the first one and an
+    authorization reused for another task can be refused without a
+    facilitator round trip. Every entry shares one TTL, so insertion order
+    is expiry order and eviction pops from the front.
+
+    The index only covers this process: with several worker processes, a
+    replay for another task is caught by the shared `PaymentClaimStore`.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600.0, max_entries: int = 100_000):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._records: OrderedDict[PaymentKey, PaymentRecord] = OrderedDict()
+
+    def get(self, key: PaymentKey) -> PaymentRecord | None:
+        self._evict(time.monotonic())
+        return self._records.get(key)
+
+    def add(self, key: PaymentKey, task_id: str | None) -> PaymentRecord:
+        now = time.monotonic()
+        record = PaymentRecord(task_id=task_id, expires_at=now + self._ttl)
+        self._records.pop(key, None)
+        self._records[key] = record
+        self._evict(now)
+        return record
+
+    def discard(self, key: PaymentKey) -> None:
+        self._records.pop(key, None)
+
+    def _evict(self, now: float) -> None:
+        while self._records:
+            record = next(iter(self._records.values()))
+            if record.expires_at > now and len(self._records) <= self._max_entries:
+                return
+            self._records.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._records)
@@ -0,0 +1,65 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Any
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import BaseSessionService, Session
+
+
+class RequestSessionCache:
+    """
+    A request-scoped cache of ADK session handles.
+
+    Each session is fetched (or created) at most once per request. State
+    changes go through `update_state`, which writes them through to the
+    session service as a state-delta event before returning, so they are
+    visible to the Runner's own session lookup and therefore to the agent's
+    `before_agent_callback` on the next turn.
+    """
+
+    def __init__(
+        self, session_service: BaseSessionService, app_name: str, user_id: str
+    ):
+        self._service = session_service
+        self._app_name = app_name
+        self._user_id = user_id
+        self._sessions: dict[str, Session] = {}
+        # Number of round trips made to the session service by this request.
+        self.store_calls = 0
+
+    async def get(self, session_id: str) -> Session:
+        """Returns the session, creating it on first use."""
+        session = self._sessions.get(session_id)
+        if session:
+            return session
+
+        self.store_calls += 1
+        session = await self._service.get_session(
+            app_name=self._app_name, user_id=self._user_id, session_id=session_id
+        )
+        if not session:
+            self.store_calls += 1
+            session = await self._service.create_session(
+                app_name=self._app_name, user_id=self._user_id, session_id=session_id
+            )
+        self._sessions[session.id] = session
+        return session
+
+    async def update_state(self, session: Session, state_delta: dict[str, Any]) -> None:
+        """Applies `state_delta` to the cached session and the session service."""
+        self.store_calls += 1
+        await self._service.append_event(
+            session,
+            Event(author="user", actions=EventActions(state_delta=state_delta)),
+        )
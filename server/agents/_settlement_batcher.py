@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+import time
+
+from x402_a2a.types import PaymentPayload, PaymentRequirements, SettleResponse
+
+from server.metrics import FACILITATOR_SECONDS, SETTLEMENT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class SettlementBatcher:
+    """
+    Groups concurrent `settle` calls into batches for the facilitator.
+
+    A batch is submitted once it holds `max_batch` payments or `window`
+    seconds after its first payment arrived, whichever comes first. If the
+    facilitator has a `settle_batch(items)` method the batch goes out in one
+    call; otherwise its payments are settled concurrently, one call each,
+    which only smooths the request rate and is logged as a warning.
+    Every caller gets its own payment's result: a payment the facilitator
+    rejects or fails on doesn't affect the others in its batch.
+    """
+
+    def __init__(self, facilitator, window: float = 0.05, max_batch: int = 32):
+        self._facilitator = facilitator
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: list[
+            tuple[PaymentPayload, PaymentRequirements, asyncio.Future]
+        ] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+        if not hasattr(facilitator, "settle_batch"):
+            logger.warning(
+                "%s has no settle_batch; batched payments are still settled "
+                "one call each",
+                type(facilitator).__name__,
+            )
+
+    async def settle(
+        self, payload: PaymentPayload, requirements: PaymentRequirements
+    ) -> SettleResponse:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, requirements, future))
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        # A cancelled caller leaves its payment in the batch: once submitted,
+        # a settlement can't be taken back.
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(_discard_result)
+            raise
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        flush = asyncio.get_running_loop().create_task(self._submit(batch))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _submit(
+        self, batch: list[tuple[PaymentPayload, PaymentRequirements, asyncio.Future]]
+    ) -> None:
+        SETTLEMENT_BATCH_SIZE.observe(len(batch))
+        items = [(payload, requirements) for payload, requirements, _ in batch]
+        start = time.perf_counter()
+        try:
+            if hasattr(self._facilitator, "settle_batch"):
+                results = await self._facilitator.settle_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Facilitator returned {len(results)} results "
+                        f"for a batch of {len(items)}"
+                    )
+            else:
+                results = await asyncio.gather(
+                    *(self._facilitator.settle(*item) for item in items),
+                    return_exceptions=True,
+                )
+        except asyncio.CancelledError:
+            # E.g. the loop is shutting down; don't leave the callers waiting.
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Settlement batch was cancelled"))
+            raise
+        except Exception as e:
+            # The whole batch failed; each caller decides whether to retry.
+            FACILITATOR_SECONDS.labels("settle_batch", "error").observe(
+                time.perf_counter() - start
+            )
+            logger.exception("Settling a batch of %d failed", len(batch))
+            results = [e] * len(batch)
+        else:
+            FACILITATOR_SECONDS.labels("settle_batch", "success").observe(
+                time.perf_counter() - start
+            )
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def _discard_result(future: asyncio.Future) -> None:
+    # Retrieves the exception nobody is waiting for, so asyncio doesn't log it.
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,409 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import httpx
+from a2a.server.tasks import TaskStore
+from a2a.types import Message, Part, Role, TaskState, TaskStatus, TextPart
+from x402_a2a import x402Utils
+from x402_a2a.types import PaymentPayload, PaymentRequirements, SettleResponse
+
+from server.metrics import (
+    FACILITATOR_SECONDS,
+    SETTLEMENT_ATTEMPTS_TOTAL,
+    SETTLEMENT_LAG_SECONDS,
+)
+from server.storage.settlements import (
+    FAILED,
+    PENDING,
+    SETTLED,
+    SettlementJob,
+    SettlementStore,
+)
+
+from ._authorization_lookup import AuthorizationLookup
+from .pooled_facilitator import FacilitatorUnavailableError
+
+logger = logging.getLogger(__name__)
+
+SETTLEMENT_MODES = ("sync", "async")
+
+_FINAL_STATES = frozenset(
+    [TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected]
+)
+
+# Failed settle attempts that are retried: transport errors, timeouts, an
+# open circuit, and malformed or mismatched facilitator answers.
+_SETTLE_ERRORS = (
+    httpx.HTTPError,
+    OSError,
+    TimeoutError,
+    FacilitatorUnavailableError,
+    RuntimeError,
+    ValueError,
+)
+
+# The facilitator's reason for rejecting an authorization whose nonce was
+# already used on chain.
+AUTHORIZATION_ALREADY_USED = "authorization_already_used"
+
+
+@dataclass(frozen=True)
+class SettlementConfig:
+    """
+    How verified payments are settled.
+
+    In "sync" mode the request that submitted the payment waits for the
+    facilitator to settle it. In "async" mode the payment is queued in the
+    agent's `SettlementStore` and the task completes right away; a
+    background worker settles it, retrying transient facilitator errors
+    with exponential backoff (from `initial_backoff` up to `max_backoff`
+    seconds) for up to `max_attempts` attempts, and records the outcome on
+    the task.
+
+    In either mode, a `batch_window` above 0 groups the payments settled
+    within that many seconds, up to `batch_max` of them, into one batch for
+    the facilitator; see `SettlementBatcher`.
+    """
+
+    mode: str = "sync"
+    batch_window: float = 0.0
+    batch_max: int = 32
+    max_attempts: int = 8
+    initial_backoff: float = 1.0
+    max_backoff: float = 60.0
+    attempt_timeout: float = 30.0
+    # How long a claimed job is reserved for this worker before another
+    # worker may take it over.
+    lease_seconds: float = 120.0
+    poll_interval: float = 1.0
+    # Jobs claimed from the store at a time.
+    claim_limit: int = 32
+    # How long to wait for the task to reach a final state before the
+    # settlement outcome is written to it regardless.
+    record_timeout: float = 60.0
+    # JSON-RPC endpoint used to confirm that a retried payment the
+    # facilitator reports as already used was transferred by an earlier
+    # attempt. Without it such payments are failed for manual review.
+    chain_rpc_url: str | None = None
+    # Blocks searched back from the chain head for that transfer.
+    chain_lookback_blocks: int = 10_000
+
+
+class SettlementWorker:
+    """
+    Settles queued payments in the background and records the outcomes.
+
+    The worker polls its store for due jobs and is woken early whenever a
+    job is queued in this process. Jobs are leased, so several processes
+    can share one store; jobs left behind by a stopped process are picked
+    up once their lease expires.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        store: SettlementStore,
+        facilitator,
+        task_store: TaskStore,
+        config: SettlementConfig | None = None,
+        authorizations: AuthorizationLookup | None = None,
+    ):
+        self.name = name
+        self.config = config or SettlementConfig()
+        if authorizations is None and self.config.chain_rpc_url:
+            authorizations = AuthorizationLookup(
+                self.config.chain_rpc_url, self.config.chain_lookback_blocks
+            )
+        self._authorizations = authorizations
+        self._store = store
+        self._facilitator = facilitator
+        self._task_store = task_store
+        self._utils = x402Utils()
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup: asyncio.Event | None = None
+        self._running: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Starts the worker loop on the running event loop, if not running."""
+        if self._running is None or self._running.done():
+            self._wakeup = asyncio.Event()
+            self._running = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._running is not None:
+            self._running.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._running
+
+    async def enqueue(
+        self, task_id: str, payload: PaymentPayload, requirements: PaymentRequirements
+    ) -> SettlementJob:
+        """Queues a verified payment; returns once the job is durable."""
+        job = SettlementJob(
+            id=uuid.uuid4().hex,
+            queue=self.name,
+            task_id=task_id,
+            payload=payload.model_dump_json(by_alias=True),
+            requirements=requirements.model_dump_json(by_alias=True),
+            next_attempt_at=time.time(),
+        )
+        await self._store.add(job)
+        self.start()
+        self._wakeup.set()
+        logger.info("Queued settlement %s for task %s", job.id, task_id)
+        return job
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                jobs = await self._store.claim(
+                    self.name,
+                    self._owner,
+                    time.time(),
+                    self.config.lease_seconds,
+                    self.config.claim_limit,
+                )
+            except Exception:
+                logger.exception("Claiming settlement jobs failed")
+                jobs = []
+            if jobs:
+                await asyncio.gather(*(self._process(job) for job in jobs))
+                continue
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.config.poll_interval)
+
+    async def _process(self, job: SettlementJob) -> None:
+        attempts = job.attempts
+        try:
+            if job.status == PENDING:
+                await self._settle(job)
+            if job.status != PENDING:
+                job.recorded = await self._record(job)
+                if not job.recorded:
+                    # The request is still finishing the task; look again soon.
+                    job.next_attempt_at = time.time() + self.config.poll_interval
+        except Exception as e:
+            logger.exception("Processing settlement %s failed", job.id)
+            # Counted like a failed attempt, so a job that fails the same way
+            # every time is given up instead of retried forever.
+            if job.attempts == attempts:
+                job.attempts += 1
+            if job.attempts < self.config.max_attempts:
+                job.next_attempt_at = time.time() + self._backoff(job.attempts)
+            elif job.status == PENDING:
+                job.status = FAILED
+                job.error = repr(e)
+                job.next_attempt_at = time.time()
+            else:
+                logger.error(
+                    "Giving up recording settlement %s (%s) on task %s",
+                    job.id,
+                    job.status,
+                    job.task_id,
+                )
+                job.recorded = True
+        try:
+            await self._store.update(job)
+        except Exception:
+            # The lease expires and the job is processed again.
+            logger.exception("Storing settlement %s failed", job.id)
+
+    async def _settle(self, job: SettlementJob) -> None:
+        job.attempts += 1
+        try:
+            payload = PaymentPayload.model_validate_json(job.payload)
+            requirements = PaymentRequirements.model_validate_json(job.requirements)
+        except ValueError as e:
+            # Retrying can't fix a payment that doesn't decode.
+            job.status = FAILED
+            job.error = f"undecodable payment: {e}"
+            logger.error("Settlement %s has an undecodable payment: %s", job.id, e)
+            return
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self._facilitator.settle(payload, requirements),
+                self.config.attempt_timeout,
+            )
+        except _SETTLE_ERRORS as e:
+            # Network errors and timeouts are retried; the facilitator
+            # rejects a payload it has already settled, so a retry can't
+            # move funds twice.
+            outcome = "error"
+            job.error = repr(e)
+            if job.attempts >= self.config.max_attempts:
+                job.status = FAILED
+            else:
+                job.next_attempt_at = time.time() + self._backoff(job.attempts)
+                logger.warning(
+                    "Settlement %s attempt %d failed, retrying: %r",
+                    job.id,
+                    job.attempts,
+                    e,
+                )
+        else:
+            job.error = response.error_reason
+            if (
+                job.attempts > 1
+                and not response.success
+                and response.error_reason == AUTHORIZATION_ALREADY_USED
+            ):
+                # An earlier attempt that timed out or lost its connection may
+                # have gone through after all; believe it only if the chain
+                # shows the transfer.
+                transaction = await self._find_transfer(job, payload, requirements)
+                if transaction:
+                    logger.warning(
+                        "Settlement %s attempt %d found its authorization used "
+                        "by transaction %s; treating the payment as settled",
+                        job.id,
+                        job.attempts,
+                        transaction,
+                    )
+                    response = response.model_copy(
+                        update={
+                            "success": True,
+                            "error_reason": None,
+                            "transaction": transaction,
+                        }
+                    )
+                    job.error = None
+                else:
+                    job.error = (
+                        f"{AUTHORIZATION_ALREADY_USED} on retry; no transfer "
+                        "found on chain, needs manual review"
+                    )
+            # A response is the facilitator's answer, successful or not.
+            outcome = "success" if response.success else "failed"
+            job.status = SETTLED if response.success else FAILED
+            job.result = response.model_dump_json(by_alias=True)
+        FACILITATOR_SECONDS.labels("settle", outcome).observe(
+            time.perf_counter() - start
+        )
+        SETTLEMENT_ATTEMPTS_TOTAL.labels(self.name, outcome).inc()
+        if job.status != PENDING:
+            SETTLEMENT_LAG_SECONDS.labels(self.name, job.status).observe(
+                time.time() - job.created_at
+            )
+            log = logger.info if job.status == SETTLED else logger.error
+            log(
+                "Settlement %s for task %s %s after %d attempt(s): %s",
+                job.id,
+                job.task_id,
+                job.status,
+                job.attempts,
+                job.error or "ok",
+            )
+
+    async def _find_transfer(
+        self,
+        job: SettlementJob,
+        payload: PaymentPayload,
+        requirements: PaymentRequirements,
+    ) -> str | None:
+        """The transaction that used the job's authorization, if confirmed."""
+        if self._authorizations is None:
+            return None
+        try:
+            return await asyncio.wait_for(
+                self._authorizations.find_transfer(payload, requirements),
+                self.config.attempt_timeout,
+            )
+        except Exception:
+            logger.exception(
+                "Looking up the authorization of settlement %s failed", job.id
+            )
+            return None
+
+    async def _record(self, job: SettlementJob) -> bool:
+        """
+        Writes the settlement outcome to the job's task.
+
+        Returns False if the task is still being worked on, since the
+        request's own final update would overwrite the outcome.
+        """
+        task = await self._task_store.get(job.task_id)
+        if task is None:
+            logger.warning("Task %s of settlement %s is gone", job.task_id, job.id)
+            return True
+        if (
+            task.status.state not in _FINAL_STATES
+            and time.time() - job.created_at < self.config.record_timeout
+        ):
+            return False
+
+        if job.result:
+            response = SettleResponse.model_validate_json(job.result)
+        else:
+            response = SettleResponse(success=False, error_reason=job.error)
+        if task.status.message and task.status.message.metadata:
+            # Replaces the provisional receipt issued when the job was queued.
+            task.status.message.metadata.pop(self._utils.RECEIPTS_KEY, None)
+        if job.status == SETTLED:
+            self._utils.record_payment_success(task, response)
+        else:
+            # The order was confirmed on the strength of the verification;
+            # fail the task so the merchant doesn't fulfil an unpaid order.
+            if task.status.message:
+                task.history = [*(task.history or []), task.status.message]
+            task.status = TaskStatus(
+                state=TaskState.failed,
+                message=Message(
+                    message_id=str(uuid.uuid4()),
+                    role=Role.agent,
+                    parts=[
+                        Part(
+                            root=TextPart(
+                                text="Payment could not be settled: "
+                                f"{job.error or 'unknown error'}"
+                            )
+                        )
+                    ],
+                    task_id=task.id,
+                    context_id=task.context_id,
+                ),
+                timestamp=datetime.now(UTC).isoformat(),
+            )
+            self._utils.record_payment_failure(task, "settlement_failed", response)
+        task.metadata = {
+            **(task.metadata or {}),
+            "x402_settlement": {
+                "id": job.id,
+                "status": job.status,
+                "attempts": job.attempts,
+                "transaction": response.transaction,
+                "error": job.error,
+            },
+        }
+        await self._task_store.save(task)
+        return True
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(
+            self.config.max_backoff,
+            self.config.initial_backoff * 2 ** (attempts - 1),
+        )
+        # Jitter so that jobs failed by one outage don't retry in lockstep.
+        return delay * random.uniform(0.5, 1.0)
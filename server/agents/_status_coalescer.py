@@ -0,0 +1,74 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Part, TaskState
+
+
+class StatusCoalescer:
+    """
+    Batches intermediate `working` status messages for one task.
+
+    Parts passed to `add` are held for up to `window` seconds, or until
+    `max_parts` have accumulated, and then published as a single agent
+    message. Callers must `flush` before publishing anything that has to be
+    ordered after those messages, such as artifacts or a final state.
+    A `window` of 0 publishes every update immediately.
+    """
+
+    def __init__(self, task_updater: TaskUpdater, window: float, max_parts: int):
+        self._updater = task_updater
+        self._window = window
+        self._max_parts = max_parts
+        self._parts: list[Part] = []
+        self._timer: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def add(self, parts: list[Part]) -> None:
+        self._parts.extend(parts)
+        if self._window <= 0 or len(self._parts) >= self._max_parts:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """Publishes any buffered parts now."""
+        if self._timer is not None:
+            # The timer is only set while it is still sleeping.
+            self._timer.cancel()
+            self._timer = None
+        await self._publish()
+
+    def discard(self) -> None:
+        """Drops buffered parts without publishing them."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._parts = []
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._window)
+        self._timer = None
+        await self._publish()
+
+    async def _publish(self) -> None:
+        async with self._lock:
+            if not self._parts:
+                return
+            parts, self._parts = self._parts, []
+            await self._updater.update_status(
+                TaskState.working,
+                message=self._updater.new_agent_message(parts),
+            )
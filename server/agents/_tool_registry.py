@@ -0,0 +1,226 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+# Parameters that ADK injects itself and the model never supplies.
+_INJECTED_PARAMS = frozenset({"tool_context"})
+
+
+class ToolArgumentError(ValueError):
+    """Raised when the model calls a tool with arguments it does not accept."""
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool does not finish within its configured timeout."""
+
+
+@dataclass(frozen=True)
+class ToolOptions:
+    """
+    Per-tool execution limits.
+
+    `timeout` bounds the whole call, including time spent waiting for a
+    concurrency slot. `max_concurrency` caps how many copies of the tool may
+    run at once in this process. `None` disables either limit.
+    """
+
+    timeout: float | None = 30.0
+    max_concurrency: int | None = None
+
+
+@dataclass
+class ToolSpec:
+    """A registered tool together with its validation data and limits."""
+
+    name: str
+    func: Callable[..., Any]
+    is_async: bool
+    required: frozenset[str]
+    accepted: frozenset[str]
+    accepts_any: bool
+    options: ToolOptions
+    semaphore: asyncio.Semaphore | None
+    errors: int = 0
+    timeouts: int = 0
+
+    def validate_args(self, args: dict[str, Any]) -> None:
+        """Rejects missing or unexpected arguments before the tool runs."""
+        missing = self.required - args.keys()
+        if missing:
+            raise ToolArgumentError(
+                f"Tool '{self.name}' is missing required arguments: "
+                f"{', '.join(sorted(missing))}"
+            )
+        if not self.accepts_any:
+            unexpected = args.keys() - self.accepted
+            if unexpected:
+                raise ToolArgumentError(
+                    f"Tool '{self.name}' got unexpected arguments: "
+                    f"{', '.join(sorted(unexpected))}"
+                )
+
+
+class ToolRegistry:
+    """
+    Name-indexed view of an agent's function tools.
+
+    The registry is built once per Runner so every tool lookup is a dict hit.
+    Calls go through `call`, which validates arguments, enforces the tool's
+    concurrency cap and timeout, and counts errors and timeouts. Exceptions
+    of the `passthrough` types are how tools signal a normal outcome, such as
+    a payment request, and aren't counted as errors.
+    """
+
+    def __init__(
+        self,
+        tools: Iterable[Any],
+        default_options: ToolOptions | None = None,
+        tool_options: dict[str, ToolOptions] | None = None,
+        passthrough: tuple[type[BaseException], ...] = (),
+    ):
+        default_options = default_options or ToolOptions()
+        tool_options = tool_options or {}
+        self._passthrough = passthrough
+        self._tools: dict[str, ToolSpec] = {}
+        for tool in tools:
+            spec = _build_spec(tool, default_options, tool_options)
+            if spec:
+                self._tools[spec.name] = spec
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def get(self, name: str) -> ToolSpec | None:
+        return self._tools.get(name)
+
+    async def call(
+        self,
+        name: str,
+        args: dict[str, Any],
+        invoke: Callable[[ToolSpec, dict[str, Any]], Awaitable[Any]],
+    ) -> Any:
+        """
+        Runs the named tool through `invoke`, applying the registry limits.
+
+        Raises `KeyError` for unknown tools, `ToolArgumentError` for invalid
+        arguments and `ToolTimeoutError` when the timeout elapses. Any
+        exception raised by the tool itself propagates unchanged.
+
+        A timed-out async tool is cancelled. A sync tool's thread can't be
+        stopped, so it keeps its `max_concurrency` slot until it returns.
+        """
+        spec = self._tools.get(name)
+        if spec is None:
+            raise KeyError(name)
+        spec.validate_args(args)
+
+        try:
+            async with asyncio.timeout(spec.options.timeout) as deadline:
+                if spec.semaphore is None:
+                    return await invoke(spec, args)
+                await spec.semaphore.acquire()
+                return await _holding_slot(spec, invoke(spec, args))
+        except TimeoutError as e:
+            if not deadline.expired():
+                # Raised by the tool itself, not by the registry's timeout.
+                spec.errors += 1
+                raise
+            spec.timeouts += 1
+            raise ToolTimeoutError(
+                f"Tool '{name}' timed out after {spec.options.timeout}s"
+            ) from e
+        except self._passthrough:
+            raise
+        except Exception:
+            spec.errors += 1
+            raise
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Returns error and timeout counts for every tool."""
+        return {
+            name: {
+                "errors": spec.errors,
+                "timeouts": spec.timeouts,
+            }
+            for name, spec in self._tools.items()
+        }
+
+
+async def _holding_slot(spec: ToolSpec, call: Awaitable[Any]) -> Any:
+    """Awaits `call`, releasing the tool's slot only once `call` is done."""
+    run = asyncio.ensure_future(call)
+    run.add_done_callback(lambda _: spec.semaphore.release())
+    try:
+        return await asyncio.shield(run)
+    except asyncio.CancelledError:
+        if spec.is_async:
+            run.cancel()
+        else:
+            # Still running in its thread; nobody waits for the outcome.
+            run.add_done_callback(_discard_outcome)
+        raise
+
+
+def _discard_outcome(run: asyncio.Future) -> None:
+    if not run.cancelled():
+        run.exception()
+
+
+def _build_spec(
+    tool: Any,
+    default_options: ToolOptions,
+    tool_options: dict[str, ToolOptions],
+) -> ToolSpec | None:
+    # Plain functions and bound methods expose `__name__`; ADK FunctionTool
+    # instances expose `name` and keep the callable in `func`.
+    func = getattr(tool, "func", tool)
+    name = getattr(tool, "__name__", None) or getattr(tool, "name", None)
+    if not name or not callable(func):
+        # Toolsets and other non-function tools are dispatched by ADK itself.
+        return None
+
+    signature = inspect.signature(func)
+    required = set()
+    accepted = set()
+    accepts_any = False
+    for param in signature.parameters.values():
+        if param.kind is inspect.Parameter.VAR_KEYWORD:
+            accepts_any = True
+            continue
+        if param.kind is inspect.Parameter.VAR_POSITIONAL:
+            continue
+        if param.name in _INJECTED_PARAMS:
+            continue
+        accepted.add(param.name)
+        if param.default is inspect.Parameter.empty:
+            required.add(param.name)
+
+    options = tool_options.get(name, default_options)
+    semaphore = (
+        asyncio.Semaphore(options.max_concurrency) if options.max_concurrency else None
+    )
+    return ToolSpec(
+        name=name,
+        func=func,
+        is_async=inspect.iscoroutinefunction(func),
+        required=frozenset(required),
+        accepted=frozenset(accepted),
+        accepts_any=accepts_any,
+        options=options,
+        semaphore=semaphore,
+    )
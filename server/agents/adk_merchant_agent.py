@@ -12,19 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import hashlib
-from typing import override
+import threading
+from typing import TYPE_CHECKING, override
 
 from a2a.types import AgentCard, AgentCapabilities, AgentSkill
-from google.adk.agents import LlmAgent
-from google.adk.agents.callback_context import CallbackContext
-from google.genai import types
 from x402_a2a.types import PaymentRequirements
 
 # Import the custom exception and the base agent interface
 from .base_agent import BaseAgent
+from .catalog import Catalog, PaymentRequirementsFactory, load_default_catalog
+from .models import DEFAULT_MODEL
 from x402_a2a.types import x402PaymentRequiredException
 from x402_a2a import x402Utils, get_extension_declaration
 
+if TYPE_CHECKING:
+    # google.adk is imported when the agent is created, not when the card
+    # is served; see LazyAgent.
+    from google.adk.agents import LlmAgent
+    from google.adk.agents.callback_context import CallbackContext
+    from google.adk.models.base_llm import BaseLlm
+
 # This is the new, clean ADK Merchant Agent.
 # It now implements the BaseAgent interface.
 
@@ -36,10 +43,39 @@ class AdkMerchantAgent(BaseAgent):
     """
 
     def __init__(
-        self, wallet_address: str = "0xAb5801a7D398351b8bE11C439e05C5B3259aeC9B"
+        self,
+        wallet_address: str = "0xAb5801a7D398351b8bE11C439e05C5B3259aeC9B",
+        catalog: Catalog | None = None,
     ):
         self._wallet_address = wallet_address
         self.x402 = x402Utils()
+        self._requirements = PaymentRequirementsFactory(
+            PaymentRequirements(
+                scheme="exact",
+                network="base-sepolia",
+                asset="0x036CbD53842c5426634e7929541eC2318f3dCF7e",
+                pay_to=self._wallet_address,
+                max_amount_required="0",
+                resource="https://example.com/product/",
+                description="",
+                mime_type="application/json",
+                max_timeout_seconds=1200,
+                extra={"name": "USDC", "version": "2"},
+            )
+        )
+        # Loaded on first use, so serving the agent card doesn't wait for it.
+        self._catalog = catalog
+        self._catalog_loaded = catalog is not None
+        self._catalog_lock = threading.Lock()
+
+    def catalog(self) -> Catalog | None:
+        """The credit catalog, or None if there is no sources file."""
+        if not self._catalog_loaded:
+            with self._catalog_lock:
+                if not self._catalog_loaded:
+                    self._catalog = load_default_catalog()
+                    self._catalog_loaded = True
+        return self._catalog
 
     def _get_product_price(self, product_name: str) -> str:
         """Generates a deterministic price for a product."""
@@ -54,44 +90,49 @@ class AdkMerchantAgent(BaseAgent):
         """
         This is the agent's tool. Instead of returning payment details, it raises
         an exception to signal to the x402 wrapper that payment is needed.
+
+        Carbon credits are looked up in the catalog by source id or name;
+        any other product gets a deterministic price derived from its name.
         """
         if not product_name:
             return {"error": "Product name cannot be empty."}
 
-        price = self._get_product_price(product_name)
-        requirements = PaymentRequirements(
-            scheme="exact",
-            network="base-sepolia",
-            asset="0x036CbD53842c5426634e7929541eC2318f3dCF7e",
-            pay_to=self._wallet_address,
-            max_amount_required=price,
-            description=f"Payment for: {product_name}",
-            resource=f"https://example.com/product/{product_name}",
-            mime_type="application/json",
-            max_timeout_seconds=1200,
-            extra={
-                "name": "USDC",
-                "version": "2",
-                "product": {
-                    "sku": f"{product_name}_sku",
-                    "name": product_name,
-                    "version": "1",
-                },
-            },
-        )
+        catalog = self.catalog()
+        product = catalog.lookup(product_name) if catalog else None
+        if product is not None:
+            requirements = self._requirements.for_product(
+                sku=f"credit-{product.source_id}",
+                name=product.name,
+                price=product.price,
+                description=f"Carbon credit (1 t CO2e): {product.name}",
+                resource=f"https://example.com/credits/{product.source_id}",
+            )
+        else:
+            requirements = self._requirements.for_product(
+                sku=f"{product_name}_sku",
+                name=product_name,
+                price=self._get_product_price(product_name),
+                description=f"Payment for: {product_name}",
+                resource=f"https://example.com/product/{product_name}",
+            )
 
         # Signal to the x402ServerAgentExecutor that payment is required.
         # The wrapper will catch this and handle the A2A flow.
         raise x402PaymentRequiredException(product_name, requirements)
 
-    def before_agent_callback(self, callback_context: CallbackContext):
+    def before_agent_callback(self, callback_context: "CallbackContext"):
         """
         Injects a 'virtual' tool response if payment has been verified.
         """
         payment_data = callback_context.state.get("payment_verified_data")
         if payment_data:
+            # Imported here, on paid turns only: the callback runs every turn.
+            from google.genai import types
+
             # Consume the data so it's not used again in the same session.
-            del callback_context.state["payment_verified_data"]
+            # ADK state can't delete keys; clearing the value is recorded in
+            # the event's state delta like any other write.
+            callback_context.state["payment_verified_data"] = None
 
             # Create a Content object that looks like a tool call response.
             # This is a structured way to inform the LLM of the payment status.
@@ -105,14 +146,18 @@ class AdkMerchantAgent(BaseAgent):
             callback_context.new_user_message = types.Content(parts=[tool_response])
 
     @override
-    def create_agent(self) -> LlmAgent:
+    def create_agent(self, model: "str | BaseLlm" = DEFAULT_MODEL) -> "LlmAgent":
         """Creates the LlmAgent instance for the merchant."""
+        from google.adk.agents import LlmAgent
+
+        # Load the catalog now, while the agent is built, not on the first quote.
+        self.catalog()
         return LlmAgent(
-            model="gemini-2.5-flash",
+            model=model,
             name="adk_merchant_agent",
             description="An agent that can sell any item by providing a price and then processing the payment using the x402 protocol.",
             instruction="""You are a helpful and friendly "Amazon" merchant agent.
-- When a user asks to buy an item, use the `get_product_details_and_request_payment` tool.
+- When a user asks to buy an item, use the `get_product_details_and_request_payment` tool. Carbon credits are sold per emission source; pass the source's name or id as the product name.
 - If you receive a successful result from the `check_payment_status` tool, you MUST confirm the purchase with the user and tell them their order is being prepared. Do not ask for payment again.
 - If the system tells you the payment failed, relay the error clearly and politely.
 """,
@@ -120,6 +165,12 @@ class AdkMerchantAgent(BaseAgent):
             before_agent_callback=self.before_agent_callback,
         )
 
+    @override
+    def structured_intents(self) -> dict[str, str]:
+        # {"purchase_intent": {"product_name": "red stapler"}} requests payment
+        # for the product straight away.
+        return {"purchase_intent": "get_product_details_and_request_payment"}
+
     @override
     def create_agent_card(self, url: str) -> AgentCard:
         """Creates the AgentCard for this agent."""
@@ -133,18 +184,28 @@ class AdkMerchantAgent(BaseAgent):
                     "How much for a new laptop?",
                     "I want to buy a red stapler.",
                     "Can you give me the price for a copy of 'Moby Dick'?",
+                    "I want a carbon credit from the Tokyo Bay power station.",
                 ],
-            )
+            ),
+            AgentSkill(
+                id="structured_purchase",
+                name="Structured Purchase",
+                description="Send a DataPart "
+                '{"purchase_intent": {"product_name": "..."}} to get x402 payment '
+                "requirements directly, without a conversational turn.",
+                tags=["product", "x402", "merchant", "machine-to-machine"],
+                inputModes=["application/json"],
+            ),
         ]
         return AgentCard(
             name="x402 Merchant Agent",
             description="This agent sells items using the clean x402 server architecture.",
             url=url,
             version="4.0.0",
-            defaultInputModes=["text", "text/plain"],
+            defaultInputModes=["text", "text/plain", "application/json"],
             defaultOutputModes=["text", "text/plain"],
             capabilities=AgentCapabilities(
-                streaming=False,
+                streaming=True,
                 extensions=[
                     get_extension_declaration(
                         description="Supports payments using the x402 protocol.",
@@ -12,15 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
 from a2a.types import AgentCard
 
+if TYPE_CHECKING:
+    from google.adk.models.base_llm import BaseLlm
+
 
 class BaseAgent(ABC):
     @abstractmethod
-    def create_agent(self):
+    def create_agent(self, model: "str | BaseLlm"):
         raise NotImplementedError("Subclasses must implement this method")
 
     @abstractmethod
     def create_agent_card(self, url: str) -> AgentCard:
         raise NotImplementedError("Subclasses must implement this method")
+
+    def structured_intents(self) -> dict[str, str]:
+        """
+        DataPart keys a caller can use to invoke a tool directly, mapped to
+        the tool's name. Such requests are served without a model call.
+        """
+        return {}
@@ -0,0 +1,202 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import csv
+import functools
+import logging
+import os
+import time
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from x402_a2a.types import PaymentRequirements
+
+logger = logging.getLogger(__name__)
+
+# Written by setup/setup_csv.py; CATALOG_PATH overrides it.
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parents[2] / "data" / "sources.csv"
+
+# Price of a credit retiring one tonne of CO2e, in USDC base units (6
+# decimals), by Climate TRACE sector.
+SECTOR_PRICES = {
+    "agriculture": 9_000_000,
+    "buildings": 14_000_000,
+    "fluorinated-gases": 22_000_000,
+    "forestry-and-land-use": 8_000_000,
+    "fossil-fuel-operations": 18_000_000,
+    "manufacturing": 16_000_000,
+    "mineral-extraction": 15_000_000,
+    "power": 12_000_000,
+    "transportation": 13_000_000,
+    "waste": 10_000_000,
+}
+DEFAULT_PRICE = 12_000_000
+
+
+def normalize_name(name: str) -> str:
+    """Case-, width- and whitespace-insensitive form of a product name."""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogProduct:
+    """A carbon credit for one tonne of CO2e from one emission source."""
+
+    source_id: str
+    name: str
+    sector: str
+    price: int
+
+
+class Catalog:
+    """
+    The carbon credits the merchant sells, one per emission source.
+
+    Rows are stored column-wise, prices and sectors in typed arrays, so a
+    catalog of hundreds of thousands of sources stays compact; two dicts
+    map source ids and normalized names to rows for O(1) lookups.
+    """
+
+    def __init__(self):
+        self._ids: list[str] = []
+        self._names: list[str] = []
+        self._sector_codes = array("H")
+        self._prices = array("Q")
+        self._sectors: list[str] = []
+        self._sector_index: dict[str, int] = {}
+        self._by_id: dict[str, int] = {}
+        self._by_name: dict[str, int] = {}
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "Catalog":
+        """
+        Loads a sources CSV as written by setup/setup_csv.py.
+
+        The file has one row per source and year; the latest year's row
+        names each source. Rows without an id or name are skipped.
+        """
+        start = time.perf_counter()
+        catalog = cls()
+        years: dict[str, str] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            columns = [
+                header.index(c) if c in header else None
+                for c in ("id", "name", "sector", "year")
+            ]
+            if columns[0] is None or columns[1] is None:
+                raise ValueError(f"{path} has no id and name columns")
+            for row in reader:
+                source_id, name, sector, year = (
+                    row[i] if i is not None and i < len(row) else "" for i in columns
+                )
+                if not source_id or not name:
+                    continue
+                if years.get(source_id, year) > year:
+                    continue
+                years[source_id] = year
+                catalog.add(source_id, name, sector)
+        logger.info(
+            "Loaded %d catalog products from %s in %.2fs",
+            len(catalog),
+            path,
+            time.perf_counter() - start,
+        )
+        return catalog
+
+    def add(self, source_id: str, name: str, sector: str) -> None:
+        """Adds a product, or renames and reprices it if the id is known."""
+        sector_code = self._sector_index.setdefault(sector, len(self._sectors))
+        if sector_code == len(self._sectors):
+            self._sectors.append(sector)
+        price = SECTOR_PRICES.get(sector, DEFAULT_PRICE)
+
+        row = self._by_id.get(source_id)
+        if row is None:
+            row = len(self._ids)
+            self._by_id[source_id] = row
+            self._ids.append(source_id)
+            self._names.append(name)
+            self._sector_codes.append(sector_code)
+            self._prices.append(price)
+        else:
+            self._names[row] = name
+            self._sector_codes[row] = sector_code
+            self._prices[row] = price
+        # Several sources can share a name; the first one keeps it.
+        self._by_name.setdefault(normalize_name(name), row)
+
+    def lookup(self, query: str) -> CatalogProduct | None:
+        """Finds a product by source id or by name."""
+        row = self._by_id.get(query.strip())
+        if row is None:
+            row = self._by_name.get(normalize_name(query))
+        if row is None:
+            return None
+        return CatalogProduct(
+            source_id=self._ids[row],
+            name=self._names[row],
+            sector=self._sectors[self._sector_codes[row]],
+            price=self._prices[row],
+        )
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def load_default_catalog() -> Catalog | None:
+    """Loads the catalog at CATALOG_PATH or the default path, if it exists."""
+    path = Path(os.getenv("CATALOG_PATH") or DEFAULT_CATALOG_PATH)
+    if not path.exists():
+        logger.info("No catalog at %s; pricing products by name hash", path)
+        return None
+    return Catalog.load(path)
+
+
+class PaymentRequirementsFactory:
+    """
+    Builds `PaymentRequirements` for products from one template.
+
+    The merchant-wide fields (network, asset, payee, timeout) come from the
+    template; results are cached per product, so repeated quotes for a
+    product don't rebuild and revalidate the model.
+    """
+
+    def __init__(self, template: PaymentRequirements, cache_size: int = 4096):
+        self._template = template
+        self._cached = functools.lru_cache(maxsize=cache_size)(self._build)
+
+    def for_product(
+        self, sku: str, name: str, price: int | str, description: str, resource: str
+    ) -> PaymentRequirements:
+        # A deep copy, so callers can't alter the cached instance or its
+        # nested `extra`.
+        cached = self._cached(sku, name, str(price), description, resource)
+        return cached.model_copy(deep=True)
+
+    def _build(
+        self, sku: str, name: str, price: str, description: str, resource: str
+    ) -> PaymentRequirements:
+        extra = dict(self._template.extra or {})
+        extra["product"] = {"sku": sku, "name": name, "version": "1"}
+        return self._template.model_copy(
+            update={
+                "max_amount_required": price,
+                "description": description,
+                "resource": resource,
+                "extra": extra,
+            }
+        )
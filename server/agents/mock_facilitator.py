@@ -11,9 +11,21 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import logging
-from typing import override
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, override
 
+import click
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from x402_a2a import FacilitatorClient
 from x402_a2a.types import (
     ExactPaymentPayload,
     PaymentPayload,
@@ -21,44 +33,384 @@ from x402_a2a.types import (
     SettleResponse,
     VerifyResponse,
 )
-from x402_a2a import FacilitatorClient
+
+logger = logging.getLogger(__name__)
+
+# z-score of the 99th percentile of a standard normal distribution.
+_Z99 = 2.326
+
+
+@dataclass(frozen=True)
+class OperationProfile:
+    """
+    How one mock facilitator operation (verify or settle) behaves.
+
+    Latency is log-normal with the given median and 99th percentile in
+    seconds (fixed at `latency_p50` if `latency_p99` isn't above it).
+    A share `error_rate` of calls fail with an error, `timeout_rate` hang
+    for `hang_seconds` before failing, and `reject_rate` get a negative
+    answer (invalid payment or failed settlement). With `max_per_second`
+    set, calls beyond that rate queue up, like at a saturated facilitator.
+    """
+
+    latency_p50: float = 0.0
+    latency_p99: float = 0.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang_seconds: float = 120.0
+    reject_rate: float = 0.0
+    max_per_second: float | None = None
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.latency_p99 <= self.latency_p50 or self.latency_p50 <= 0:
+            return self.latency_p50
+        sigma = math.log(self.latency_p99 / self.latency_p50) / _Z99
+        return rng.lognormvariate(math.log(self.latency_p50), sigma)
+
+
+class MockFacilitatorError(RuntimeError):
+    """A simulated facilitator failure."""
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/`rate` seconds apart, in arrival order."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self._interval
+        if start > now:
+            await asyncio.sleep(start - now)
 
 
 class MockFacilitator(FacilitatorClient):
     """
     A mock facilitator that can be swapped in for testing.
     It bypasses any real network calls and allows for predictable responses.
+
+    `verify` and `settle` profiles simulate a slow or flaky facilitator;
+    `stats` reports what was simulated. Pass a `seed` for repeatable runs.
     """
 
-    def __init__(self, is_valid: bool = True, is_settled: bool = True):
+    def __init__(
+        self,
+        is_valid: bool = True,
+        is_settled: bool = True,
+        verify: OperationProfile | None = None,
+        settle: OperationProfile | None = None,
+        seed: int | None = None,
+    ):
         self._is_valid = is_valid
         self._is_settled = is_settled
+        self._profiles = {
+            "verify": verify or OperationProfile(),
+            "settle": settle or OperationProfile(),
+        }
+        self._limiters = {
+            operation: _RateLimiter(profile.max_per_second)
+            for operation, profile in self._profiles.items()
+            if profile.max_per_second
+        }
+        self._rng = random.Random(seed)
+        self._outcomes: dict[str, Counter] = {op: Counter() for op in self._profiles}
 
     @override
     async def verify(
         self, payload: PaymentPayload, requirements: PaymentRequirements
     ) -> VerifyResponse:
         """Mocks the verification step."""
-        logging.info("--- MOCK FACILITATOR: VERIFY ---")
-        logging.info(f"Received payload:\n{payload.model_dump_json(indent=2)}")
-
-        payer = None
         # The top-level object is PaymentPayload, the nested is ExactPaymentPayload
-        if isinstance(payload.payload, ExactPaymentPayload):
-            payer = payload.payload.authorization.from_
-        else:
+        if not isinstance(payload.payload, ExactPaymentPayload):
             raise TypeError(f"Unsupported payload type: {type(payload.payload)}")
+        payer = payload.payload.authorization.from_
 
-        if self._is_valid:
-            return VerifyResponse(is_valid=True, payer=payer)
-        return VerifyResponse(is_valid=False, invalid_reason="mock_invalid_payload")
+        start = time.perf_counter()
+        accepted = await self._simulate("verify", start, self._is_valid)
+        if accepted:
+            response = VerifyResponse(is_valid=True, payer=payer)
+        else:
+            response = VerifyResponse(
+                is_valid=False, invalid_reason="mock_invalid_payload", payer=payer
+            )
+        self._record("verify", "valid" if accepted else "invalid", start, payer)
+        return response
 
     @override
     async def settle(
         self, payload: PaymentPayload, requirements: PaymentRequirements
     ) -> SettleResponse:
         """Mocks the settlement step."""
-        logging.info("--- MOCK FACILITATOR: SETTLE ---")
-        if self._is_settled:
-            return SettleResponse(success=True, network="mock-network")
-        return SettleResponse(success=False, error_reason="mock_settlement_failed")
+        start = time.perf_counter()
+        settled = await self._simulate("settle", start, self._is_settled)
+        self._record("settle", "success" if settled else "failed", start)
+        return _settle_response(settled)
+
+    async def settle_batch(
+        self, items: list[tuple[PaymentPayload, PaymentRequirements]]
+    ) -> list[SettleResponse | Exception]:
+        """
+        Mocks settling several payments in one call.
+
+        Returns one result per item, in order; an item that can't be settled
+        gets an exception or an unsuccessful response without failing the
+        rest of the batch. The batch takes one latency sample and counts as
+        one call against the throughput cap.
+        """
+        profile = self._profiles["settle"]
+        start = time.perf_counter()
+        await self._delay("settle")
+        results: list[SettleResponse | Exception] = []
+        for payload, _ in items:
+            if not isinstance(payload.payload, ExactPaymentPayload):
+                outcome = "unsupported"
+                results.append(
+                    TypeError(f"Unsupported payload type: {type(payload.payload)}")
+                )
+            elif self._rng.random() < profile.error_rate:
+                outcome = "error"
+                results.append(MockFacilitatorError("mock_settlement_error"))
+            else:
+                settled = self._is_settled and self._rng.random() >= profile.reject_rate
+                outcome = "success" if settled else "failed"
+                results.append(_settle_response(settled))
+            self._outcomes["settle"][outcome] += 1
+        logger.info(
+            "op=settle_batch size=%d seconds=%.4f",
+            len(items),
+            time.perf_counter() - start,
+        )
+        return results
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            operation: {"outcomes": dict(self._outcomes[operation])}
+            for operation in self._profiles
+        }
+
+    async def _simulate(self, operation: str, start: float, accept: bool) -> bool:
+        """Applies the profile's delays and failures; returns whether to accept."""
+        profile = self._profiles[operation]
+        await self._delay(operation)
+        roll = self._rng.random()
+        if roll < profile.timeout_rate:
+            await asyncio.sleep(profile.hang_seconds)
+            self._record(operation, "timeout", start)
+            raise TimeoutError(f"mock {operation} timed out")
+        if roll < profile.timeout_rate + profile.error_rate:
+            self._record(operation, "error", start)
+            raise MockFacilitatorError(f"mock_{operation}_error")
+        return accept and self._rng.random() >= profile.reject_rate
+
+    async def _delay(self, operation: str) -> None:
+        limiter = self._limiters.get(operation)
+        if limiter:
+            await limiter.acquire()
+        latency = self._profiles[operation].sample_latency(self._rng)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+    def _record(
+        self, operation: str, outcome: str, start: float, payer: str | None = None
+    ) -> None:
+        seconds = time.perf_counter() - start
+        self._outcomes[operation][outcome] += 1
+        logger.info(
+            "op=%s outcome=%s seconds=%.4f payer=%s", operation, outcome, seconds, payer
+        )
+
+
+def _settle_response(settled: bool) -> SettleResponse:
+    if settled:
+        return SettleResponse(success=True, network="mock-network")
+    return SettleResponse(success=False, error_reason="mock_settlement_failed")
+
+
+def create_mock_facilitator_app(
+    facilitator: MockFacilitator | None = None,
+) -> Starlette:
+    """
+    Serves a `MockFacilitator` over the facilitator HTTP API.
+
+    Gives `PooledFacilitatorClient` (USE_MOCK_FACILITATOR=false with
+    FACILITATOR_URL pointing here) a local target for tests and benchmarks.
+    Simulated errors are answered with HTTP 503; `GET /stats` reports the
+    outcomes served so far.
+    """
+    facilitator = facilitator or MockFacilitator()
+
+    async def parse(request: Request) -> tuple[PaymentPayload, PaymentRequirements]:
+        body = await request.json()
+        return (
+            PaymentPayload.model_validate(body["paymentPayload"]),
+            PaymentRequirements.model_validate(body["paymentRequirements"]),
+        )
+
+    async def verify(request: Request) -> JSONResponse:
+        try:
+            response = await facilitator.verify(*await parse(request))
+        except (MockFacilitatorError, TimeoutError) as e:
+            return JSONResponse({"error": str(e)}, status_code=503)
+        return JSONResponse(response.model_dump(mode="json", by_alias=True))
+
+    async def settle(request: Request) -> JSONResponse:
+        try:
+            response = await facilitator.settle(*await parse(request))
+        except (MockFacilitatorError, TimeoutError) as e:
+            return JSONResponse({"error": str(e)}, status_code=503)
+        return JSONResponse(response.model_dump(mode="json", by_alias=True))
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse(facilitator.stats())
+
+    return Starlette(
+        routes=[
+            Route("/verify", verify, methods=["POST"]),
+            Route("/settle", settle, methods=["POST"]),
+            Route("/stats", stats),
+        ]
+    )
+
+
+def _latency_option(value: str | None) -> tuple[float, float]:
+    if not value:
+        return 0.0, 0.0
+    p50, _, p99 = value.partition(":")
+    return float(p50), float(p99 or p50)
+
+
+def _profile_options(operation: str):
+    """Adds the click options that make up one operation's profile."""
+
+    def decorate(command):
+        options = [
+            click.option(
+                f"--{operation}-latency",
+                default=None,
+                help=f"{operation.title()} latency in seconds: P50[:P99], "
+                "log-normally distributed.",
+            ),
+            click.option(
+                f"--{operation}-error-rate",
+                type=click.FloatRange(0, 1),
+                default=0.0,
+                help=f"Share of {operation} calls answered with HTTP 503.",
+            ),
+            click.option(
+                f"--{operation}-timeout-rate",
+                type=click.FloatRange(0, 1),
+                default=0.0,
+                help=f"Share of {operation} calls that hang for --hang-seconds.",
+            ),
+            click.option(
+                f"--{operation}-reject-rate",
+                type=click.FloatRange(0, 1),
+                default=0.0,
+                help=f"Share of {operation} calls with a negative answer.",
+            ),
+            click.option(
+                f"--{operation}-max-rps",
+                type=float,
+                default=None,
+                help=f"{operation.title()} calls served per second; the rest queue.",
+            ),
+        ]
+        for option in reversed(options):
+            command = option(command)
+        return command
+
+    return decorate
+
+
+def _profile(
+    latency: str | None,
+    error_rate: float,
+    timeout_rate: float,
+    reject_rate: float,
+    max_rps: float | None,
+    hang_seconds: float,
+) -> OperationProfile:
+    p50, p99 = _latency_option(latency)
+    return OperationProfile(
+        latency_p50=p50,
+        latency_p99=p99,
+        error_rate=error_rate,
+        timeout_rate=timeout_rate,
+        hang_seconds=hang_seconds,
+        reject_rate=reject_rate,
+        max_per_second=max_rps,
+    )
+
+
+@click.command()
+@click.option("--host", "host", default="localhost")
+@click.option("--port", "port", default=10500)
+@_profile_options("verify")
+@_profile_options("settle")
+@click.option(
+    "--hang-seconds",
+    type=float,
+    default=OperationProfile.hang_seconds,
+    help="How long a simulated timeout hangs before failing.",
+)
+@click.option("--seed", type=int, default=None, help="Seed for repeatable runs.")
+@click.option(
+    "--log-level",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"]),
+    default="INFO",
+    help="INFO logs one line per call.",
+)
+def main(
+    host: str,
+    port: int,
+    verify_latency: str | None,
+    verify_error_rate: float,
+    verify_timeout_rate: float,
+    verify_reject_rate: float,
+    verify_max_rps: float | None,
+    settle_latency: str | None,
+    settle_error_rate: float,
+    settle_timeout_rate: float,
+    settle_reject_rate: float,
+    settle_max_rps: float | None,
+    hang_seconds: float,
+    seed: int | None,
+    log_level: str,
+):
+    """Runs the mock facilitator as a standalone HTTP service."""
+    import uvicorn
+
+    logging.basicConfig(level=log_level)
+    facilitator = MockFacilitator(
+        verify=_profile(
+            verify_latency,
+            verify_error_rate,
+            verify_timeout_rate,
+            verify_reject_rate,
+            verify_max_rps,
+            hang_seconds,
+        ),
+        settle=_profile(
+            settle_latency,
+            settle_error_rate,
+            settle_timeout_rate,
+            settle_reject_rate,
+            settle_max_rps,
+            hang_seconds,
+        ),
+        seed=seed,
+    )
+    uvicorn.run(
+        create_mock_facilitator_app(facilitator),
+        host=host,
+        port=port,
+        log_level=log_level.lower(),
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from google.adk.models.base_llm import BaseLlm
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+def resolve_model(spec: str) -> "str | BaseLlm":
+    """
+    Turns a `--model` value into something `LlmAgent(model=...)` accepts.
+
+    - `scripted` or `scripted:<seconds>`: `ScriptedMerchantLlm`, optionally
+      sleeping for the given number of seconds per turn.
+    - `record:<dir>[@<model>]`: runs `<model>` (default `DEFAULT_MODEL`) and
+      records every turn to `<dir>`.
+    - `replay:<dir>[@<latency>]`: serves turns recorded in `<dir>`, where
+      `<latency>` is `none`, `recorded` or a number of seconds per turn.
+    - Anything else is passed through as a model name, e.g. `gemini-2.5-pro`.
+    """
+    name, _, arg = spec.partition(":")
+    if name == "scripted":
+        from .scripted_llm import ScriptedMerchantLlm
+
+        return ScriptedMerchantLlm(latency=float(arg or 0))
+    if name == "record":
+        from google.adk.models.registry import LLMRegistry
+
+        from .replay_llm import RecordReplayLlm
+
+        directory, _, inner_spec = arg.partition("@")
+        inner = resolve_model(inner_spec or DEFAULT_MODEL)
+        if isinstance(inner, str):
+            inner = LLMRegistry.new_llm(inner)
+        return RecordReplayLlm(mode="record", directory=Path(directory), inner=inner)
+    if name == "replay":
+        from .replay_llm import RecordReplayLlm
+
+        directory, _, latency = arg.partition("@")
+        return RecordReplayLlm(
+            mode="replay", directory=Path(directory), latency=latency or "none"
+        )
+    return spec
+
+
+def needs_google_credentials(spec: str) -> bool:
+    """Whether the model selected by `spec` is served by the Gemini API."""
+    name, _, arg = spec.partition(":")
+    if name == "record":
+        return needs_google_credentials(arg.partition("@")[2] or DEFAULT_MODEL)
+    return spec.startswith("gemini")
@@ -0,0 +1,256 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import importlib.util
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, override
+
+import httpx
+from x402_a2a import FacilitatorClient, FacilitatorConfig
+from x402_a2a.types import (
+    PaymentPayload,
+    PaymentRequirements,
+    SettleResponse,
+    VerifyResponse,
+)
+
+from server.metrics import (
+    FACILITATOR_CIRCUIT_OPEN,
+    FACILITATOR_IN_FLIGHT,
+    FACILITATOR_POOL_TIMEOUTS_TOTAL,
+)
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`).
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class FacilitatorTransportConfig:
+    """
+    Connection pool, deadlines and circuit breaker of `PooledFacilitatorClient`.
+
+    Up to `max_connections` requests run at once over one keep-alive pool;
+    a request waits at most `pool_timeout` seconds for a connection and
+    verify/settle calls are abandoned after their deadline. After
+    `breaker_failures` consecutive failures calls fail fast for
+    `breaker_reset` seconds, then a single trial call decides whether the
+    facilitator is back.
+    """
+
+    max_connections: int = 64
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 3.0
+    pool_timeout: float = 2.0
+    verify_deadline: float = 10.0
+    settle_deadline: float = 30.0
+    http2: bool = True
+    breaker_failures: int = 5
+    breaker_reset: float = 30.0
+
+
+class FacilitatorUnavailableError(Exception):
+    """Raised instead of calling a facilitator that is failing."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    A consecutive-failure circuit breaker.
+
+    Closed, it lets every call through. `failure_threshold` failures in a
+    row open it, failing calls immediately. After `reset_timeout` seconds it
+    half-opens and lets one trial call through: success closes it, failure
+    opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self._reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_call(self) -> None:
+        """Raises `FacilitatorUnavailableError` if the call must not be made."""
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial_running):
+            raise FacilitatorUnavailableError(
+                f"facilitator_unavailable: {self._failures} consecutive "
+                "failures, retry later"
+            )
+        if state == "half-open":
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Facilitator %s recovered; closing circuit", self.name)
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        FACILITATOR_CIRCUIT_OPEN.labels(self.name).set(0)
+
+    def record_abandoned(self) -> None:
+        """Records a call that ended without an outcome, e.g. cancelled."""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_running = False
+        if self._opened_at is not None or self._failures >= self._failure_threshold:
+            if self._opened_at is None:
+                logger.error(
+                    "Facilitator %s failed %d times in a row; opening circuit",
+                    self.name,
+                    self._failures,
+                )
+            self._opened_at = time.monotonic()
+            FACILITATOR_CIRCUIT_OPEN.labels(self.name).set(1)
+
+
+class PooledFacilitatorClient(FacilitatorClient):
+    """
+    A `FacilitatorClient` for production traffic.
+
+    The stock client opens a new connection for every call. This one keeps
+    a single keep-alive pool (HTTP/2 when `h2` is installed), bounds each
+    call by a deadline and puts a `CircuitBreaker` in front of the
+    facilitator. Transport errors, timeouts and 5xx responses count as
+    failures; while the circuit is open calls raise
+    `FacilitatorUnavailableError` without touching the network.
+    """
+
+    def __init__(
+        self,
+        config: FacilitatorConfig | None = None,
+        transport: FacilitatorTransportConfig | None = None,
+    ):
+        super().__init__(config)
+        transport = transport or FacilitatorTransportConfig()
+        self.transport = transport
+        self.breaker = CircuitBreaker(
+            self.config["url"], transport.breaker_failures, transport.breaker_reset
+        )
+        self._client: httpx.AsyncClient | None = None
+        if transport.http2 and not HTTP2_AVAILABLE:
+            logger.info("h2 is not installed; talking HTTP/1.1 to the facilitator")
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            transport = self.transport
+            self._client = httpx.AsyncClient(
+                base_url=self.config["url"],
+                http2=transport.http2 and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=transport.max_connections,
+                    max_keepalive_connections=transport.max_keepalive_connections,
+                    keepalive_expiry=transport.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    transport.settle_deadline,
+                    connect=transport.connect_timeout,
+                    pool=transport.pool_timeout,
+                ),
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @override
+    async def verify(
+        self, payment: PaymentPayload, payment_requirements: PaymentRequirements
+    ) -> VerifyResponse:
+        data = await self._post(
+            "verify", payment, payment_requirements, self.transport.verify_deadline
+        )
+        return VerifyResponse(**data)
+
+    @override
+    async def settle(
+        self, payment: PaymentPayload, payment_requirements: PaymentRequirements
+    ) -> SettleResponse:
+        data = await self._post(
+            "settle", payment, payment_requirements, self.transport.settle_deadline
+        )
+        return SettleResponse(**data)
+
+    async def _post(
+        self,
+        operation: str,
+        payment: PaymentPayload,
+        payment_requirements: PaymentRequirements,
+        deadline: float,
+    ) -> dict[str, Any]:
+        headers = {"Content-Type": "application/json"}
+        if self.config.get("create_headers"):
+            custom_headers = await self.config["create_headers"]()
+            headers.update(custom_headers.get(operation, {}))
+        body = {
+            "x402Version": payment.x402_version,
+            "paymentPayload": payment.model_dump(by_alias=True),
+            "paymentRequirements": payment_requirements.model_dump(
+                by_alias=True, exclude_none=True
+            ),
+        }
+
+        self.breaker.before_call()
+        in_flight = FACILITATOR_IN_FLIGHT.labels(operation)
+        in_flight.inc()
+        try:
+            async with asyncio.timeout(deadline):
+                response = await self._http().post(
+                    f"/{operation}", json=body, headers=headers
+                )
+        except httpx.PoolTimeout:
+            # Every connection is busy: the facilitator isn't keeping up, so
+            # this counts as a failure and sheds load if it persists.
+            FACILITATOR_POOL_TIMEOUTS_TOTAL.labels(operation).inc()
+            self.breaker.record_failure()
+            raise
+        except (httpx.TransportError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.record_abandoned()
+            raise
+        finally:
+            in_flight.dec()
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            response.raise_for_status()
+        # Like the stock client, any other response carries the facilitator's
+        # answer about this payment, not a sign of an outage.
+        self.breaker.record_success()
+        return response.json()
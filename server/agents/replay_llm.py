@@ -0,0 +1,222 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import AsyncGenerator
+from pathlib import Path
+from typing import Any, Literal, override
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+RECORDINGS_FILE = "recordings.jsonl"
+
+
+class ReplayMissError(KeyError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+class RecordReplayLlm(BaseLlm):
+    """
+    Records model turns to disk, or serves them back without a model.
+
+    In `record` mode every request is forwarded to `inner` and the request,
+    the responses it produced and their timing are appended to
+    `<directory>/recordings.jsonl`. In `replay` mode requests are looked up
+    by `request_key`, which ignores per-run noise such as function call ids,
+    and the recorded responses are yielded instead.
+
+    `latency` controls how long replayed turns take:
+
+    - `none`: responses are yielded immediately.
+    - `recorded`: the recorded gaps between chunks are reproduced, scaled by
+      `latency_scale`.
+    - a number of seconds, slept once per turn.
+
+    A request recorded several times is replayed in recording order,
+    cycling once the recordings run out.
+    """
+
+    model: str = "replay"
+    mode: Literal["record", "replay"]
+    directory: Path
+    inner: BaseLlm | None = None
+    latency: str = "none"
+    latency_scale: float = 1.0
+
+    _index: dict[str, list[dict[str, Any]]] = PrivateAttr(default_factory=dict)
+    _cursor: dict[str, int] = PrivateAttr(default_factory=dict)
+    _write_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, context: Any) -> None:
+        if self.mode == "record":
+            if self.inner is None:
+                raise ValueError("Record mode needs an inner model.")
+            self.directory.mkdir(parents=True, exist_ok=True)
+            return
+        path = self.directory / RECORDINGS_FILE
+        with path.open() as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._index.setdefault(entry["key"], []).append(entry)
+        logger.info(
+            f"Loaded {sum(map(len, self._index.values()))} recorded turn(s) "
+            f"for {len(self._index)} distinct request(s) from {path}"
+        )
+
+    @override
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse]:
+        if self.mode == "record":
+            generator = self._record(llm_request, stream)
+        else:
+            generator = self._replay(llm_request, stream)
+        async for response in generator:
+            yield response
+
+    async def _record(
+        self, llm_request: LlmRequest, stream: bool
+    ) -> AsyncGenerator[LlmResponse]:
+        normalized = normalize_request(llm_request)
+        recorded = []
+        start = time.perf_counter()
+        async for response in self.inner.generate_content_async(llm_request, stream):
+            recorded.append(
+                {
+                    "offset": time.perf_counter() - start,
+                    "response": response.model_dump(mode="json", exclude_none=True),
+                }
+            )
+            yield response
+
+        entry = {
+            "key": _hash(normalized),
+            "model": self.inner.model,
+            "stream": stream,
+            "request": normalized,
+            "responses": recorded,
+        }
+        line = json.dumps(entry, sort_keys=True, default=_json_default) + "\n"
+        with self._write_lock, (self.directory / RECORDINGS_FILE).open("a") as f:
+            f.write(line)
+
+    async def _replay(
+        self, llm_request: LlmRequest, stream: bool
+    ) -> AsyncGenerator[LlmResponse]:
+        key = request_key(llm_request)
+        entries = self._index.get(key)
+        if not entries:
+            raise ReplayMissError(
+                f"No recording for request {key[:12]} in {self.directory}; "
+                "re-record with the current prompts and tools."
+            )
+        position = self._cursor.get(key, 0)
+        self._cursor[key] = position + 1
+        entry = entries[position % len(entries)]
+
+        if self.latency not in ("none", "recorded"):
+            await asyncio.sleep(float(self.latency))
+        previous = 0.0
+        for item in entry["responses"]:
+            response = LlmResponse.model_validate(item["response"])
+            if response.partial and not stream:
+                # The aggregated response that follows carries the full turn.
+                continue
+            if self.latency == "recorded":
+                await asyncio.sleep((item["offset"] - previous) * self.latency_scale)
+                previous = item["offset"]
+            yield response
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """Stable hash of the parts of a request that determine the model output."""
+    return _hash(normalize_request(llm_request))
+
+
+def normalize_request(llm_request: LlmRequest) -> dict[str, Any]:
+    """
+    A JSON-serializable view of the request without per-run noise: function
+    call ids, thought signatures and the model name are dropped, and tools
+    are reduced to their sorted names.
+    """
+    config = llm_request.config
+    system = config.system_instruction if config else None
+    if isinstance(system, types.Content):
+        system = [_normalize_part(p) for p in system.parts or []]
+    elif system is not None and not isinstance(system, str):
+        system = str(system)
+
+    tool_names = sorted(
+        declaration.name
+        for tool in (config.tools if config and config.tools else [])
+        for declaration in (getattr(tool, "function_declarations", None) or [])
+    )
+    return {
+        "system_instruction": system,
+        "tools": tool_names,
+        "contents": [
+            {
+                "role": content.role,
+                "parts": [_normalize_part(p) for p in content.parts or []],
+            }
+            for content in llm_request.contents
+        ],
+    }
+
+
+def _normalize_part(part: types.Part) -> dict[str, Any]:
+    if part.thought:
+        return {"thought": True}
+    if part.function_call:
+        return {
+            "function_call": part.function_call.name,
+            "args": part.function_call.args or {},
+        }
+    if part.function_response:
+        return {
+            "function_response": part.function_response.name,
+            "response": part.function_response.response or {},
+        }
+    if part.inline_data:
+        data = part.inline_data.data or b""
+        return {
+            "inline_data": part.inline_data.mime_type,
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+    if part.text is not None:
+        return {"text": part.text}
+    return {"other": part.model_dump(mode="json", exclude_none=True)}
+
+
+def _hash(normalized: dict[str, Any]) -> str:
+    encoded = json.dumps(normalized, sort_keys=True, default=_json_default)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    return str(value)
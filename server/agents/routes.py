@@ -11,23 +11,38 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
+import json
 import os
 from typing import Dict, List
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCard
-from google.adk.agents import LlmAgent
-from google.adk.artifacts import InMemoryArtifactService
-from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
-from google.adk.sessions import InMemorySessionService
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
 from starlette.routing import BaseRoute, Route
 
+from server.startup import STARTUP
+from server.storage import StorageConfig, StorageFactory
+
 # --- Local Imports ---
+# The executors, the Runner and the storage services pull in google.adk,
+# which takes seconds to import. They are imported by `_build_agent` when an
+# agent is first used, so agent cards are served as soon as the port is bound.
+
+# Per-agent concurrency limits in front of the executors
+from ._admission import (
+    AdmissionConfig,
+    AdmissionControlledExecutor,
+    AdmissionController,
+)
+
+# Background settlement of verified payments
+from ._settlement_worker import SettlementConfig
 
-# The base ADK executor that runs the agent
-from ._adk_agent_executor import ADKAgentExecutor
+# Deferred construction of each agent's runner, executors and task store
+from ._lazy_agent import BuiltAgent, LazyAgent, LazyAgentExecutor, LazyTaskStore
 
 # The abstract agent factory class
 from .base_agent import BaseAgent
@@ -35,8 +50,8 @@ from .base_agent import BaseAgent
 # The concrete agent factories
 from .adk_merchant_agent import AdkMerchantAgent
 
-# The concrete x402 executor wrappers
-from .x402_merchant_executor import x402MerchantExecutor
+# Model backends selectable with --model
+from .models import DEFAULT_MODEL, needs_google_credentials, resolve_model
 
 
 # A dictionary mapping the URL path to the agent factory
@@ -45,72 +60,181 @@ AGENTS: Dict[str, BaseAgent] = {
 }
 
 
-def create_agent_routes(base_url: str, base_path: str) -> List[BaseRoute]:
+def create_agent_routes(
+    base_url: str,
+    base_path: str,
+    storage: StorageConfig | None = None,
+    admission: AdmissionConfig | None = None,
+    model: str = DEFAULT_MODEL,
+    settlement: SettlementConfig | None = None,
+) -> tuple[List[BaseRoute], List[LazyAgent]]:
     """
     Creates and configures the routes for all registered agents.
+
+    `model` selects the agents' model backend; see `resolve_model`.
+    `settlement` selects whether payments are settled inline or by a
+    background worker; see `SettlementConfig`. Agents
+    are built on first use; the returned `LazyAgent`s can be warmed up
+    earlier.
     """
-    if os.getenv("GOOGLE_GENAI_USE_VERTEXAI") != "TRUE" and not os.getenv(
-        "GOOGLE_API_KEY"
+    if (
+        needs_google_credentials(model)
+        and os.getenv("GOOGLE_GENAI_USE_VERTEXAI") != "TRUE"
+        and not os.getenv("GOOGLE_API_KEY")
     ):
         raise ValueError("GOOGLE_API_KEY environment variable not set.")
 
+    admission = admission or AdmissionConfig()
+    settlement = settlement or SettlementConfig()
     routes: List[BaseRoute] = []
+    lazy_agents: List[LazyAgent] = []
+    storage_factory = StorageFactory(storage)
+
+    def on_built() -> None:
+        if all(agent.built for agent in lazy_agents):
+            STARTUP.finish()
 
     for path, agent_factory in AGENTS.items():
         full_path = f"{base_path}/{path}"
         url = f"{base_url}{full_path}"
-        routes.extend(
-            _create_routes(
-                path,  # Pass the agent's path for wrapper selection
-                full_path,
-                agent_factory.create_agent_card(url),
-                agent_factory.create_agent(),
-                InMemoryArtifactService(),
-                InMemorySessionService(),
-                InMemoryMemoryService(),
-            ),
+        with STARTUP.step(f"{path}: card"):
+            agent_card = agent_factory.create_agent_card(url)
+
+        def build(
+            path=path, agent_factory=agent_factory, agent_card=agent_card
+        ) -> BuiltAgent:
+            return _build_agent(
+                path, agent_card, agent_factory, storage_factory, model, settlement
+            )
+
+        lazy_agent = LazyAgent(path, build, on_built)
+        lazy_agents.append(lazy_agent)
+        routes.extend(_create_routes(full_path, agent_card, lazy_agent, admission))
+
+    return routes, lazy_agents
+
+
+def _build_agent(
+    agent_path: str,
+    agent_card: AgentCard,
+    agent_factory: BaseAgent,
+    storage_factory: StorageFactory,
+    model: str,
+    settlement: SettlementConfig,
+) -> BuiltAgent:
+    """
+    Creates the services, Runner and executor chain for a single agent,
+    applying the correct x402 wrapper.
+    """
+    with STARTUP.step(f"{agent_path}: storage"):
+        services = storage_factory.create_services()
+
+    with STARTUP.step(f"{agent_path}: agent"):
+        agent = agent_factory.create_agent(resolve_model(model))
+
+    with STARTUP.step(f"{agent_path}: runner"):
+        from google.adk.runners import Runner
+
+        runner = Runner(
+            app_name=agent_card.name,
+            agent=agent,
+            artifact_service=services.artifact_service,
+            session_service=services.session_service,
+            memory_service=services.memory_service,
         )
 
-    return routes
+    with STARTUP.step(f"{agent_path}: executors"):
+        # The base executor that runs the ADK agent
+        from ._adk_agent_executor import ADKAgentExecutor
+
+        # The concrete x402 executor wrappers
+        from .x402_merchant_executor import x402MerchantExecutor
+
+        # 1. Create the base executor that runs the ADK agent.
+        agent_executor = ADKAgentExecutor(
+            runner,
+            agent_card,
+            streaming=agent_card.capabilities.streaming,
+            structured_intents=agent_factory.structured_intents(),
+        )
+
+        # 2. Apply the concrete x402 merchant wrapper.
+        agent_executor = x402MerchantExecutor(
+            agent_executor,
+            payment_store=services.payment_store,
+            payment_phases=services.payment_phases,
+            payment_claims=services.payment_claims,
+            settlement=settlement,
+            settlement_store=services.settlement_store,
+            task_store=services.task_store,
+            name=agent_card.name,
+        )
+
+    worker = agent_executor.settlement_worker
+    return BuiltAgent(
+        executor=agent_executor,
+        task_store=services.task_store,
+        # Resumes settlements queued before a restart.
+        start_background=worker.start if worker else None,
+        stop_background=agent_executor.aclose,
+    )
 
 
 def _create_routes(
-    agent_path: str,
     full_path: str,
     agent_card: AgentCard,
-    agent: LlmAgent,
-    artifact_service: InMemoryArtifactService,
-    session_service: InMemorySessionService,
-    memory_service: InMemoryMemoryService,
+    lazy_agent: LazyAgent,
+    admission: AdmissionConfig,
 ) -> List[Route]:
     """
-    Creates the routes for a single agent, applying the correct x402 wrapper.
+    Creates the routes for a single agent in front of its lazily built
+    executor chain.
     """
-    from google.adk.runners import Runner
-
-    runner = Runner(
-        app_name=agent_card.name,
-        agent=agent,
-        artifact_service=artifact_service,
-        session_service=session_service,
-        memory_service=memory_service,
-    )
+    agent_executor = LazyAgentExecutor(lazy_agent)
 
-    # 1. Create the base executor that runs the ADK agent.
-    agent_executor = ADKAgentExecutor(runner, agent_card)
+    # 3. Bound how many requests run at once; excess load is queued or shed.
+    routes: List[Route] = []
+    if admission.max_concurrency > 0:
+        controller = AdmissionController(admission, agent_card.name)
+        agent_executor = AdmissionControlledExecutor(agent_executor, controller)
 
-    # 2. Apply the concrete x402 merchant wrapper.
-    agent_executor = x402MerchantExecutor(agent_executor)
+        async def admission_stats(request: Request) -> JSONResponse:
+            return JSONResponse(controller.stats())
 
-    # 3. Create the request handler with the final, fully wrapped executor.
+        routes.append(Route(full_path + "/stats/admission", admission_stats))
+
+    # 4. Create the request handler with the final, fully wrapped executor.
     request_handler = DefaultRequestHandler(
-        agent_executor=agent_executor, task_store=InMemoryTaskStore()
+        agent_executor=agent_executor, task_store=LazyTaskStore(lazy_agent)
     )
 
-    # 4. Create the A2A application and its routes.
+    # 5. Create the A2A application and its routes.
     a2a_app = A2AStarletteApplication(
         agent_card=agent_card, http_handler=request_handler
     )
     agent_json_address = full_path + "/.well-known/agent-card.json"
     print(f"{agent_json_address}")
-    return a2a_app.routes(agent_card_url=agent_json_address, rpc_url=full_path)
+    # Matched before the A2A app's own card route, which sends no ETag.
+    routes.append(_agent_card_route(agent_json_address, agent_card))
+    routes.extend(a2a_app.routes(agent_card_url=agent_json_address, rpc_url=full_path))
+    return routes
+
+
+def _agent_card_route(path: str, agent_card: AgentCard) -> Route:
+    """
+    Serves an agent card with an ETag, so clients caching it can revalidate
+    with `If-None-Match` and get a 304 while it hasn't changed.
+    """
+    body = json.dumps(
+        agent_card.model_dump(mode="json", exclude_none=True, by_alias=True)
+    ).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    async def agent_card_endpoint(request: Request) -> Response:
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    return Route(path, agent_card_endpoint, methods=["GET"])
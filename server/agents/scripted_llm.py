@@ -0,0 +1,103 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import re
+from collections.abc import AsyncGenerator
+from typing import override
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+PURCHASE_TOOL = "get_product_details_and_request_payment"
+PAYMENT_STATUS_TOOL = "check_payment_status"
+
+# "I want to buy a red stapler." -> "red stapler"
+_PRODUCT_PATTERN = re.compile(
+    r"\b(?:buy|purchase|order)\s+(?:an?\s+|the\s+|some\s+)?(.+?)[\s.!?]*$",
+    re.IGNORECASE,
+)
+
+
+class ScriptedMerchantLlm(BaseLlm):
+    """
+    A deterministic stand-in for the merchant's model.
+
+    It plays the merchant script without a network call: a user message is
+    answered with a call to the purchase tool, and a payment status (or any
+    other tool result) with a short confirmation. `latency` seconds are
+    slept per turn to approximate a real model. For benchmarks and local
+    runs only.
+    """
+
+    model: str = "scripted"
+    latency: float = 0.0
+
+    @override
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse]:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        last = llm_request.contents[-1] if llm_request.contents else None
+        parts = (last.parts if last else None) or []
+        responses = [p.function_response for p in parts if p.function_response]
+        text = " ".join(p.text for p in parts if p.text).strip()
+
+        if responses:
+            reply = _reply_to_tool(responses[-1])
+        elif text.startswith("Payment verified"):
+            reply = (
+                "Thank you! Your payment is confirmed and your order is being prepared."
+            )
+        else:
+            call = types.FunctionCall(
+                name=PURCHASE_TOOL, args={"product_name": _product_name(text)}
+            )
+            yield LlmResponse(
+                content=types.ModelContent(parts=[types.Part(function_call=call)]),
+                turn_complete=True,
+            )
+            return
+
+        if stream:
+            for word in reply.split(" "):
+                yield LlmResponse(
+                    content=types.ModelContent(parts=[types.Part(text=word + " ")]),
+                    partial=True,
+                )
+        yield LlmResponse(
+            content=types.ModelContent(parts=[types.Part(text=reply)]),
+            turn_complete=True,
+        )
+
+
+def _product_name(text: str) -> str:
+    match = _PRODUCT_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+def _reply_to_tool(response: types.FunctionResponse) -> str:
+    result = response.response or {}
+    if "error" in result:
+        return f"Sorry, that didn't work: {result['error']}"
+    if response.name == PAYMENT_STATUS_TOOL:
+        product = result.get("product", "your item")
+        return (
+            f"Thank you! Payment for {product} is confirmed "
+            "and your order is being prepared."
+        )
+    return f"Done: {result.get('result', result)}"
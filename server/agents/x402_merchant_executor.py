@@ -11,22 +11,53 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
+import contextvars
+import logging
 import os
-from typing import override
+import time
+from typing import Any, override
 
 from a2a.server.agent_execution import AgentExecutor
+from a2a.server.agent_execution.context import RequestContext
+from a2a.server.events.event_queue import EventQueue
+from a2a.server.tasks import TaskStore
+from a2a.types import TaskNotCancelableError
+from a2a.utils.errors import ServerError
 
 # Import the executors and wrappers
 
+from server.metrics import FACILITATOR_SECONDS, PAYMENT_DUPLICATES_TOTAL
+from server.storage.payment_claims import PaymentClaimStore
+from server.storage.payment_phases import (
+    CANCELED,
+    SETTLING,
+    InMemoryPaymentPhaseStore,
+    PaymentPhaseStore,
+)
+from server.storage.payment_requirements import PaymentRequirementsStore
+from server.storage.settlements import SettlementStore
 from x402_a2a.executors import x402ServerExecutor
+from ._payment_index import PaymentIndex, PaymentKey, payment_key
+from ._settlement_batcher import SettlementBatcher
+from ._settlement_worker import SettlementConfig, SettlementWorker
 from .mock_facilitator import MockFacilitator
+from .pooled_facilitator import FacilitatorUnavailableError, PooledFacilitatorClient
 from x402_a2a.types import (
     PaymentPayload,
     PaymentRequirements,
     SettleResponse,
     VerifyResponse,
 )
-from x402_a2a import FacilitatorClient, x402ExtensionConfig, FacilitatorConfig
+from x402_a2a import x402ExtensionConfig, FacilitatorConfig
+
+logger = logging.getLogger(__name__)
+
+# The task being executed by the current request. verify/settle only receive
+# the payment objects, so this is how they find the task they belong to.
+_current_task_id: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "x402_current_task_id", default=None
+)
 
 
 # ==============================================================================
@@ -37,42 +68,351 @@ class x402MerchantExecutor(x402ServerExecutor):
     """
     A concrete implementation of the x402ServerExecutor that uses a
     facilitator to verify and settle payments for the merchant.
+
+    With an "async" `SettlementConfig`, verified payments are queued in
+    `settlement_store` and settled by a background `SettlementWorker`, which
+    records the outcome in `task_store`; the request completes without
+    waiting for the facilitator.
+
+    `payment_phases` decides between a cancel and a settlement of the same
+    task; it must be shared by all worker processes serving the agent.
+    Retries are deduped per process; `payment_claims`, when set, refuses an
+    authorization replayed for another task on any worker process.
     """
 
     def __init__(
-        self, delegate: AgentExecutor, facilitator_config: FacilitatorConfig = None
+        self,
+        delegate: AgentExecutor,
+        facilitator_config: FacilitatorConfig = None,
+        payment_store: PaymentRequirementsStore | None = None,
+        payment_phases: PaymentPhaseStore | None = None,
+        payment_claims: PaymentClaimStore | None = None,
+        settlement: SettlementConfig | None = None,
+        settlement_store: SettlementStore | None = None,
+        task_store: TaskStore | None = None,
+        name: str = "merchant",
     ):
         super().__init__(delegate, x402ExtensionConfig())
+        self._payment_store = payment_store
+        if payment_store is not None:
+            # Share the offered requirements with other worker processes.
+            # The attribute is private to x402_a2a's x402ServerExecutor,
+            # which uses it as a plain dict as of x402-a2a 1.0.0 (the
+            # version in uv.lock); recheck this when upgrading it.
+            if not hasattr(self, "_payment_requirements_store"):
+                raise RuntimeError(
+                    "This x402_a2a version has no _payment_requirements_store "
+                    "to replace; payment requirements can't be shared."
+                )
+            self._payment_requirements_store = payment_store
 
         use_mock = os.getenv("USE_MOCK_FACILITATOR", "true").lower() == "true"
         if use_mock:
-            print("--- Using Mock Facilitator ---")
+            logger.info("Using mock facilitator")
             self._facilitator = MockFacilitator()
         else:
-            print("--- Using REAL Facilitator ---")
-            self._facilitator = FacilitatorClient(facilitator_config)
+            if facilitator_config is None and os.getenv("FACILITATOR_URL"):
+                facilitator_config = FacilitatorConfig(
+                    url=os.environ["FACILITATOR_URL"]
+                )
+            self._facilitator = PooledFacilitatorClient(facilitator_config)
+            logger.info("Using real facilitator at %s", self._facilitator.config["url"])
+
+        settlement = settlement or SettlementConfig()
+        self._payment_phases = payment_phases or InMemoryPaymentPhaseStore()
+        # The execution of each task in flight in this process, and the
+        # tasks among them whose payment is being settled.
+        self._executions: dict[str, asyncio.Task] = {}
+        self._settling: set[str] = set()
+
+        # Authorizations already verified or settled, to dedupe retries.
+        self._payment_index = PaymentIndex()
+        self._payment_claims = payment_claims
+
+        # Settlements go through the batcher when batching is enabled.
+        self._settler = self._facilitator
+        if settlement.batch_window > 0:
+            self._settler = SettlementBatcher(
+                self._facilitator, settlement.batch_window, settlement.batch_max
+            )
+
+        self.settlement_worker: SettlementWorker | None = None
+        if settlement.mode == "async":
+            if settlement_store is None or task_store is None:
+                raise ValueError(
+                    "Async settlement needs a settlement store and a task store."
+                )
+            self.settlement_worker = SettlementWorker(
+                name, settlement_store, self._settler, task_store, settlement
+            )
+
+    @override
+    async def execute(self, context: RequestContext, event_queue: EventQueue):
+        if self._payment_store is not None:
+            await self._payment_store.load(context.task_id)
+            event_queue = _AfterStoredRequirements(event_queue, self._payment_store)
+        token = _current_task_id.set(context.task_id)
+        # Verification, the agent's run and settlement run as one task, so
+        # `cancel` stops whichever of them is under way.
+        execution = asyncio.ensure_future(super().execute(context, event_queue))
+        self._executions[context.task_id] = execution
+        try:
+            await execution
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                # `execute` itself is being torn down, not a user cancel.
+                raise
+            # `cancel` publishes the canceled state.
+            logger.info("Task %s canceled before settlement", context.task_id)
+        finally:
+            self._executions.pop(context.task_id, None)
+            _current_task_id.reset(token)
+            if context.task_id in self._settling:
+                self._settling.discard(context.task_id)
+                await self._payment_phases.clear(context.task_id)
+
+    @override
+    async def cancel(self, context: RequestContext, event_queue: EventQueue):
+        """
+        Cancels the task unless its payment is already being settled.
+
+        Until settlement starts no funds have moved, so the task's execution
+        is stopped wherever it is: verifying, or running the agent. If it
+        runs in another worker process, that process finds the task canceled
+        before it settles. Once settlement has started it cannot be rolled
+        back, so the cancel is refused and the settlement runs to completion.
+        """
+        if not await self._payment_phases.transition(
+            context.task_id, CANCELED, unless=SETTLING
+        ):
+            raise ServerError(
+                error=TaskNotCancelableError(
+                    message="Payment settlement is in progress."
+                )
+            )
+        execution = self._executions.get(context.task_id)
+        if execution is not None:
+            execution.cancel()
+            # Let it unwind so nothing is published after the cancel.
+            await asyncio.wait({execution})
+        await self._delegate.cancel(context, event_queue)
+
+    async def aclose(self) -> None:
+        """Stops the settlement worker and closes the facilitator client."""
+        if self.settlement_worker is not None:
+            await self.settlement_worker.stop()
+        if isinstance(self._facilitator, PooledFacilitatorClient):
+            await self._facilitator.aclose()
 
     @override
     async def verify_payment(
         self, payload: PaymentPayload, requirements: PaymentRequirements
     ) -> VerifyResponse:
-        """Verifies the payment with the facilitator."""
-        response = await self._facilitator.verify(payload, requirements)
+        """
+        Verifies the payment with the facilitator.
+
+        A retry of a payment already submitted for the same task gets the
+        first verification's outcome; an authorization already used for a
+        different task is rejected. Neither reaches the facilitator.
+        """
+        task_id = _current_task_id.get()
+        key = payment_key(payload, requirements)
+        record = self._payment_index.get(key) if key else None
+        if record is not None and record.task_id != task_id:
+            PAYMENT_DUPLICATES_TOTAL.labels("replay").inc()
+            logger.warning(
+                "Rejected payment authorization of %s reused by task %s",
+                key[0],
+                task_id,
+            )
+            return VerifyResponse(
+                is_valid=False, invalid_reason="payment_already_used", payer=key[0]
+            )
+        if record is not None and record.verify is not None:
+            PAYMENT_DUPLICATES_TOTAL.labels("retry").inc()
+            return await self._unless_canceled(await asyncio.shield(record.verify))
+
+        verification = asyncio.ensure_future(
+            self._verify_claimed(key, task_id, payload, requirements)
+        )
+        if key:
+            record = self._payment_index.add(key, task_id)
+            record.verify = verification
+            # Failed calls aren't outcomes; let a retry go to the facilitator.
+            verification.add_done_callback(
+                lambda f: self._payment_index.discard(key) if _failed(f) else None
+            )
+        try:
+            # Shielded like a retry's wait, so a cancelled first request
+            # doesn't cancel the verification its retries are sharing.
+            return await self._unless_canceled(await asyncio.shield(verification))
+        except asyncio.CancelledError:
+            # Retrieves the outcome if nobody else is waiting for it.
+            verification.add_done_callback(_failed)
+            raise
+        except FacilitatorUnavailableError as e:
+            # Not the payment's fault: the client may resubmit it later.
+            return VerifyResponse(is_valid=False, invalid_reason=e.reason)
+
+    @override
+    async def settle_payment(
+        self, payload: PaymentPayload, requirements: PaymentRequirements
+    ) -> SettleResponse:
+        """Settles the payment with the facilitator, at most once per task."""
+        key = payment_key(payload, requirements)
+        record = self._payment_index.get(key) if key else None
+        if record is not None and record.settle is not None:
+            PAYMENT_DUPLICATES_TOTAL.labels("retry").inc()
+            return await asyncio.shield(record.settle)
+
+        task_id = _current_task_id.get()
+        if task_id and not await self._payment_phases.transition(
+            task_id, SETTLING, unless=CANCELED
+        ):
+            # Canceled, possibly by another worker, after verification.
+            raise asyncio.CancelledError
+        if task_id:
+            self._settling.add(task_id)
+
+        # Shield the settlement so a cancelled request can't abandon it
+        # half-way; the outcome is still logged if nobody is waiting for it.
+        settlement = asyncio.ensure_future(self._settle(payload, requirements))
+        if record is not None:
+            record.settle = settlement
+
+            def forget_failed(settlement: asyncio.Future) -> None:
+                if _failed(settlement) and record.settle is settlement:
+                    record.settle = None
+
+            settlement.add_done_callback(forget_failed)
+        try:
+            return await asyncio.shield(settlement)
+        except asyncio.CancelledError:
+            settlement.add_done_callback(_log_detached_settlement)
+            raise
+        except FacilitatorUnavailableError as e:
+            return SettleResponse(
+                success=False, error_reason=e.reason, network=requirements.network
+            )
+
+    async def _verify_claimed(
+        self,
+        key: PaymentKey | None,
+        task_id: str | None,
+        payload: PaymentPayload,
+        requirements: PaymentRequirements,
+    ) -> VerifyResponse:
+        """Verifies the payment unless another worker's task claimed it."""
+        if key and task_id and self._payment_claims is not None:
+            holder = await self._payment_claims.claim("|".join(key), task_id)
+            if holder != task_id:
+                PAYMENT_DUPLICATES_TOTAL.labels("replay").inc()
+                logger.warning(
+                    "Rejected payment authorization of %s claimed by task %s, "
+                    "reused by task %s",
+                    key[0],
+                    holder,
+                    task_id,
+                )
+                # The index must not remember this task as the payer, or a
+                # retry of the holding task landing here would be refused.
+                self._payment_index.discard(key)
+                return VerifyResponse(
+                    is_valid=False, invalid_reason="payment_already_used", payer=key[0]
+                )
+        return await self._verify(payload, requirements)
+
+    async def _verify(
+        self, payload: PaymentPayload, requirements: PaymentRequirements
+    ) -> VerifyResponse:
+        start = time.perf_counter()
+        try:
+            response = await self._facilitator.verify(payload, requirements)
+        except BaseException:
+            _observe_facilitator("verify", "error", start)
+            raise
+        _observe_facilitator(
+            "verify", "valid" if response.is_valid else "invalid", start
+        )
         if response.is_valid:
-            print("✅ Payment Verified!")
+            logger.info("Payment verified for %s", response.payer)
         else:
-            print("⛔ Payment failed verification.")
+            logger.warning("Payment failed verification: %s", response.invalid_reason)
         return response
 
-    @override
-    async def settle_payment(
+    async def _settle(
         self, payload: PaymentPayload, requirements: PaymentRequirements
     ) -> SettleResponse:
-        """Settles the payment with the facilitator."""
+        task_id = _current_task_id.get()
+        if self.settlement_worker is not None and task_id:
+            # Hand the payment to the background worker. The receipt is
+            # provisional: it has no transaction until the worker replaces it.
+            await self.settlement_worker.enqueue(task_id, payload, requirements)
+            return SettleResponse(success=True, network=requirements.network)
 
-        response = await self._facilitator.settle(payload, requirements)
+        start = time.perf_counter()
+        try:
+            response = await self._settler.settle(payload, requirements)
+        except BaseException:
+            _observe_facilitator("settle", "error", start)
+            raise
+        _observe_facilitator(
+            "settle", "success" if response.success else "failed", start
+        )
         if response.success:
-            print("✅ Payment Settled!")
+            logger.info("Payment settled: %s", response.transaction)
         else:
-            print("⛔ Payment failed to settle.")
+            logger.warning("Payment failed to settle: %s", response.error_reason)
         return response
+
+    async def _unless_canceled(self, response: VerifyResponse) -> VerifyResponse:
+        """Stops a payment verified for a task canceled by another worker."""
+        task_id = _current_task_id.get()
+        if (
+            response.is_valid
+            and task_id
+            and await self._payment_phases.get(task_id) == CANCELED
+        ):
+            raise asyncio.CancelledError
+        return response
+
+
+class _AfterStoredRequirements:
+    """
+    Publishes events to `queue` only once the payment requirements stored
+    so far are committed, so the follow-up to a payment request finds them
+    even if another worker process serves it.
+    """
+
+    def __init__(self, queue: EventQueue, store: PaymentRequirementsStore):
+        self._queue = queue
+        self._store = store
+
+    async def enqueue_event(self, event: Any) -> None:
+        await self._store.flush()
+        await self._queue.enqueue_event(event)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._queue, name)
+
+
+def _log_detached_settlement(settlement: asyncio.Future) -> None:
+    if settlement.cancelled():
+        return
+    if settlement.exception():
+        logger.error(
+            "Settlement of a cancelled request failed",
+            exc_info=settlement.exception(),
+        )
+    else:
+        logger.info(
+            "Settlement of a cancelled request finished: %s", settlement.result()
+        )
+
+
+def _failed(call: asyncio.Future) -> bool:
+    return call.cancelled() or call.exception() is not None
+
+
+def _observe_facilitator(operation: str, outcome: str, start: float) -> None:
+    FACILITATOR_SECONDS.labels(operation, outcome).observe(time.perf_counter() - start)
@@ -0,0 +1,96 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import contextlib
+import dataclasses
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+# Local imports
+from server.startup import STARTUP, startup_endpoint
+
+# Timed for the startup report.
+with STARTUP.imports():
+    from server.agents._admission import AdmissionConfig
+    from server.agents._settlement_worker import SettlementConfig
+    from server.agents.models import DEFAULT_MODEL
+    from server.agents.routes import create_agent_routes
+    from server.metrics import metrics_endpoint
+    from server.storage import StorageConfig
+
+# Environment variable used to hand the server configuration to worker
+# processes, which uvicorn starts from an import string.
+CONFIG_ENV_VAR = "ZA_SERVER_CONFIG"
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """Everything needed to build the Starlette app in any process."""
+
+    base_url: str
+    base_path: str = "/agents"
+    storage: StorageConfig = field(default_factory=StorageConfig)
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
+    model: str = DEFAULT_MODEL
+    settlement: SettlementConfig = field(default_factory=SettlementConfig)
+    # Build every agent in the background as soon as the server is up,
+    # instead of on its first request.
+    warmup: bool = False
+
+    def to_env(self) -> None:
+        os.environ[CONFIG_ENV_VAR] = json.dumps(dataclasses.asdict(self))
+
+    @classmethod
+    def from_env(cls) -> "ServerConfig":
+        raw = json.loads(os.environ[CONFIG_ENV_VAR])
+        raw["storage"] = StorageConfig(**raw["storage"])
+        raw["admission"] = AdmissionConfig(**raw["admission"])
+        raw["settlement"] = SettlementConfig(**raw["settlement"])
+        return cls(**raw)
+
+
+def build_app(config: ServerConfig) -> Starlette:
+    with STARTUP.step("routes"):
+        routes, agents = create_agent_routes(
+            base_url=config.base_url,
+            base_path=config.base_path,
+            storage=config.storage,
+            admission=config.admission,
+            model=config.model,
+            settlement=config.settlement,
+        )
+    routes.append(Route("/metrics", metrics_endpoint))
+    routes.append(Route("/stats/startup", startup_endpoint))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        STARTUP.mark_ready()
+        if config.warmup:
+            for agent in agents:
+                agent.warm_up()
+        yield
+        await asyncio.gather(*(agent.aclose() for agent in agents))
+
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+def create_app() -> Starlette:
+    """App factory used by uvicorn worker processes in multi-worker mode."""
+    logging.basicConfig(level=logging.INFO)
+    return build_app(ServerConfig.from_env())
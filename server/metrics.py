@@ -0,0 +1,140 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+
+# LLM turns take seconds, so the default buckets are extended upwards.
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+LLM_TURN_SECONDS = Histogram(
+    "za_llm_turn_seconds",
+    "Time to consume one ADK agent turn, from request to last event.",
+    ["agent"],
+    buckets=_SLOW_BUCKETS,
+)
+TOOL_SECONDS = Histogram(
+    "za_tool_seconds",
+    "Latency of tool calls executed by ADKAgentExecutor.",
+    ["agent", "tool", "outcome"],
+)
+FACILITATOR_SECONDS = Histogram(
+    "za_facilitator_seconds",
+    "Latency of x402 facilitator calls.",
+    ["operation", "outcome"],
+    buckets=_SLOW_BUCKETS,
+)
+SETTLEMENT_ATTEMPTS_TOTAL = Counter(
+    "za_settlement_attempts_total",
+    "Background settlement attempts, by outcome.",
+    ["agent", "outcome"],
+)
+SETTLEMENT_LAG_SECONDS = Histogram(
+    "za_settlement_lag_seconds",
+    "Time from queueing a verified payment to its final settlement outcome.",
+    ["agent", "status"],
+    buckets=_SLOW_BUCKETS,
+)
+FACILITATOR_IN_FLIGHT = Gauge(
+    "za_facilitator_in_flight",
+    "Facilitator requests holding or waiting for a pooled connection.",
+    ["operation"],
+    multiprocess_mode="livesum",
+)
+FACILITATOR_POOL_TIMEOUTS_TOTAL = Counter(
+    "za_facilitator_pool_timeouts_total",
+    "Facilitator requests that found every pooled connection busy.",
+    ["operation"],
+)
+FACILITATOR_CIRCUIT_OPEN = Gauge(
+    "za_facilitator_circuit_open",
+    "1 while the circuit breaker in front of the facilitator is open.",
+    ["facilitator"],
+    multiprocess_mode="max",
+)
+PAYMENT_DUPLICATES_TOTAL = Counter(
+    "za_payment_duplicates_total",
+    "Payment authorizations seen before: retries answered from the first "
+    "outcome, or replays for another task that were rejected.",
+    ["kind"],
+)
+SETTLEMENT_BATCH_SIZE = Histogram(
+    "za_settlement_batch_size",
+    "Payments per batch submitted to the facilitator.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+SESSION_STORE_SECONDS = Histogram(
+    "za_session_store_seconds",
+    "Latency of session service calls.",
+    ["operation"],
+)
+FAST_PATH_TOTAL = Counter(
+    "za_fast_path_total",
+    "Requests answered without a model call, by kind.",
+    ["agent", "kind"],
+)
+TASKS_TOTAL = Counter(
+    "za_tasks_total",
+    "Tasks reaching a final or interrupted state.",
+    ["state"],
+)
+ADMISSION_ACTIVE = Gauge(
+    "za_admission_active",
+    "Requests currently executing.",
+    ["agent"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "za_admission_queue_depth",
+    "Requests waiting for an execution slot.",
+    ["agent"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "za_admission_wait_seconds",
+    "Time requests spend waiting for an execution slot.",
+    ["agent"],
+)
+ADMISSION_REJECTED_TOTAL = Counter(
+    "za_admission_rejected_total",
+    "Requests rejected because the agent was overloaded.",
+    ["agent"],
+)
+
+
+def _registry() -> CollectorRegistry:
+    # In multi-worker mode each process writes its samples to
+    # PROMETHEUS_MULTIPROC_DIR and any worker can aggregate them.
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Serves all metrics in the Prometheus text exposition format."""
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,181 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import builtins
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class _ImportTimer:
+    """
+    Attributes import time to top-level packages within `measure` blocks.
+
+    Wraps `builtins.__import__` and charges each module's own execution time
+    (excluding the modules it imports in turn) to its top-level package, the
+    same split `python -X importtime` reports as "self" time. The wrapper is
+    installed only while some thread is inside a `measure` block, and only
+    that thread's imports are timed.
+    """
+
+    def __init__(self):
+        self.seconds: dict[str, float] = defaultdict(float)
+        self._original = builtins.__import__
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._measuring = 0
+
+    @contextmanager
+    def measure(self):
+        with self._lock:
+            if self._measuring == 0:
+                self._original = builtins.__import__
+                builtins.__import__ = self
+            self._measuring += 1
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+            with self._lock:
+                self._measuring -= 1
+                if self._measuring == 0 and builtins.__import__ is self:
+                    builtins.__import__ = self._original
+
+    def __call__(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if not getattr(self._local, "depth", 0):
+            return self._original(name, globals, locals, fromlist, level)
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                absolute = importlib.util.resolve_name("." * level + name, package)
+            except ImportError:
+                absolute = name
+        else:
+            absolute = name
+        if absolute in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.seconds[absolute.partition(".")[0]] += elapsed - children
+
+
+class StartupReport:
+    """
+    Where the time between process start and a fully built server goes.
+
+    Construction steps are recorded with `step`, and `mark_ready` notes when
+    the server began serving. Import time is tracked per top-level package
+    for the imports made within a step or an `imports` block.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._imports = _ImportTimer()
+        self.steps: list[dict[str, Any]] = []
+        self.ready_seconds: float | None = None
+        self.finished_seconds: float | None = None
+
+    def imports(self):
+        """A block whose imports are timed."""
+        return self._imports.measure()
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            with self._imports.measure():
+                yield
+        finally:
+            self.steps.append(
+                {
+                    "name": name,
+                    "started_at": start - self._start,
+                    "seconds": time.perf_counter() - start,
+                }
+            )
+
+    def mark_ready(self) -> None:
+        """Records that the server is accepting requests."""
+        self.ready_seconds = time.perf_counter() - self._start
+        logger.info(f"Serving after {self.ready_seconds:.2f}s")
+
+    def finish(self) -> None:
+        """Logs the report once everything is built."""
+        if self.finished_seconds is not None:
+            return
+        self.finished_seconds = time.perf_counter() - self._start
+        for line in self.format().splitlines():
+            logger.info(line)
+
+    def as_dict(self, top_imports: int = 15) -> dict[str, Any]:
+        imports = sorted(
+            self._imports.seconds.items(), key=lambda item: item[1], reverse=True
+        )
+        return {
+            "ready_seconds": self.ready_seconds,
+            "finished_seconds": self.finished_seconds,
+            "imports": dict(imports[:top_imports]),
+            "steps": self.steps,
+        }
+
+    def format(self) -> str:
+        report = self.as_dict()
+        lines = [
+            (
+                f"Startup: serving after {report['ready_seconds'] or 0:.2f}s, "
+                f"fully built after {report['finished_seconds'] or 0:.2f}s"
+            )
+        ]
+        lines += [
+            f"  import {package:<28}{seconds:>8.3f}s"
+            for package, seconds in report["imports"].items()
+        ]
+        lines += [
+            (
+                f"  step   {step['name']:<28}{step['seconds']:>8.3f}s"
+                f"  (at {step['started_at']:.2f}s)"
+            )
+            for step in report["steps"]
+        ]
+        return "\n".join(lines)
+
+
+# One report per process, started as early as the first `server` import
+# that pulls this module in.
+STARTUP = StartupReport()
+
+
+async def startup_endpoint(request: Request) -> JSONResponse:
+    """Serves the startup report as JSON."""
+    return JSONResponse(STARTUP.as_dict())
@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+
+from .payment_claims import PaymentClaimStore
+from .payment_phases import InMemoryPaymentPhaseStore, PaymentPhaseStore
+from .payment_requirements import PaymentRequirementsStore
+from .settlements import InMemorySettlementStore, SettlementStore
+
+if TYPE_CHECKING:
+    # google.adk takes seconds to import, so it is only loaded once the
+    # services are actually created.
+    from google.adk.artifacts import BaseArtifactService
+    from google.adk.memory import BaseMemoryService
+    from google.adk.sessions import BaseSessionService
+
+BACKENDS = ("memory", "sqlite")
+
+
+@dataclass(frozen=True)
+class StorageConfig:
+    """
+    Selects where the server keeps sessions, artifacts, memory and tasks.
+
+    The "memory" backend keeps everything in per-process dicts. The "sqlite"
+    backend persists it to `db_path`, evicting rows idle for longer than
+    `ttl_seconds` and caching up to `cache_size` hot sessions and tasks.
+    """
+
+    backend: str = "memory"
+    db_path: str = "za_server.db"
+    ttl_seconds: float | None = 7 * 24 * 60 * 60
+    cache_size: int = 1024
+
+
+@dataclass
+class AgentServices:
+    """The storage services used by one agent's Runner and request handler."""
+
+    artifact_service: "BaseArtifactService"
+    session_service: "BaseSessionService"
+    memory_service: "BaseMemoryService"
+    task_store: TaskStore
+    # Replaces the x402 executor's in-process payment requirements dict when
+    # set, so payment follow-ups can be served by any worker process.
+    payment_store: PaymentRequirementsStore | None = None
+    # Queue of verified payments awaiting settlement in async settlement mode.
+    settlement_store: SettlementStore | None = None
+    # Settling/canceled phase of paid tasks, so a cancel handled by one
+    # worker process stops a settlement on another.
+    payment_phases: PaymentPhaseStore | None = None
+    # Task each payment authorization was first used for, so a replay for
+    # another task is refused by any worker process. Without it, replays
+    # are only caught by the worker that saw the first use.
+    payment_claims: PaymentClaimStore | None = None
+
+
+class StorageFactory:
+    """Creates the storage services for each agent from a `StorageConfig`."""
+
+    def __init__(self, config: StorageConfig | None = None):
+        config = config or StorageConfig()
+        if config.backend not in BACKENDS:
+            raise ValueError(f"Unknown storage backend: {config.backend}")
+        self.config = config
+        self._db = None
+
+    def create_services(self) -> AgentServices:
+        from .instrumented import InstrumentedSessionService, InstrumentedTaskStore
+
+        services = self._create_backend_services()
+        services.session_service = InstrumentedSessionService(services.session_service)
+        services.task_store = InstrumentedTaskStore(services.task_store)
+        return services
+
+    def _create_backend_services(self) -> AgentServices:
+        if self.config.backend == "memory":
+            from google.adk.artifacts import InMemoryArtifactService
+            from google.adk.memory import InMemoryMemoryService
+            from google.adk.sessions import InMemorySessionService
+
+            return AgentServices(
+                artifact_service=InMemoryArtifactService(),
+                session_service=InMemorySessionService(),
+                memory_service=InMemoryMemoryService(),
+                task_store=InMemoryTaskStore(),
+                settlement_store=InMemorySettlementStore(),
+                payment_phases=InMemoryPaymentPhaseStore(),
+            )
+
+        from .sqlite import (
+            SqliteArtifactService,
+            SqliteMemoryService,
+            SqlitePaymentClaimStore,
+            SqlitePaymentPhaseStore,
+            SqlitePaymentRequirementsStore,
+            SqliteSessionService,
+            SqliteSettlementStore,
+            SqliteTaskStore,
+            open_database,
+        )
+
+        # All agents share one database; ADK rows are keyed by app name.
+        if self._db is None:
+            self._db = open_database(self.config.db_path, self.config.ttl_seconds)
+        return AgentServices(
+            artifact_service=SqliteArtifactService(self._db),
+            session_service=SqliteSessionService(self._db, self.config.cache_size),
+            memory_service=SqliteMemoryService(self._db),
+            task_store=SqliteTaskStore(self._db, self.config.cache_size),
+            payment_store=SqlitePaymentRequirementsStore(self._db),
+            settlement_store=SqliteSettlementStore(self._db),
+            payment_phases=SqlitePaymentPhaseStore(self._db),
+            payment_claims=SqlitePaymentClaimStore(self._db),
+        )
+
+
+__all__ = ["BACKENDS", "AgentServices", "StorageConfig", "StorageFactory"]
@@ -0,0 +1,254 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+Statement = tuple[str, Sequence[Any]]
+
+# What applying a statement can raise: database errors, and parameters
+# SQLite can't bind (e.g. integers wider than 64 bits).
+_STATEMENT_ERRORS = (sqlite3.Error, ValueError, OverflowError)
+
+
+class LruCache[K: Hashable, V]:
+    """A bounded least-recently-used cache. A `maxsize` of 0 disables it."""
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._items: OrderedDict[K, V] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        if self._maxsize <= 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self._maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._items)
+
+
+class SqliteDatabase:
+    """
+    An asyncio front end to a single SQLite database in WAL mode.
+
+    All statements run on one dedicated thread, so the event loop never
+    blocks on disk I/O and the connection is never shared between threads.
+    Writes are group-committed: statements queued within `flush_interval`
+    seconds (or up to `max_batch` of them) are applied in one transaction,
+    and each writer is resumed only once its batch is durable.
+
+    Tables registered with `register_ttl` are swept periodically, deleting
+    rows whose `updated_at` column is older than the table's TTL; callers
+    caching rows learn of the evicted ones through `on_evict`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.01,
+        max_batch: int = 256,
+        sweep_interval: float = 300.0,
+    ):
+        self.path = path
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._sweep_interval = sweep_interval
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = self._thread.submit(self._connect).result()
+        self._pending: list[tuple[list[Statement], asyncio.Future]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._flusher: asyncio.Task | None = None
+        self._ttls: dict[str, tuple[float, str | None, str | None]] = {}
+        self._evict_listeners: dict[
+            str, tuple[str, list[Callable[[list[tuple]], None]]]
+        ] = {}
+        self._last_sweep = time.time()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def setup(self, script: str) -> None:
+        """Runs a schema script synchronously. Call before serving requests."""
+        self._thread.submit(self._conn.executescript, script).result()
+
+    def register_ttl(
+        self,
+        table: str,
+        ttl_seconds: float | None,
+        cleanup: str | None = None,
+        keep: str | None = None,
+    ) -> None:
+        """
+        Evicts rows of `table` not updated within `ttl_seconds`, then runs the
+        optional `cleanup` statement (e.g. to drop orphaned child rows).
+        Rows matching the optional `keep` condition are never evicted, e.g.
+        work still in progress however long it has been idle.
+        """
+        if ttl_seconds:
+            self._ttls[table] = (ttl_seconds, cleanup, keep)
+
+    def on_evict(
+        self, table: str, key: str, callback: Callable[[list[tuple]], None]
+    ) -> None:
+        """
+        Calls `callback` on the event loop with the `key` columns (a
+        comma-separated list, the same for every callback of `table`) of
+        the rows the sweep evicts from `table`, e.g. to drop them from a
+        cache.
+        """
+        self._evict_listeners.setdefault(table, (key, []))[1].append(callback)
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> list[tuple]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._thread, lambda: self._conn.execute(sql, params).fetchall()
+        )
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> tuple | None:
+        rows = await self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    async def write(self, *statements: Statement) -> None:
+        """
+        Queues statements for the next batch and waits until committed.
+
+        The statements of one call are applied atomically: if they fail,
+        the rest of the batch is retried without them.
+        """
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done():
+            self._wakeup = asyncio.Event()
+            self._flusher = loop.create_task(self._flush_loop())
+        future = loop.create_future()
+        self._pending.append((list(statements), future))
+        self._wakeup.set()
+        await future
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self._max_batch:
+                # Give concurrent writers a moment to join this batch.
+                await asyncio.sleep(self._flush_interval)
+            while self._pending:
+                batch = self._pending[: self._max_batch]
+                del self._pending[: self._max_batch]
+                try:
+                    await loop.run_in_executor(
+                        self._thread,
+                        self._commit,
+                        [s for group, _ in batch for s in group],
+                    )
+                except _STATEMENT_ERRORS:
+                    # Isolate the failing writer by committing one by one.
+                    for group, future in batch:
+                        try:
+                            await loop.run_in_executor(
+                                self._thread, self._commit, group
+                            )
+                        except _STATEMENT_ERRORS as e:
+                            _resolve(future, e)
+                        else:
+                            _resolve(future)
+                else:
+                    for _, future in batch:
+                        _resolve(future)
+            if self._ttls and time.time() - self._last_sweep > self._sweep_interval:
+                evicted = await loop.run_in_executor(self._thread, self._sweep)
+                for table, keys in evicted.items():
+                    for callback in self._evict_listeners[table][1]:
+                        callback(keys)
+
+    def _commit(self, statements: list[Statement]) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                self._conn.execute(sql, params)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _sweep(self) -> dict[str, list[tuple]]:
+        """Returns the keys of evicted rows of tables with `on_evict` callbacks."""
+        now = time.time()
+        self._last_sweep = now
+        evicted = {}
+        for table, (ttl, cleanup, keep) in self._ttls.items():
+            sql = f"DELETE FROM {table} WHERE updated_at < ?"
+            if keep:
+                sql += f" AND NOT ({keep})"
+            listener = self._evict_listeners.get(table)
+            if listener is None:
+                deleted = self._conn.execute(sql, (now - ttl,)).rowcount
+            else:
+                keys = self._conn.execute(
+                    f"{sql} RETURNING {listener[0]}", (now - ttl,)
+                ).fetchall()
+                deleted = len(keys)
+                if keys:
+                    evicted[table] = keys
+            if deleted:
+                logger.info("Evicted %d expired row(s) from %s", deleted, table)
+                if cleanup:
+                    self._conn.execute(cleanup)
+        return evicted
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            while self._pending:
+                await asyncio.sleep(self._flush_interval)
+            self._flusher.cancel()
+        self._thread.submit(self._conn.close).result()
+        self._thread.shutdown()
+
+
+def _resolve(future: asyncio.Future, error: Exception | None = None) -> None:
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
@@ -0,0 +1,118 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+from typing import Any, override
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+
+from server.metrics import SESSION_STORE_SECONDS, TASKS_TOTAL
+
+from ._database import LruCache
+
+# States counted in TASKS_TOTAL: the final ones plus the interrupted ones a
+# purchase waits in.
+_COUNTED_STATES = frozenset(
+    {
+        TaskState.completed,
+        TaskState.failed,
+        TaskState.canceled,
+        TaskState.rejected,
+        TaskState.input_required,
+        TaskState.auth_required,
+    }
+)
+
+
+class InstrumentedSessionService(BaseSessionService):
+    """Records the latency of every call made to another session service."""
+
+    def __init__(self, inner: BaseSessionService):
+        self._inner = inner
+
+    @override
+    async def create_session(self, **kwargs: Any) -> Session:
+        with SESSION_STORE_SECONDS.labels("create_session").time():
+            return await self._inner.create_session(**kwargs)
+
+    @override
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: GetSessionConfig | None = None,
+    ) -> Session | None:
+        with SESSION_STORE_SECONDS.labels("get_session").time():
+            return await self._inner.get_session(
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+                config=config,
+            )
+
+    @override
+    async def list_sessions(self, **kwargs: Any) -> ListSessionsResponse:
+        with SESSION_STORE_SECONDS.labels("list_sessions").time():
+            return await self._inner.list_sessions(**kwargs)
+
+    @override
+    async def delete_session(self, **kwargs: Any) -> None:
+        with SESSION_STORE_SECONDS.labels("delete_session").time():
+            await self._inner.delete_session(**kwargs)
+
+    @override
+    async def append_event(self, session: Session, event: Event) -> Event:
+        start = time.perf_counter()
+        try:
+            return await self._inner.append_event(session=session, event=event)
+        finally:
+            SESSION_STORE_SECONDS.labels("append_event").observe(
+                time.perf_counter() - start
+            )
+
+
+class InstrumentedTaskStore(TaskStore):
+    """Counts tasks by the final (or interrupted) state they are saved in."""
+
+    def __init__(self, inner: TaskStore, remembered_tasks: int = 10_000):
+        self._inner = inner
+        # Last counted state per task, so repeated saves count only once.
+        self._counted: LruCache[str, TaskState] = LruCache(remembered_tasks)
+
+    @override
+    async def save(self, task: Task, context: ServerCallContext | None = None):
+        await self._inner.save(task, context)
+        state = task.status.state
+        if state in _COUNTED_STATES and self._counted.get(task.id) != state:
+            self._counted.put(task.id, state)
+            TASKS_TOTAL.labels(state.value).inc()
+
+    @override
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        return await self._inner.get(task_id, context)
+
+    @override
+    async def delete(self, task_id: str, context: ServerCallContext | None = None):
+        await self._inner.delete(task_id, context)
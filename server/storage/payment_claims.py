@@ -0,0 +1,31 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from abc import ABC, abstractmethod
+
+
+class PaymentClaimStore(ABC):
+    """
+    The task each payment authorization was first submitted for, shared by
+    all worker processes.
+
+    Each worker dedupes retries in its own memory; this store is what makes
+    an authorization replayed for another task, on any worker, be refused.
+    """
+
+    @abstractmethod
+    async def claim(self, key: str, task_id: str) -> str:
+        """
+        Atomically claims `key` for `task_id` unless a task already holds it.
+        Returns the task holding it now.
+        """
@@ -0,0 +1,73 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Phases. A task is "settling" once its payment has been handed to the
+# facilitator (or the settlement queue), and "canceled" once a cancel has
+# been accepted; each excludes the other.
+SETTLING = "settling"
+CANCELED = "canceled"
+
+
+class PaymentPhaseStore(ABC):
+    """
+    The payment phase of tasks with a paid request in flight.
+
+    A cancel and a settlement of the same task may be handled by different
+    worker processes; whichever moves the task to its phase first wins, so
+    a canceled task is never charged and a task being charged is never
+    canceled.
+    """
+
+    @abstractmethod
+    async def get(self, task_id: str) -> str | None:
+        """The task's phase, or None if it has none."""
+
+    @abstractmethod
+    async def transition(self, task_id: str, phase: str, unless: str) -> bool:
+        """
+        Atomically moves the task to `phase` unless it is in `unless`.
+        Returns whether the task is now in `phase`.
+        """
+
+    @abstractmethod
+    async def clear(self, task_id: str) -> None:
+        """Forgets the task's phase."""
+
+
+class InMemoryPaymentPhaseStore(PaymentPhaseStore):
+    """
+    A per-process `PaymentPhaseStore`, remembering up to `max_tasks` tasks.
+    """
+
+    def __init__(self, max_tasks: int = 10_000):
+        self._max_tasks = max_tasks
+        self._phases: OrderedDict[str, str] = OrderedDict()
+
+    async def get(self, task_id: str) -> str | None:
+        return self._phases.get(task_id)
+
+    async def transition(self, task_id: str, phase: str, unless: str) -> bool:
+        current = self._phases.get(task_id)
+        if current == unless:
+            return False
+        self._phases[task_id] = phase
+        self._phases.move_to_end(task_id)
+        while len(self._phases) > self._max_tasks:
+            self._phases.popitem(last=False)
+        return True
+
+    async def clear(self, task_id: str) -> None:
+        self._phases.pop(task_id, None)
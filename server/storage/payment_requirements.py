@@ -0,0 +1,37 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from abc import abstractmethod
+from collections.abc import MutableMapping
+
+from x402_a2a.types import PaymentRequirements
+
+
+class PaymentRequirementsStore(MutableMapping[str, list[PaymentRequirements]]):
+    """
+    The payment requirements offered for each task, shared by all worker
+    processes.
+
+    The x402 server executor reads and writes them as a plain dict, from
+    the event loop. So that this never waits for the database, a task's
+    requirements are fetched with `load` before its request is executed,
+    and writes are committed in the background; `flush` waits for them.
+    """
+
+    @abstractmethod
+    async def load(self, task_id: str) -> None:
+        """Fetches the requirements of `task_id`, if any, for the dict API."""
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Waits until the requirements stored so far are committed."""
@@ -0,0 +1,111 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import dataclasses
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+# Job states. A job is "pending" until the facilitator settles it or it runs
+# out of attempts; `recorded` turns true once the outcome is on the task.
+PENDING = "pending"
+SETTLED = "settled"
+FAILED = "failed"
+
+
+@dataclass
+class SettlementJob:
+    """A verified payment waiting to be (or already) settled."""
+
+    id: str
+    # Name of the agent whose task this is; each agent's worker only
+    # claims its own jobs.
+    queue: str
+    task_id: str
+    # PaymentPayload and PaymentRequirements, as JSON.
+    payload: str
+    requirements: str
+    status: str = PENDING
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    created_at: float = dataclasses.field(default_factory=time.time)
+    # SettleResponse JSON once settled, or the last error.
+    result: str | None = None
+    error: str | None = None
+    recorded: bool = False
+
+
+class SettlementStore(ABC):
+    """
+    Durable queue of settlement jobs.
+
+    Jobs are claimed with a lease so that several worker processes sharing
+    one store never work on the same job at once; a job whose lease expires
+    (e.g. because its worker died) becomes claimable again.
+    """
+
+    @abstractmethod
+    async def add(self, job: SettlementJob) -> None:
+        """Persists a new job. Returns once the job is durable."""
+
+    @abstractmethod
+    async def claim(
+        self, queue: str, owner: str, now: float, lease_seconds: float, limit: int
+    ) -> list[SettlementJob]:
+        """Leases up to `limit` due jobs of `queue` that still need work."""
+
+    @abstractmethod
+    async def update(self, job: SettlementJob) -> None:
+        """Stores the job's new state and releases its lease."""
+
+    @abstractmethod
+    async def pending_count(self, queue: str) -> int:
+        """Number of jobs of `queue` that still need work."""
+
+
+class InMemorySettlementStore(SettlementStore):
+    """A per-process `SettlementStore`; jobs are lost on restart."""
+
+    def __init__(self):
+        self._jobs: dict[str, SettlementJob] = {}
+        self._leases: dict[str, tuple[str, float]] = {}
+
+    async def add(self, job: SettlementJob) -> None:
+        self._jobs[job.id] = dataclasses.replace(job)
+
+    async def claim(
+        self, queue: str, owner: str, now: float, lease_seconds: float, limit: int
+    ) -> list[SettlementJob]:
+        claimed = []
+        for job in sorted(self._jobs.values(), key=lambda j: j.next_attempt_at):
+            if len(claimed) == limit or job.next_attempt_at > now:
+                break
+            if job.queue != queue:
+                continue
+            lease = self._leases.get(job.id)
+            if lease and lease[1] > now:
+                continue
+            self._leases[job.id] = (owner, now + lease_seconds)
+            claimed.append(dataclasses.replace(job))
+        return claimed
+
+    async def update(self, job: SettlementJob) -> None:
+        self._leases.pop(job.id, None)
+        if job.recorded:
+            # Nothing left to do; only durable stores keep finished jobs.
+            self._jobs.pop(job.id, None)
+        else:
+            self._jobs[job.id] = dataclasses.replace(job)
+
+    async def pending_count(self, queue: str) -> int:
+        return sum(job.queue == queue for job in self._jobs.values())
@@ -0,0 +1,979 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from typing import Any, override
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+from google.adk.artifacts import BaseArtifactService
+from google.adk.events import Event
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.state import State
+from google.genai import types
+from x402_a2a.types import PaymentRequirements
+
+from ._database import LruCache, SqliteDatabase, Statement
+from .payment_claims import PaymentClaimStore
+from .payment_phases import SETTLING, PaymentPhaseStore
+from .payment_requirements import PaymentRequirementsStore
+from .settlements import SettlementJob, SettlementStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS session_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_events_by_session
+    ON session_events (app_name, user_id, session_id);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    part TEXT NOT NULL,
+    custom_metadata TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, filename, version)
+);
+CREATE TABLE IF NOT EXISTS memories (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    author TEXT,
+    timestamp REAL,
+    content TEXT NOT NULL,
+    text TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, event_id)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS payment_requirements (
+    task_id TEXT PRIMARY KEY,
+    requirements TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS payment_phases (
+    task_id TEXT PRIMARY KEY,
+    phase TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS payment_claims (
+    key TEXT PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settlements (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    requirements TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    recorded INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS settlements_due
+    ON settlements (queue, recorded, next_attempt_at);
+"""
+
+
+def open_database(
+    path: str, ttl_seconds: float | None, **kwargs: Any
+) -> SqliteDatabase:
+    """Opens (and if needed creates) the server database at `path`."""
+    db = SqliteDatabase(path, **kwargs)
+    db.setup(SCHEMA)
+    db.register_ttl(
+        "sessions",
+        ttl_seconds,
+        cleanup="""
+            DELETE FROM session_events WHERE NOT EXISTS (
+                SELECT 1 FROM sessions s
+                WHERE s.app_name = session_events.app_name
+                AND s.user_id = session_events.user_id
+                AND s.id = session_events.session_id
+            )
+        """,
+    )
+    for table in (
+        "user_states",
+        "artifacts",
+        "memories",
+        "tasks",
+        "payment_requirements",
+        "payment_claims",
+    ):
+        db.register_ttl(table, ttl_seconds)
+    # Payments in flight outlive the TTL, e.g. across a long facilitator
+    # outage: settlements until their outcome is recorded on the task, and
+    # phases while a settlement may be under way.
+    db.register_ttl("settlements", ttl_seconds, keep="recorded = 0")
+    db.register_ttl("payment_phases", ttl_seconds, keep=f"phase = '{SETTLING}'")
+    return db
+
+
+class SqliteTaskStore(TaskStore):
+    """An A2A TaskStore persisted in SQLite with an LRU cache in front."""
+
+    def __init__(self, db: SqliteDatabase, cache_size: int = 1024):
+        self._db = db
+        self._cache: LruCache[str, Task] = LruCache(cache_size)
+        db.on_evict("tasks", "id", self._evict)
+
+    @override
+    async def save(self, task: Task, context: ServerCallContext | None = None):
+        await self._db.write(
+            (
+                "INSERT OR REPLACE INTO tasks (id, task, updated_at) VALUES (?, ?, ?)",
+                (task.id, task.model_dump_json(by_alias=True), time.time()),
+            )
+        )
+        self._cache.put(task.id, task.model_copy(deep=True))
+
+    @override
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        task = self._cache.get(task_id)
+        if task is None:
+            row = await self._db.fetchone(
+                "SELECT task FROM tasks WHERE id = ?", (task_id,)
+            )
+            if row is None:
+                return None
+            task = Task.model_validate_json(row[0])
+            self._cache.put(task_id, task)
+        return task.model_copy(deep=True)
+
+    @override
+    async def delete(self, task_id: str, context: ServerCallContext | None = None):
+        self._cache.pop(task_id)
+        await self._db.write(("DELETE FROM tasks WHERE id = ?", (task_id,)))
+
+    def _evict(self, keys: list[tuple]) -> None:
+        for (task_id,) in keys:
+            self._cache.pop(task_id)
+
+
+class SqlitePaymentRequirementsStore(PaymentRequirementsStore):
+    """
+    The x402 server executor's per-task payment requirements, in SQLite.
+
+    The executor remembers which requirements it offered for a task so it
+    can match the signed payload on the follow-up request. Keeping them in
+    the shared database lets that follow-up land on any worker process.
+    Loaded and stored requirements are kept in memory, up to `max_tasks`
+    of them, for the executor's synchronous reads.
+    """
+
+    def __init__(self, db: SqliteDatabase, max_tasks: int = 10_000):
+        self._db = db
+        self._loaded: LruCache[str, list[PaymentRequirements]] = LruCache(max_tasks)
+        self._stores: set[asyncio.Future] = set()
+
+    @override
+    async def load(self, task_id: str) -> None:
+        if self._loaded.get(task_id) is not None:
+            return
+        row = await self._db.fetchone(
+            "SELECT requirements FROM payment_requirements WHERE task_id = ?",
+            (task_id,),
+        )
+        if row is not None:
+            self._loaded.put(
+                task_id,
+                [PaymentRequirements.model_validate(r) for r in json.loads(row[0])],
+            )
+
+    @override
+    async def flush(self) -> None:
+        if self._stores:
+            await asyncio.gather(*self._stores, return_exceptions=True)
+
+    def __getitem__(self, task_id: str) -> list[PaymentRequirements]:
+        value = self._loaded.get(task_id)
+        if value is None:
+            raise KeyError(task_id)
+        return value
+
+    def __setitem__(self, task_id: str, value: list[PaymentRequirements]) -> None:
+        self._loaded.put(task_id, value)
+        requirements = json.dumps(
+            [r.model_dump(mode="json", by_alias=True) for r in value]
+        )
+        store = self._write(
+            (
+                (
+                    "INSERT OR REPLACE INTO payment_requirements "
+                    "(task_id, requirements, updated_at) VALUES (?, ?, ?)"
+                ),
+                (task_id, requirements, time.time()),
+            )
+        )
+        self._stores.add(store)
+        store.add_done_callback(self._stores.discard)
+
+    def __delitem__(self, task_id: str) -> None:
+        if self._loaded.get(task_id) is None:
+            raise KeyError(task_id)
+        self._loaded.pop(task_id)
+        self._write(("DELETE FROM payment_requirements WHERE task_id = ?", (task_id,)))
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over the tasks loaded or stored by this process."""
+        return iter(list(self._loaded))
+
+    def __len__(self) -> int:
+        return len(self._loaded)
+
+    def _write(self, statement: Statement) -> asyncio.Future:
+        write = asyncio.ensure_future(self._db.write(statement))
+        write.add_done_callback(_log_failed_write)
+        return write
+
+
+class SqlitePaymentPhaseStore(PaymentPhaseStore):
+    """A `PaymentPhaseStore` in SQLite, shared by all worker processes."""
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    @override
+    async def get(self, task_id: str) -> str | None:
+        row = await self._db.fetchone(
+            "SELECT phase FROM payment_phases WHERE task_id = ?", (task_id,)
+        )
+        return row[0] if row else None
+
+    @override
+    async def transition(self, task_id: str, phase: str, unless: str) -> bool:
+        # The conditional upsert is atomic across processes; reading the row
+        # back tells whether this call or a competing one won.
+        await self._db.write(
+            (
+                (
+                    "INSERT INTO payment_phases (task_id, phase, updated_at) "
+                    "VALUES (?, ?, ?) ON CONFLICT (task_id) DO UPDATE SET "
+                    "phase = excluded.phase, updated_at = excluded.updated_at "
+                    "WHERE payment_phases.phase != ?"
+                ),
+                (task_id, phase, time.time(), unless),
+            )
+        )
+        return await self.get(task_id) == phase
+
+    @override
+    async def clear(self, task_id: str) -> None:
+        await self._db.write(
+            ("DELETE FROM payment_phases WHERE task_id = ?", (task_id,))
+        )
+
+
+class SqlitePaymentClaimStore(PaymentClaimStore):
+    """A `PaymentClaimStore` in SQLite, shared by all worker processes."""
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    @override
+    async def claim(self, key: str, task_id: str) -> str:
+        # The first insert wins; reading the row back tells which task did.
+        await self._db.write(
+            (
+                (
+                    "INSERT INTO payment_claims (key, task_id, updated_at) "
+                    "VALUES (?, ?, ?) ON CONFLICT (key) DO NOTHING"
+                ),
+                (key, task_id, time.time()),
+            )
+        )
+        row = await self._db.fetchone(
+            "SELECT task_id FROM payment_claims WHERE key = ?", (key,)
+        )
+        return row[0]
+
+
+class SqliteSettlementStore(SettlementStore):
+    """
+    A `SettlementStore` in SQLite, shared by all worker processes.
+
+    Jobs stay in the table after they are recorded, as an audit trail of
+    settlements, until the TTL sweep evicts them.
+    """
+
+    _COLUMNS = (
+        "id, queue, task_id, payload, requirements, status, attempts, "
+        "next_attempt_at, created_at, result, error, recorded"
+    )
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    @override
+    async def add(self, job: SettlementJob) -> None:
+        await self._db.write(
+            (
+                (
+                    f"INSERT INTO settlements ({self._COLUMNS}, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                ),
+                (*_settlement_row(job), time.time()),
+            )
+        )
+
+    @override
+    async def claim(
+        self, queue: str, owner: str, now: float, lease_seconds: float, limit: int
+    ) -> list[SettlementJob]:
+        # A single UPDATE is atomic across processes, so each due job is
+        # leased to exactly one claimant; the token finds this claim's rows.
+        token = f"{owner}/{uuid.uuid4().hex}"
+        await self._db.write(
+            (
+                (
+                    "UPDATE settlements SET lease_owner = ?, lease_until = ? "
+                    "WHERE id IN (SELECT id FROM settlements "
+                    "WHERE queue = ? AND recorded = 0 AND next_attempt_at <= ? "
+                    "AND (lease_until IS NULL OR lease_until <= ?) "
+                    "ORDER BY next_attempt_at LIMIT ?)"
+                ),
+                (token, now + lease_seconds, queue, now, now, limit),
+            )
+        )
+        rows = await self._db.fetchall(
+            f"SELECT {self._COLUMNS} FROM settlements WHERE lease_owner = ?",
+            (token,),
+        )
+        return [SettlementJob(*row[:-1], recorded=bool(row[-1])) for row in rows]
+
+    @override
+    async def update(self, job: SettlementJob) -> None:
+        row = _settlement_row(job)
+        await self._db.write(
+            (
+                (
+                    "UPDATE settlements SET status = ?, attempts = ?, "
+                    "next_attempt_at = ?, result = ?, error = ?, recorded = ?, "
+                    "lease_owner = NULL, lease_until = NULL, updated_at = ? "
+                    "WHERE id = ?"
+                ),
+                (*row[5:8], *row[9:], time.time(), job.id),
+            )
+        )
+
+    @override
+    async def pending_count(self, queue: str) -> int:
+        row = await self._db.fetchone(
+            "SELECT COUNT(*) FROM settlements WHERE queue = ? AND recorded = 0",
+            (queue,),
+        )
+        return row[0]
+
+
+class SqliteSessionService(BaseSessionService):
+    """
+    An ADK session service persisted in SQLite.
+
+    Mirrors `InMemorySessionService` semantics: `app:` and `user:` prefixed
+    state is shared across sessions, `temp:` state is never stored, and
+    callers always receive a copy of the stored session.
+    """
+
+    def __init__(self, db: SqliteDatabase, cache_size: int = 1024):
+        self._db = db
+        self._cache: LruCache[tuple[str, str, str], Session] = LruCache(cache_size)
+        db.on_evict("sessions", "app_name, user_id, id", self._evict)
+
+    @override
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: dict[str, Any] | None = None,
+        session_id: str | None = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        app_delta, user_delta, session_state = _split_state(state or {})
+        now = time.time()
+        statements = [
+            (
+                (
+                    "INSERT INTO sessions "
+                    "(app_name, user_id, id, state, last_update_time, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)"
+                ),
+                (app_name, user_id, session_id, json.dumps(session_state), now, now),
+            )
+        ]
+        statements.extend(_state_upserts(app_name, user_id, app_delta, user_delta, now))
+        await self._db.write(*statements)
+
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=session_state,
+            last_update_time=now,
+        )
+        self._cache.put((app_name, user_id, session_id), session)
+        return await self._with_shared_state(session.model_copy(deep=True))
+
+    @override
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: GetSessionConfig | None = None,
+    ) -> Session | None:
+        key = (app_name, user_id, session_id)
+        session = self._cache.get(key)
+        if session is None:
+            session = await self._load_session(app_name, user_id, session_id)
+            if session is None:
+                return None
+            self._cache.put(key, session)
+
+        session = session.model_copy(deep=True)
+        if config:
+            if config.num_recent_events:
+                session.events = session.events[-config.num_recent_events :]
+            if config.after_timestamp:
+                session.events = [
+                    e for e in session.events if e.timestamp >= config.after_timestamp
+                ]
+        return await self._with_shared_state(session)
+
+    @override
+    async def list_sessions(
+        self, *, app_name: str, user_id: str | None = None
+    ) -> ListSessionsResponse:
+        sql = "SELECT user_id, id, state, last_update_time FROM sessions WHERE app_name = ?"
+        params: list[Any] = [app_name]
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        rows = await self._db.fetchall(sql, params)
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    id=session_id,
+                    app_name=app_name,
+                    user_id=row_user_id,
+                    state=json.loads(state),
+                    last_update_time=last_update_time,
+                )
+                for row_user_id, session_id, state, last_update_time in rows
+            ]
+        )
+
+    @override
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        self._cache.pop((app_name, user_id, session_id))
+        await self._db.write(
+            (
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ),
+            (
+                (
+                    "DELETE FROM session_events "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?"
+                ),
+                (app_name, user_id, session_id),
+            ),
+        )
+
+    @override
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        app_delta, user_delta, _ = _split_state(
+            event.actions.state_delta if event.actions else {}
+        )
+        session_state = {
+            k: v
+            for k, v in session.state.items()
+            if not k.startswith(
+                (State.APP_PREFIX, State.USER_PREFIX, State.TEMP_PREFIX)
+            )
+        }
+        now = time.time()
+        statements = [
+            (
+                (
+                    "INSERT INTO session_events "
+                    "(app_name, user_id, session_id, event) VALUES (?, ?, ?, ?)"
+                ),
+                (
+                    session.app_name,
+                    session.user_id,
+                    session.id,
+                    event.model_dump_json(exclude_none=True),
+                ),
+            ),
+            (
+                (
+                    "UPDATE sessions SET state = ?, last_update_time = ?, "
+                    "updated_at = ? WHERE app_name = ? AND user_id = ? AND id = ?"
+                ),
+                (
+                    json.dumps(session_state),
+                    event.timestamp,
+                    now,
+                    session.app_name,
+                    session.user_id,
+                    session.id,
+                ),
+            ),
+        ]
+        statements.extend(
+            _state_upserts(
+                session.app_name, session.user_id, app_delta, user_delta, now
+            )
+        )
+        await self._db.write(*statements)
+
+        cached = self._cache.get((session.app_name, session.user_id, session.id))
+        if cached is not None:
+            cached.events.append(event.model_copy(deep=True))
+            cached.state = session_state
+            cached.last_update_time = event.timestamp
+        return event
+
+    def _evict(self, keys: list[tuple]) -> None:
+        for key in keys:
+            self._cache.pop(key)
+
+    async def _load_session(
+        self, app_name: str, user_id: str, session_id: str
+    ) -> Session | None:
+        row = await self._db.fetchone(
+            "SELECT state, last_update_time FROM sessions "
+            "WHERE app_name = ? AND user_id = ? AND id = ?",
+            (app_name, user_id, session_id),
+        )
+        if row is None:
+            return None
+        events = await self._db.fetchall(
+            "SELECT event FROM session_events "
+            "WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq",
+            (app_name, user_id, session_id),
+        )
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=json.loads(row[0]),
+            events=[Event.model_validate_json(e) for (e,) in events],
+            last_update_time=row[1],
+        )
+
+    async def _with_shared_state(self, session: Session) -> Session:
+        """Merges the app- and user-scoped state into the session's state."""
+        app_row = await self._db.fetchone(
+            "SELECT state FROM app_states WHERE app_name = ?", (session.app_name,)
+        )
+        user_row = await self._db.fetchone(
+            "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+            (session.app_name, session.user_id),
+        )
+        if app_row:
+            for key, value in json.loads(app_row[0]).items():
+                session.state[State.APP_PREFIX + key] = value
+        if user_row:
+            for key, value in json.loads(user_row[0]).items():
+                session.state[State.USER_PREFIX + key] = value
+        return session
+
+
+class SqliteArtifactService(BaseArtifactService):
+    """An ADK artifact service storing versioned artifacts in SQLite."""
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    @override
+    async def save_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        artifact: types.Part,
+        session_id: str | None = None,
+        custom_metadata: dict[str, Any] | None = None,
+    ) -> int:
+        scope = _artifact_scope(filename, session_id)
+        versions = await self._versions(app_name, user_id, scope, filename)
+        version = versions[-1] + 1 if versions else 0
+        await self._db.write(
+            (
+                (
+                    "INSERT INTO artifacts (app_name, user_id, session_id, filename, "
+                    "version, part, custom_metadata, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                ),
+                (
+                    app_name,
+                    user_id,
+                    scope,
+                    filename,
+                    version,
+                    artifact.model_dump_json(exclude_none=True),
+                    json.dumps(custom_metadata) if custom_metadata else None,
+                    time.time(),
+                ),
+            )
+        )
+        return version
+
+    @override
+    async def load_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+        version: int | None = None,
+    ) -> types.Part | None:
+        scope = _artifact_scope(filename, session_id)
+        sql = (
+            "SELECT part FROM artifacts WHERE app_name = ? AND user_id = ? "
+            "AND session_id = ? AND filename = ?"
+        )
+        params: list[Any] = [app_name, user_id, scope, filename]
+        if version is not None:
+            sql += " AND version = ?"
+            params.append(version)
+        row = await self._db.fetchone(sql + " ORDER BY version DESC LIMIT 1", params)
+        return types.Part.model_validate_json(row[0]) if row else None
+
+    @override
+    async def list_artifact_keys(
+        self, *, app_name: str, user_id: str, session_id: str | None = None
+    ) -> list[str]:
+        rows = await self._db.fetchall(
+            "SELECT DISTINCT filename FROM artifacts WHERE app_name = ? "
+            "AND user_id = ? AND session_id IN (?, '') ORDER BY filename",
+            (app_name, user_id, session_id or ""),
+        )
+        return [filename for (filename,) in rows]
+
+    @override
+    async def delete_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+    ) -> None:
+        await self._db.write(
+            (
+                (
+                    "DELETE FROM artifacts WHERE app_name = ? AND user_id = ? "
+                    "AND session_id = ? AND filename = ?"
+                ),
+                (app_name, user_id, _artifact_scope(filename, session_id), filename),
+            )
+        )
+
+    @override
+    async def list_versions(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+    ) -> list[int]:
+        scope = _artifact_scope(filename, session_id)
+        return await self._versions(app_name, user_id, scope, filename)
+
+    async def list_artifact_versions(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+    ) -> list[Any]:
+        scope = _artifact_scope(filename, session_id)
+        rows = await self._db.fetchall(
+            "SELECT version, custom_metadata, updated_at FROM artifacts "
+            "WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ? "
+            "ORDER BY version",
+            (app_name, user_id, scope, filename),
+        )
+        return [_artifact_version(filename, *row) for row in rows]
+
+    async def get_artifact_version(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+        version: int | None = None,
+    ) -> Any | None:
+        versions = await self.list_artifact_versions(
+            app_name=app_name, user_id=user_id, filename=filename, session_id=session_id
+        )
+        if not versions:
+            return None
+        if version is None:
+            return versions[-1]
+        return next((v for v in versions if v.version == version), None)
+
+    async def _versions(
+        self, app_name: str, user_id: str, scope: str, filename: str
+    ) -> list[int]:
+        rows = await self._db.fetchall(
+            "SELECT version FROM artifacts WHERE app_name = ? AND user_id = ? "
+            "AND session_id = ? AND filename = ? ORDER BY version",
+            (app_name, user_id, scope, filename),
+        )
+        return [version for (version,) in rows]
+
+
+class SqliteMemoryService(BaseMemoryService):
+    """
+    An ADK memory service persisted in SQLite.
+
+    Search uses the same keyword matching as `InMemoryMemoryService`, with a
+    SQL pre-filter so only candidate events are loaded.
+    """
+
+    def __init__(self, db: SqliteDatabase, max_results: int = 50):
+        self._db = db
+        self._max_results = max_results
+
+    @override
+    async def add_session_to_memory(self, session: Session) -> None:
+        now = time.time()
+        statements = []
+        for event in session.events:
+            if not event.content or not event.content.parts:
+                continue
+            text = " ".join(part.text for part in event.content.parts if part.text)
+            if not text:
+                continue
+            statements.append(
+                (
+                    (
+                        "INSERT OR IGNORE INTO memories (app_name, user_id, event_id, "
+                        "author, timestamp, content, text, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                    ),
+                    (
+                        session.app_name,
+                        session.user_id,
+                        event.id,
+                        event.author,
+                        event.timestamp,
+                        event.content.model_dump_json(exclude_none=True),
+                        text.lower(),
+                        now,
+                    ),
+                )
+            )
+        if statements:
+            await self._db.write(*statements)
+
+    @override
+    async def search_memory(
+        self, *, app_name: str, user_id: str, query: str
+    ) -> SearchMemoryResponse:
+        words = set(query.lower().split())
+        if not words:
+            return SearchMemoryResponse()
+        clauses = " OR ".join("text LIKE ?" for _ in words)
+        rows = await self._db.fetchall(
+            "SELECT author, timestamp, content, text FROM memories "
+            f"WHERE app_name = ? AND user_id = ? AND ({clauses}) "
+            "ORDER BY timestamp DESC LIMIT ?",
+            (app_name, user_id, *(f"%{w}%" for w in words), self._max_results),
+        )
+        memories = []
+        for author, timestamp, content, text in rows:
+            if not words & set(text.split()):
+                continue
+            memories.append(
+                MemoryEntry(
+                    content=types.Content.model_validate_json(content),
+                    author=author,
+                    timestamp=_format_timestamp(timestamp),
+                )
+            )
+        return SearchMemoryResponse(memories=memories)
+
+
+def _settlement_row(job: SettlementJob) -> tuple:
+    return (
+        job.id,
+        job.queue,
+        job.task_id,
+        job.payload,
+        job.requirements,
+        job.status,
+        job.attempts,
+        job.next_attempt_at,
+        job.created_at,
+        job.result,
+        job.error,
+        int(job.recorded),
+    )
+
+
+def _split_state(
+    state: dict[str, Any],
+) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+    """Splits state into app-scoped, user-scoped and session-scoped parts."""
+    app_state, user_state, session_state = {}, {}, {}
+    for key, value in state.items():
+        if key.startswith(State.APP_PREFIX):
+            app_state[key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_state[key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_state[key] = value
+    return app_state, user_state, session_state
+
+
+def _state_upserts(
+    app_name: str,
+    user_id: str,
+    app_delta: dict[str, Any],
+    user_delta: dict[str, Any],
+    now: float,
+) -> list[tuple[str, tuple]]:
+    statements = []
+    if app_delta:
+        statements.append(
+            (
+                (
+                    "INSERT INTO app_states (app_name, state, updated_at) "
+                    "VALUES (?, ?, ?) ON CONFLICT (app_name) DO UPDATE SET "
+                    "state = json_patch(state, excluded.state), "
+                    "updated_at = excluded.updated_at"
+                ),
+                (app_name, json.dumps(app_delta), now),
+            )
+        )
+    if user_delta:
+        statements.append(
+            (
+                (
+                    "INSERT INTO user_states (app_name, user_id, state, updated_at) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT (app_name, user_id) "
+                    "DO UPDATE SET state = json_patch(state, excluded.state), "
+                    "updated_at = excluded.updated_at"
+                ),
+                (app_name, user_id, json.dumps(user_delta), now),
+            )
+        )
+    return statements
+
+
+def _artifact_scope(filename: str, session_id: str | None) -> str:
+    # "user:" artifacts are shared by all of a user's sessions.
+    if filename.startswith("user:"):
+        return ""
+    return session_id or ""
+
+
+def _artifact_version(
+    filename: str, version: int, custom_metadata: str | None, updated_at: float
+) -> Any:
+    # Imported lazily: ArtifactVersion only exists in newer ADK releases.
+    from google.adk.artifacts.base_artifact_service import ArtifactVersion
+
+    return ArtifactVersion(
+        version=version,
+        canonical_uri=f"sqlite:///{filename}/versions/{version}",
+        custom_metadata=json.loads(custom_metadata) if custom_metadata else {},
+        create_time=updated_at,
+    )
+
+
+def _format_timestamp(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=UTC).isoformat()
+
+
+def _log_failed_write(write: asyncio.Future) -> None:
+    if not write.cancelled() and write.exception() is not None:
+        logger.error("Could not store payment requirements", exc_info=write.exception())
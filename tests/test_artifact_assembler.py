@@ -0,0 +1,140 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import tempfile
+import unittest
+from pathlib import Path
+from urllib.parse import urlparse
+
+from a2a.types import (
+    Artifact,
+    DataPart,
+    FilePart,
+    FileWithBytes,
+    Part,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from market._artifact_assembler import ArtifactAssembler
+from market._task_store import TaskStore
+
+
+def _text(text: str) -> Part:
+    return Part(root=TextPart(text=text))
+
+
+def _file(data: bytes) -> Part:
+    encoded = base64.b64encode(data).decode()
+    return Part(root=FilePart(file=FileWithBytes(bytes=encoded, name="report")))
+
+
+def _chunk(
+    parts: list[Part], append: bool = True, last: bool = False
+) -> TaskArtifactUpdateEvent:
+    return TaskArtifactUpdateEvent(
+        task_id="t",
+        context_id="c",
+        artifact=Artifact(artifact_id="a", parts=parts),
+        append=append,
+        last_chunk=last,
+    )
+
+
+class ArtifactAssemblerTests(unittest.TestCase):
+    def setUp(self):
+        self.assembler = ArtifactAssembler()
+
+    def assemble(self, *events: TaskArtifactUpdateEvent) -> Artifact:
+        for event in events:
+            assembled = self.assembler.add("t", event)
+        self.assertIsNotNone(assembled)
+        self.addCleanup(assembled.close)
+        return assembled.to_artifact()
+
+    def test_parts_keep_their_order(self):
+        artifact = self.assemble(
+            _chunk([_text("Hello, ")], append=False),
+            _chunk([_text("world"), _file(b"\x00\x01")]),
+            _chunk([_file(b"\x02"), Part(root=DataPart(data={"n": 1}))]),
+            _chunk([_text("!")], last=True),
+        )
+        roots = [part.root for part in artifact.parts]
+        self.assertEqual(
+            [type(root) for root in roots], [TextPart, FilePart, DataPart, TextPart]
+        )
+        self.assertEqual(roots[0].text, "Hello, world")
+        self.assertEqual(base64.b64decode(roots[1].file.bytes), b"\x00\x01\x02")
+        self.assertEqual(roots[2].data, {"n": 1})
+        self.assertEqual(roots[3].text, "!")
+
+    def test_non_append_chunk_starts_over(self):
+        artifact = self.assemble(
+            _chunk([_text("draft")], append=False),
+            _chunk([_text("final")], append=False),
+            _chunk([_text(" text")], last=True),
+        )
+        self.assertEqual([part.root.text for part in artifact.parts], ["final text"])
+
+    def test_unfinished_artifact_is_incomplete(self):
+        self.assembler.add("t", _chunk([_text("partial")], append=False))
+        [assembled] = self.assembler.finish_task("t")
+        self.addCleanup(assembled.close)
+        self.assertTrue(assembled.to_artifact().metadata["incomplete"])
+        self.assertEqual(len(self.assembler), 0)
+
+    def test_spilled_part_is_a_temporary_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assembler = ArtifactAssembler(spill_threshold=4, spill_dir=directory)
+            assembled = self.assembler.add(
+                "t", _chunk([_text("more than four bytes")], append=False, last=True)
+            )
+            [part] = assembled.to_artifact().parts
+            self.assertTrue(part.root.metadata["temporary"])
+            path = Path(urlparse(part.root.file.uri).path)
+            self.assertEqual(path.read_text(), "more than four bytes")
+            assembled.close()
+            self.assertFalse(path.exists())
+
+
+class TaskStoreArtifactTests(unittest.TestCase):
+    def test_final_task_finishes_streamed_artifacts(self):
+        store = TaskStore()
+        store.update_task(
+            Task(id="t", context_id="c", status=TaskStatus(state=TaskState.working))
+        )
+        store.update_task(_chunk([_text("partial")], append=False))
+        task = store.update_task(
+            Task(id="t", context_id="c", status=TaskStatus(state=TaskState.failed))
+        )
+        [artifact] = task.artifacts
+        self.assertTrue(artifact.metadata["incomplete"])
+        self.assertEqual(artifact.parts[0].root.text, "partial")
+        self.assertEqual(len(store._artifacts), 0)
+
+    def test_artifact_carried_by_the_final_task_wins(self):
+        store = TaskStore()
+        store.update_task(_chunk([_text("partial")], append=False))
+        task = store.update_task(
+            Task(
+                id="t",
+                context_id="c",
+                status=TaskStatus(state=TaskState.completed),
+                artifacts=[Artifact(artifact_id="a", parts=[_text("whole")])],
+            )
+        )
+        self.assertEqual([a.parts[0].root.text for a in task.artifacts], ["whole"])
+        self.assertEqual(len(store._artifacts), 0)
@@ -0,0 +1,101 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import tempfile
+import unittest
+
+from x402_a2a.types import PaymentRequirements
+
+from server.agents.catalog import (
+    DEFAULT_PRICE,
+    SECTOR_PRICES,
+    Catalog,
+    PaymentRequirementsFactory,
+)
+
+
+class CatalogLoadTests(unittest.TestCase):
+    def load(self, text: str) -> Catalog:
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(text)
+        self.addCleanup(os.unlink, f.name)
+        return Catalog.load(f.name)
+
+    def test_latest_year_names_each_source(self):
+        catalog = self.load(
+            "id,name,sector,year\n"
+            "1,New Plant,power,2023\n"
+            "1,Old Plant,power,2021\n"
+            "2,Landfill,waste,2022\n"
+        )
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(catalog.lookup("1").name, "New Plant")
+        self.assertEqual(catalog.lookup("2").price, SECTOR_PRICES["waste"])
+
+    def test_lookup_by_normalized_name(self):
+        catalog = self.load(
+            "id,name,sector,year\n7,Big  Steel Mill,manufacturing,2022\n"
+        )
+        self.assertEqual(catalog.lookup(" big steel MILL ").source_id, "7")
+        self.assertIsNone(catalog.lookup("small steel mill"))
+
+    def test_rows_without_id_or_name_are_skipped(self):
+        catalog = self.load(
+            "id,name,sector,year\n,Nameless,power,2022\n3,,power,2022\n4,Kept,,2022\n"
+        )
+        self.assertEqual(len(catalog), 1)
+        self.assertEqual(catalog.lookup("4").price, DEFAULT_PRICE)
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.load("source,label\n1,Plant\n")
+
+
+class PaymentRequirementsFactoryTests(unittest.TestCase):
+    def setUp(self):
+        self.factory = PaymentRequirementsFactory(
+            PaymentRequirements(
+                scheme="exact",
+                network="base-sepolia",
+                asset="0x" + "1" * 40,
+                pay_to="0x" + "2" * 40,
+                max_amount_required="0",
+                resource="https://example.com/product/",
+                description="",
+                mime_type="application/json",
+                max_timeout_seconds=60,
+                extra={"name": "USDC", "version": "2"},
+            )
+        )
+
+    def quote(self) -> PaymentRequirements:
+        return self.factory.for_product(
+            "sku", "Plant", 12_000_000, "A credit", "https://example.com/p"
+        )
+
+    def test_product_is_priced_and_described(self):
+        requirements = self.quote()
+        self.assertEqual(requirements.max_amount_required, "12000000")
+        self.assertEqual(requirements.extra["product"]["name"], "Plant")
+        self.assertEqual(requirements.extra["name"], "USDC")
+
+    def test_callers_cannot_alter_the_cached_quote(self):
+        requirements = self.quote()
+        requirements.extra["product"]["name"] = "Something else"
+        requirements.extra["name"] = "DAI"
+        again = self.quote()
+        self.assertEqual(again.extra["product"]["name"], "Plant")
+        self.assertEqual(again.extra["name"], "USDC")
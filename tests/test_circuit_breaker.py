@@ -0,0 +1,79 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import unittest
+from unittest import mock
+
+from server.agents.pooled_facilitator import (
+    CircuitBreaker,
+    FacilitatorUnavailableError,
+)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+
+    def open(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(FacilitatorUnavailableError):
+            self.breaker.before_call()
+
+    def test_success_resets_the_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_lets_one_trial_through(self):
+        self.open()
+        self.now += 10
+        self.assertEqual(self.breaker.state, "half-open")
+        self.breaker.before_call()
+        with self.assertRaises(FacilitatorUnavailableError):
+            self.breaker.before_call()
+
+    def test_successful_trial_closes(self):
+        self.open()
+        self.now += 10
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.before_call()
+
+    def test_failed_trial_reopens(self):
+        self.open()
+        self.now += 10
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+
+    def test_abandoned_trial_frees_the_slot(self):
+        self.open()
+        self.now += 10
+        self.breaker.before_call()
+        self.breaker.record_abandoned()
+        self.breaker.before_call()
@@ -0,0 +1,192 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import tempfile
+import unittest
+
+from x402_a2a.types import (
+    EIP3009Authorization,
+    ExactPaymentPayload,
+    PaymentPayload,
+    PaymentRequirements,
+    VerifyResponse,
+)
+
+from server.agents._payment_index import PaymentIndex, payment_key
+from server.agents.x402_merchant_executor import (
+    _current_task_id,
+    x402MerchantExecutor,
+)
+from server.storage.sqlite import SqlitePaymentClaimStore, open_database
+
+_ADDRESS = "0x" + "1" * 40
+
+
+def _requirements(amount: str = "1000") -> PaymentRequirements:
+    return PaymentRequirements(
+        scheme="exact",
+        network="base-sepolia",
+        asset=_ADDRESS,
+        pay_to=_ADDRESS,
+        max_amount_required=amount,
+        resource="https://example.com/product/",
+        description="",
+        mime_type="application/json",
+        max_timeout_seconds=60,
+    )
+
+
+def _payload(nonce: str = "2") -> PaymentPayload:
+    return PaymentPayload(
+        x402_version=1,
+        scheme="exact",
+        network="base-sepolia",
+        payload=ExactPaymentPayload(
+            signature="0x00",
+            authorization=EIP3009Authorization(
+                from_=_ADDRESS,
+                to=_ADDRESS,
+                value="1000",
+                valid_after="0",
+                valid_before="9999999999",
+                nonce="0x" + nonce * 64,
+            ),
+        ),
+    )
+
+
+class PaymentKeyTests(unittest.TestCase):
+    def test_same_authorization_same_key(self):
+        self.assertEqual(
+            payment_key(_payload(), _requirements()),
+            payment_key(_payload(), _requirements()),
+        )
+
+    def test_nonce_and_requirements_are_part_of_the_key(self):
+        key = payment_key(_payload(), _requirements())
+        self.assertNotEqual(key, payment_key(_payload("3"), _requirements()))
+        self.assertNotEqual(key, payment_key(_payload(), _requirements("2000")))
+
+
+class PaymentIndexTests(unittest.TestCase):
+    def test_add_and_discard(self):
+        index = PaymentIndex()
+        key = payment_key(_payload(), _requirements())
+        record = index.add(key, "t")
+        self.assertIs(index.get(key), record)
+        index.discard(key)
+        self.assertIsNone(index.get(key))
+
+    def test_expired_records_are_evicted(self):
+        index = PaymentIndex(ttl_seconds=0)
+        key = payment_key(_payload(), _requirements())
+        index.add(key, "t")
+        self.assertIsNone(index.get(key))
+        self.assertEqual(len(index), 0)
+
+    def test_oldest_record_is_evicted_when_full(self):
+        index = PaymentIndex(max_entries=2)
+        keys = [payment_key(_payload(n), _requirements()) for n in "234"]
+        for key in keys:
+            index.add(key, "t")
+        self.assertIsNone(index.get(keys[0]))
+        self.assertIsNotNone(index.get(keys[1]))
+        self.assertIsNotNone(index.get(keys[2]))
+
+
+class _SlowFacilitator:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def verify(self, payload, requirements):
+        self.calls += 1
+        await self.release.wait()
+        return VerifyResponse(is_valid=True, payer=_ADDRESS)
+
+
+class VerifyPaymentTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = x402MerchantExecutor(delegate=None)
+        self.facilitator = _SlowFacilitator()
+        self.executor._facilitator = self.facilitator
+
+    async def test_retry_shares_the_first_verification(self):
+        first = asyncio.create_task(
+            self.executor.verify_payment(_payload(), _requirements())
+        )
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(
+            self.executor.verify_payment(_payload(), _requirements())
+        )
+        await asyncio.sleep(0)
+        self.facilitator.release.set()
+        self.assertTrue((await first).is_valid)
+        self.assertTrue((await retry).is_valid)
+        self.assertEqual(self.facilitator.calls, 1)
+
+    async def test_cancelled_first_request_leaves_the_retry_its_answer(self):
+        first = asyncio.create_task(
+            self.executor.verify_payment(_payload(), _requirements())
+        )
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(
+            self.executor.verify_payment(_payload(), _requirements())
+        )
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.wait({first})
+        self.facilitator.release.set()
+        self.assertTrue((await retry).is_valid)
+        self.assertEqual(self.facilitator.calls, 1)
+
+
+class _Facilitator:
+    async def verify(self, payload, requirements):
+        return VerifyResponse(is_valid=True, payer=_ADDRESS)
+
+
+class SharedClaimsTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.db = open_database(os.path.join(self.dir.name, "za.db"), None)
+        # Two worker processes' executors sharing one database.
+        self.workers = []
+        for _ in range(2):
+            executor = x402MerchantExecutor(
+                delegate=None, payment_claims=SqlitePaymentClaimStore(self.db)
+            )
+            executor._facilitator = _Facilitator()
+            self.workers.append(executor)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.dir.cleanup()
+
+    async def verify(self, executor, task_id):
+        token = _current_task_id.set(task_id)
+        try:
+            return await executor.verify_payment(_payload(), _requirements())
+        finally:
+            _current_task_id.reset(token)
+
+    async def test_replay_on_another_worker_is_rejected(self):
+        first, second = self.workers
+        self.assertTrue((await self.verify(first, "a")).is_valid)
+        replay = await self.verify(second, "b")
+        self.assertFalse(replay.is_valid)
+        self.assertEqual(replay.invalid_reason, "payment_already_used")
+        # A retry of the same task may land on any worker.
+        self.assertTrue((await self.verify(second, "a")).is_valid)
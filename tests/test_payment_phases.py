@@ -0,0 +1,81 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import tempfile
+import unittest
+
+from server.storage.payment_phases import (
+    CANCELED,
+    SETTLING,
+    InMemoryPaymentPhaseStore,
+)
+
+
+class PaymentPhaseStoreTests:
+    async def test_settling_excludes_cancel(self):
+        self.assertTrue(await self.store.transition("t", SETTLING, unless=CANCELED))
+        self.assertFalse(await self.store.transition("t", CANCELED, unless=SETTLING))
+        self.assertEqual(await self.store.get("t"), SETTLING)
+
+    async def test_cancel_excludes_settling(self):
+        self.assertTrue(await self.store.transition("t", CANCELED, unless=SETTLING))
+        self.assertFalse(await self.store.transition("t", SETTLING, unless=CANCELED))
+        self.assertEqual(await self.store.get("t"), CANCELED)
+
+    async def test_racing_transitions_have_one_winner(self):
+        won = await asyncio.gather(
+            self.store.transition("t", SETTLING, unless=CANCELED),
+            self.store.transition("t", CANCELED, unless=SETTLING),
+        )
+        self.assertEqual(sorted(won), [False, True])
+
+    async def test_clear(self):
+        await self.store.transition("t", CANCELED, unless=SETTLING)
+        await self.store.clear("t")
+        self.assertIsNone(await self.store.get("t"))
+        self.assertTrue(await self.store.transition("t", SETTLING, unless=CANCELED))
+
+
+class InMemoryPaymentPhaseStoreTest(
+    PaymentPhaseStoreTests, unittest.IsolatedAsyncioTestCase
+):
+    def setUp(self):
+        self.store = InMemoryPaymentPhaseStore()
+
+    async def test_bounded(self):
+        store = InMemoryPaymentPhaseStore(max_tasks=2)
+        for task_id in "abc":
+            await store.transition(task_id, CANCELED, unless=SETTLING)
+        self.assertIsNone(await store.get("a"))
+        self.assertEqual(await store.get("c"), CANCELED)
+
+
+class SqlitePaymentPhaseStoreTest(
+    PaymentPhaseStoreTests, unittest.IsolatedAsyncioTestCase
+):
+    async def asyncSetUp(self):
+        from server.storage.sqlite import SqlitePaymentPhaseStore, open_database
+
+        self.dir = tempfile.TemporaryDirectory()
+        self.db = open_database(os.path.join(self.dir.name, "za.db"), None)
+        self.store = SqlitePaymentPhaseStore(self.db)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+import unittest
+
+import httpx
+import uvicorn
+from prometheus_client import REGISTRY
+from x402_a2a import FacilitatorConfig
+from x402_a2a.types import (
+    EIP3009Authorization,
+    ExactPaymentPayload,
+    PaymentPayload,
+    PaymentRequirements,
+)
+
+from server.agents.mock_facilitator import (
+    MockFacilitator,
+    OperationProfile,
+    create_mock_facilitator_app,
+)
+from server.agents.pooled_facilitator import (
+    FacilitatorTransportConfig,
+    FacilitatorUnavailableError,
+    PooledFacilitatorClient,
+)
+
+_ADDRESS = "0x" + "1" * 40
+
+_REQUIREMENTS = PaymentRequirements(
+    scheme="exact",
+    network="base-sepolia",
+    asset=_ADDRESS,
+    pay_to=_ADDRESS,
+    max_amount_required="1000",
+    resource="https://example.com/product/",
+    description="",
+    mime_type="application/json",
+    max_timeout_seconds=60,
+)
+
+_PAYLOAD = PaymentPayload(
+    x402_version=1,
+    scheme="exact",
+    network="base-sepolia",
+    payload=ExactPaymentPayload(
+        signature="0x00",
+        authorization=EIP3009Authorization(
+            from_=_ADDRESS,
+            to=_ADDRESS,
+            value="1000",
+            valid_after="0",
+            valid_before="9999999999",
+            nonce="0x" + "2" * 64,
+        ),
+    ),
+)
+
+
+def _sample(name: str, operation: str) -> float:
+    return REGISTRY.get_sample_value(name, {"operation": operation}) or 0.0
+
+
+class PooledFacilitatorClientTests(unittest.IsolatedAsyncioTestCase):
+    """Drives the client over real connections to the mock facilitator app."""
+
+    async def serve(
+        self, facilitator: MockFacilitator, **transport
+    ) -> PooledFacilitatorClient:
+        server = uvicorn.Server(
+            uvicorn.Config(
+                create_mock_facilitator_app(facilitator),
+                host="127.0.0.1",
+                port=0,
+                log_level="warning",
+            )
+        )
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        async def stop():
+            server.should_exit = True
+            await serving
+
+        self.addAsyncCleanup(stop)
+        client = PooledFacilitatorClient(
+            FacilitatorConfig(url=f"http://127.0.0.1:{port}"),
+            FacilitatorTransportConfig(http2=False, **transport),
+        )
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    async def test_verifies_and_settles(self):
+        client = await self.serve(MockFacilitator())
+        self.assertTrue((await client.verify(_PAYLOAD, _REQUIREMENTS)).is_valid)
+        self.assertTrue((await client.settle(_PAYLOAD, _REQUIREMENTS)).success)
+        self.assertEqual(client.breaker.state, "closed")
+
+    async def test_slow_call_is_cut_at_its_deadline(self):
+        client = await self.serve(
+            MockFacilitator(verify=OperationProfile(latency_p50=2.0)),
+            verify_deadline=0.1,
+        )
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            await client.verify(_PAYLOAD, _REQUIREMENTS)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    async def test_errors_open_the_circuit(self):
+        facilitator = MockFacilitator(verify=OperationProfile(error_rate=1.0))
+        client = await self.serve(facilitator, breaker_failures=2)
+        for _ in range(2):
+            with self.assertRaises(httpx.HTTPStatusError) as raised:
+                await client.verify(_PAYLOAD, _REQUIREMENTS)
+            self.assertEqual(raised.exception.response.status_code, 503)
+        self.assertEqual(client.breaker.state, "open")
+        # Fails fast with a reason the caller can pass on to the client.
+        with self.assertRaises(FacilitatorUnavailableError) as raised:
+            await client.verify(_PAYLOAD, _REQUIREMENTS)
+        self.assertTrue(raised.exception.reason.startswith("facilitator_unavailable"))
+        self.assertEqual(facilitator.stats()["verify"]["outcomes"], {"error": 2})
+
+    async def test_saturated_pool_times_out(self):
+        client = await self.serve(
+            MockFacilitator(verify=OperationProfile(latency_p50=0.5)),
+            max_connections=1,
+            max_keepalive_connections=1,
+            pool_timeout=0.05,
+        )
+        in_flight = _sample("za_facilitator_in_flight", "verify")
+        pool_timeouts = _sample("za_facilitator_pool_timeouts_total", "verify")
+
+        first = asyncio.create_task(client.verify(_PAYLOAD, _REQUIREMENTS))
+        await asyncio.sleep(0.1)
+        self.assertEqual(_sample("za_facilitator_in_flight", "verify"), in_flight + 1)
+        with self.assertRaises(httpx.PoolTimeout):
+            await client.verify(_PAYLOAD, _REQUIREMENTS)
+        self.assertEqual(
+            _sample("za_facilitator_pool_timeouts_total", "verify"),
+            pool_timeouts + 1,
+        )
+        self.assertTrue((await first).is_valid)
+        self.assertEqual(_sample("za_facilitator_in_flight", "verify"), in_flight)
+
+
+if __name__ == "__main__":
+    unittest.main()
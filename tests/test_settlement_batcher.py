@@ -0,0 +1,56 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from x402_a2a.types import SettleResponse
+
+from server.agents._settlement_batcher import SettlementBatcher
+
+
+class _Facilitator:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.started = asyncio.Event()
+        self.batches = []
+
+    async def settle_batch(self, items):
+        self.batches.append(len(items))
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        return [SettleResponse(success=True) for _ in items]
+
+
+class SettlementBatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_concurrent_payments(self):
+        facilitator = _Facilitator()
+        batcher = SettlementBatcher(facilitator, window=0.01, max_batch=8)
+        results = await asyncio.gather(*(batcher.settle(i, i) for i in range(3)))
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(facilitator.batches, [3])
+
+    async def test_cancelled_batch_fails_its_callers(self):
+        facilitator = _Facilitator(delay=10)
+        batcher = SettlementBatcher(facilitator, window=0.01, max_batch=8)
+        calls = [asyncio.ensure_future(batcher.settle(i, i)) for i in range(2)]
+        await facilitator.started.wait()
+        for flush in list(batcher._flushes):
+            flush.cancel()
+        for call in calls:
+            with self.assertRaises(RuntimeError):
+                await asyncio.wait_for(call, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import unittest
+
+import httpx
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import Task, TaskState, TaskStatus
+from x402_a2a.types import (
+    EIP3009Authorization,
+    ExactPaymentPayload,
+    PaymentPayload,
+    PaymentRequirements,
+    SettleResponse,
+)
+
+from server.agents._settlement_worker import SettlementConfig, SettlementWorker
+from server.storage.settlements import (
+    FAILED,
+    PENDING,
+    SETTLED,
+    InMemorySettlementStore,
+    SettlementJob,
+)
+
+_ADDRESS = "0x" + "1" * 40
+
+_REQUIREMENTS = PaymentRequirements(
+    scheme="exact",
+    network="base-sepolia",
+    asset=_ADDRESS,
+    pay_to=_ADDRESS,
+    max_amount_required="1000",
+    resource="https://example.com/product/",
+    description="",
+    mime_type="application/json",
+    max_timeout_seconds=60,
+)
+
+_PAYLOAD = PaymentPayload(
+    x402_version=1,
+    scheme="exact",
+    network="base-sepolia",
+    payload=ExactPaymentPayload(
+        signature="0x00",
+        authorization=EIP3009Authorization(
+            from_=_ADDRESS,
+            to=_ADDRESS,
+            value="1000",
+            valid_after="0",
+            valid_before="9999999999",
+            nonce="0x" + "2" * 64,
+        ),
+    ),
+)
+
+_ALREADY_USED = SettleResponse(success=False, error_reason="authorization_already_used")
+
+
+class _ScriptedFacilitator:
+    """Answers each `settle` call with the next scripted outcome."""
+
+    def __init__(self, *outcomes):
+        self._outcomes = list(outcomes)
+
+    async def settle(self, payload, requirements):
+        outcome = self._outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class _FakeLookup:
+    def __init__(self, transaction):
+        self.transaction = transaction
+
+    async def find_transfer(self, payload, requirements):
+        return self.transaction
+
+
+class SettlementWorkerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.task_store = InMemoryTaskStore()
+        await self.task_store.save(
+            Task(
+                id="t",
+                context_id="c",
+                status=TaskStatus(state=TaskState.completed),
+            )
+        )
+
+    def worker(self, *outcomes, max_attempts=3, authorizations=None):
+        return SettlementWorker(
+            "merchant",
+            InMemorySettlementStore(),
+            _ScriptedFacilitator(*outcomes),
+            self.task_store,
+            SettlementConfig(mode="async", max_attempts=max_attempts),
+            authorizations,
+        )
+
+    def job(self):
+        return SettlementJob(
+            id="j",
+            queue="merchant",
+            task_id="t",
+            payload=_PAYLOAD.model_dump_json(by_alias=True),
+            requirements=_REQUIREMENTS.model_dump_json(by_alias=True),
+        )
+
+    async def test_error_is_retried_later(self):
+        worker, job = self.worker(httpx.ConnectError("refused")), self.job()
+        await worker._process(job)
+        self.assertEqual(job.status, PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.next_attempt_at, time.time())
+        self.assertFalse(job.recorded)
+
+    async def test_gives_up_after_max_attempts(self):
+        worker = self.worker(TimeoutError(), TimeoutError(), max_attempts=2)
+        job = self.job()
+        await worker._process(job)
+        await worker._process(job)
+        self.assertEqual(job.status, FAILED)
+        task = await self.task_store.get("t")
+        self.assertEqual(task.status.state, TaskState.failed)
+
+    async def test_rejection_is_final(self):
+        worker, job = self.worker(_ALREADY_USED), self.job()
+        await worker._process(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "authorization_already_used")
+
+    async def test_retry_of_a_landed_settlement_is_settled(self):
+        # The first attempt timed out here but went through on chain.
+        worker = self.worker(
+            TimeoutError(), _ALREADY_USED, authorizations=_FakeLookup("0xabc")
+        )
+        job = self.job()
+        await worker._process(job)
+        await worker._process(job)
+        self.assertEqual(job.status, SETTLED)
+        self.assertIsNone(job.error)
+        self.assertEqual(
+            SettleResponse.model_validate_json(job.result).transaction, "0xabc"
+        )
+        self.assertTrue(job.recorded)
+        task = await self.task_store.get("t")
+        self.assertEqual(task.status.state, TaskState.completed)
+        self.assertEqual(task.metadata["x402_settlement"]["status"], SETTLED)
+
+    async def test_unconfirmed_retry_is_left_for_review(self):
+        for authorizations in (None, _FakeLookup(None)):
+            worker = self.worker(
+                TimeoutError(), _ALREADY_USED, authorizations=authorizations
+            )
+            job = self.job()
+            await worker._process(job)
+            await worker._process(job)
+            self.assertEqual(job.status, FAILED)
+            self.assertIn("manual review", job.error)
+
+    async def test_other_rejections_on_retry_are_not_settled(self):
+        rejected = SettleResponse(success=False, error_reason="invalid_nonce")
+        worker = self.worker(
+            TimeoutError(), rejected, authorizations=_FakeLookup("0xabc")
+        )
+        job = self.job()
+        await worker._process(job)
+        await worker._process(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "invalid_nonce")
+
+    async def test_undecodable_payment_fails_at_once(self):
+        worker, job = self.worker(), self.job()
+        job.payload = "{}"
+        await worker._process(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertTrue(job.recorded)
+
+    async def test_unexpected_errors_are_given_up(self):
+        worker = self.worker(KeyError("success"), KeyError("success"), max_attempts=2)
+        job = self.job()
+        await worker._process(job)
+        self.assertEqual((job.status, job.attempts), (PENDING, 1))
+        await worker._process(job)
+        self.assertEqual((job.status, job.attempts), (FAILED, 2))
+        await worker._process(job)
+        self.assertTrue(job.recorded)
+
+    async def test_settlement_waits_for_the_task_to_finish(self):
+        task = await self.task_store.get("t")
+        task.status = TaskStatus(state=TaskState.working)
+        await self.task_store.save(task)
+        worker, job = self.worker(SettleResponse(success=True)), self.job()
+        await worker._process(job)
+        self.assertEqual(job.status, SETTLED)
+        self.assertFalse(job.recorded)
@@ -0,0 +1,149 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import tempfile
+import unittest
+
+from a2a.types import Task, TaskState, TaskStatus
+from x402_a2a.types import PaymentRequirements
+
+from server.storage.payment_phases import CANCELED, SETTLING
+from server.storage.settlements import SettlementJob
+from server.storage.sqlite import (
+    SqlitePaymentPhaseStore,
+    SqlitePaymentRequirementsStore,
+    SqliteSessionService,
+    SqliteSettlementStore,
+    SqliteTaskStore,
+    open_database,
+)
+
+REQUIREMENTS = PaymentRequirements(
+    scheme="exact",
+    network="base-sepolia",
+    maxAmountRequired="1000",
+    resource="https://example.com/product",
+    description="A product",
+    mimeType="application/json",
+    payTo="0x" + "1" * 40,
+    maxTimeoutSeconds=600,
+    asset="0x" + "2" * 40,
+)
+
+
+def _task(task_id: str) -> Task:
+    return Task(id=task_id, contextId="c", status=TaskStatus(state=TaskState.working))
+
+
+class SweepTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.db = open_database(
+            os.path.join(self.dir.name, "za.db"), 0.05, sweep_interval=0
+        )
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.dir.cleanup()
+
+    async def test_swept_rows_leave_the_caches(self):
+        tasks = SqliteTaskStore(self.db)
+        sessions = SqliteSessionService(self.db)
+        await tasks.save(_task("old"))
+        await sessions.create_session(app_name="a", user_id="u", session_id="s")
+        self.assertIsNotNone(await tasks.get("old"))
+
+        await asyncio.sleep(0.1)
+        # Sweeps run after a batch of writes; a read queues behind it.
+        await tasks.save(_task("new"))
+        await self.db.fetchall("SELECT 1")
+
+        self.assertIsNone(await tasks.get("old"))
+        self.assertIsNotNone(await tasks.get("new"))
+        self.assertIsNone(
+            await sessions.get_session(app_name="a", user_id="u", session_id="s")
+        )
+
+    async def test_payments_in_flight_outlive_the_ttl(self):
+        settlements = SqliteSettlementStore(self.db)
+        phases = SqlitePaymentPhaseStore(self.db)
+        for job_id, recorded in (("pending", False), ("done", True)):
+            await settlements.add(
+                SettlementJob(
+                    id=job_id,
+                    queue="q",
+                    task_id=job_id,
+                    payload="{}",
+                    requirements="{}",
+                    recorded=recorded,
+                )
+            )
+        await phases.transition("settling", SETTLING, unless=CANCELED)
+        await phases.transition("canceled", CANCELED, unless=SETTLING)
+
+        await asyncio.sleep(0.1)
+        await self.db.write()
+        await self.db.fetchall("SELECT 1")
+
+        self.assertEqual(await settlements.pending_count("q"), 1)
+        rows = await self.db.fetchall("SELECT id FROM settlements")
+        self.assertEqual(rows, [("pending",)])
+        self.assertEqual(await phases.get("settling"), SETTLING)
+        self.assertIsNone(await phases.get("canceled"))
+
+    async def test_failed_write_only_fails_its_writer(self):
+        tasks = SqliteTaskStore(self.db)
+        bad = self.db.write(("INSERT INTO no_such_table VALUES (?)", (1,)))
+        results = await asyncio.gather(
+            bad, tasks.save(_task("t")), return_exceptions=True
+        )
+        self.assertIsInstance(results[0], Exception)
+        self.assertIsNone(results[1])
+        self.assertIsNotNone(await tasks.get("t"))
+
+
+class PaymentRequirementsStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.db = open_database(os.path.join(self.dir.name, "za.db"), None)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.dir.cleanup()
+
+    async def test_shared_through_the_database(self):
+        offering = SqlitePaymentRequirementsStore(self.db)
+        offering["t"] = [REQUIREMENTS]
+        self.assertEqual(offering["t"], [REQUIREMENTS])
+        await offering.flush()
+
+        # As seen by another worker process.
+        following_up = SqlitePaymentRequirementsStore(self.db)
+        self.assertIsNone(following_up.get("t"))
+        await following_up.load("t")
+        self.assertEqual(following_up["t"], [REQUIREMENTS])
+
+        del following_up["t"]
+        # Deletes aren't flushed; an empty write commits after it.
+        await self.db.write()
+        other = SqlitePaymentRequirementsStore(self.db)
+        await other.load("t")
+        self.assertNotIn("t", other)
+        with self.assertRaises(KeyError):
+            del other["t"]
+
+
+if __name__ == "__main__":
+    unittest.main()
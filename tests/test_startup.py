@@ -0,0 +1,60 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import builtins
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from server.startup import _ImportTimer
+
+
+class ImportTimerTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self.dir.name)
+        for name in ("za_timed", "za_untimed"):
+            Path(self.dir.name, f"{name}.py").write_text("VALUE = 1\n")
+
+    def tearDown(self):
+        sys.path.remove(self.dir.name)
+        for name in ("za_timed", "za_untimed"):
+            sys.modules.pop(name, None)
+        self.dir.cleanup()
+
+    def test_installed_only_while_measuring(self):
+        original = builtins.__import__
+        timer = _ImportTimer()
+        with timer.measure():
+            self.assertIs(builtins.__import__, timer)
+            with timer.measure():
+                pass
+            self.assertIs(builtins.__import__, timer)
+            __import__("za_timed")
+        self.assertIs(builtins.__import__, original)
+        self.assertIn("za_timed", timer.seconds)
+
+        __import__("za_untimed")
+        self.assertNotIn("za_untimed", timer.seconds)
+
+    def test_uninstalled_when_the_block_raises(self):
+        original = builtins.__import__
+        timer = _ImportTimer()
+        with self.assertRaises(ImportError), timer.measure():
+            __import__("za_missing")
+        self.assertIs(builtins.__import__, original)
+
+
+if __name__ == "__main__":
+    unittest.main()
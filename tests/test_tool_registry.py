@@ -0,0 +1,118 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import unittest
+
+from server.agents._tool_registry import (
+    ToolArgumentError,
+    ToolOptions,
+    ToolRegistry,
+    ToolTimeoutError,
+)
+
+
+class PaymentRequired(Exception):
+    pass
+
+
+async def quote(product_name: str, tool_context=None):
+    raise PaymentRequired(product_name)
+
+
+async def slow(seconds: float):
+    await asyncio.sleep(seconds)
+    return "done"
+
+
+async def own_timeout():
+    raise TimeoutError("upstream timed out")
+
+
+def add(a: int, b: int = 1):
+    return a + b
+
+
+async def invoke(spec, args):
+    result = spec.func(**args)
+    return await result if asyncio.iscoroutine(result) else result
+
+
+class ToolRegistryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.registry = ToolRegistry(
+            [quote, slow, own_timeout, add],
+            ToolOptions(timeout=0.05),
+            passthrough=(PaymentRequired,),
+        )
+
+    async def test_calls_tool(self):
+        self.assertEqual(await self.registry.call("add", {"a": 1}, invoke), 2)
+
+    async def test_rejects_bad_arguments(self):
+        with self.assertRaises(ToolArgumentError):
+            await self.registry.call("add", {"b": 1}, invoke)
+        with self.assertRaises(ToolArgumentError):
+            await self.registry.call("add", {"a": 1, "c": 2}, invoke)
+        # Injected parameters aren't required from the model.
+        self.assertEqual(self.registry.get("quote").required, {"product_name"})
+
+    async def test_passthrough_is_not_an_error(self):
+        with self.assertRaises(PaymentRequired):
+            await self.registry.call("quote", {"product_name": "x"}, invoke)
+        self.assertEqual(self.registry.stats()["quote"]["errors"], 0)
+
+    async def test_registry_timeout(self):
+        with self.assertRaises(ToolTimeoutError):
+            await self.registry.call("slow", {"seconds": 1}, invoke)
+        stats = self.registry.stats()["slow"]
+        self.assertEqual((stats["timeouts"], stats["errors"]), (1, 0))
+
+    async def test_tool_timeout_error_is_not_the_registry_timeout(self):
+        with self.assertRaises(TimeoutError) as raised:
+            await self.registry.call("own_timeout", {}, invoke)
+        self.assertNotIsInstance(raised.exception, ToolTimeoutError)
+        stats = self.registry.stats()["own_timeout"]
+        self.assertEqual((stats["timeouts"], stats["errors"]), (0, 1))
+
+
+class SyncToolConcurrencyTest(unittest.IsolatedAsyncioTestCase):
+    async def test_timed_out_thread_keeps_its_slot(self):
+        release = threading.Event()
+
+        def blocking(wait: bool):
+            if wait:
+                release.wait(5)
+            return "done"
+
+        registry = ToolRegistry(
+            [blocking], ToolOptions(timeout=0.05, max_concurrency=1)
+        )
+
+        async def in_thread(spec, args):
+            return await asyncio.to_thread(spec.func, **args)
+
+        with self.assertRaises(ToolTimeoutError):
+            await registry.call("blocking", {"wait": True}, in_thread)
+        # The first thread still runs, so even a quick call can't get a slot.
+        with self.assertRaises(ToolTimeoutError):
+            await registry.call("blocking", {"wait": False}, in_thread)
+        release.set()
+        self.assertEqual(
+            await registry.call("blocking", {"wait": False}, in_thread), "done"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()